@@ -0,0 +1,96 @@
+# adaptive_grid.py
+
+# Adaptive refinement of the sweep grid (var_values) within a budget of runs.
+
+# Description: Instead of running every value of a hand-written grid, AdaptiveGrid starts with a coarse grid of
+# initial_points values, evenly spread over [min(var_values), max(var_values)] (in steps of step), and then repeatedly
+# inserts the midpoint of the interval between two neighbouring evaluated values with the largest score:
+#   score = max over metrics of  |mean_b - mean_a| / range(metric) * min(1, |mean_b - mean_a| / (ci_a + ci_b))
+#           + WIDTH_WEIGHT * (b - a) / (max - min)
+# The first factor is the change of the mean metric between the neighbours (relative to its range over all values),
+# the second one is close to 1 if the 95% CIs (safe_ci95 estimator) do not overlap and small if they overlap (the
+# change is then not significant). The width term spreads the remaining runs over large unexplored gaps. Refinement
+# stops when the next value would exceed the run budget or no interval can be split any more.
+
+import math
+import numpy as np
+from stats import RunningStats
+
+GRID_METRICS = ("ratio_alg_opt", "fractional_count", "alg_div_opt_lp")
+WIDTH_WEIGHT = 0.05
+
+
+class AdaptiveGrid:
+    def __init__(self, var_values, run_budget, initial_points=5, step=1, metrics=GRID_METRICS):
+        low, high = min(var_values), max(var_values)
+        self.domain = list(range(low, high + 1, step))
+        if high not in self.domain:
+            self.domain.append(high)
+        positions = np.unique(np.rint(np.linspace(0, len(self.domain) - 1, min(initial_points, len(self.domain)))))
+        self.initial = [self.domain[int(pos)] for pos in positions]
+        self.run_budget = run_budget
+        self.metrics = metrics
+        self.evaluated = []
+
+    # Mean and CI per evaluated value and metric from the result rows (rows of main.py with "varying_param")
+    def _point_stats(self, results):
+        stats = {}
+        for row in results:
+            per_metric = stats.setdefault(row["varying_param"], {})
+            for metric in self.metrics:
+                if row.get(metric) is not None:
+                    per_metric.setdefault(metric, RunningStats()).update(row[metric])
+        return stats
+
+    def _score(self, stats, a, b, ranges):
+        span = max(self.domain[-1] - self.domain[0], 1)
+        change = 0.0
+        for metric, (low, high) in ranges.items():
+            stats_a, stats_b = stats[a].get(metric), stats[b].get(metric)
+            if stats_a is None or stats_b is None or stats_a.count == 0 or stats_b.count == 0 or high <= low:
+                continue
+            jump = abs(stats_b.mean - stats_a.mean)
+            ci_sum = stats_a.ci95() + stats_b.ci95()
+            significance = 1.0 if ci_sum == 0 else min(1.0, jump / ci_sum)
+            change = max(change, jump / (high - low) * significance)
+        return change + WIDTH_WEIGHT * (b - a) / span
+
+    # Next value to evaluate (midpoint of the interval with the largest score), or None if no interval can be split
+    def next_value(self, results):
+        stats = self._point_stats(results)
+        evaluated = sorted(value for value in self.evaluated if value in stats)
+        ranges = {}
+        for metric in self.metrics:
+            means = [stats[value][metric].mean for value in evaluated
+                     if metric in stats[value] and stats[value][metric].count > 0]
+            if means:
+                ranges[metric] = (min(means), max(means))
+
+        best, best_score = None, -math.inf
+        for a, b in zip(evaluated, evaluated[1:]):
+            inner = [value for value in self.domain if a < value < b]
+            if not inner:
+                continue
+            score = self._score(stats, a, b, ranges)
+            if score > best_score:
+                best, best_score = inner[len(inner) // 2], score
+        if best is not None:
+            print(f"Adaptive grid: next value {best} (score {best_score:.3f})")
+        return best
+
+    # Values to run; results is the list the caller appends the rows of every value to (read between two values)
+    def values(self, results):
+        start = len(results)
+        for value in self.initial:
+            self.evaluated.append(value)
+            yield value
+        while True:
+            spent = len(results) - start
+            runs_per_value = spent / len(self.evaluated)
+            if spent + runs_per_value > self.run_budget:
+                return
+            value = self.next_value(results[start:])
+            if value is None:
+                return
+            self.evaluated.append(value)
+            yield value
@@ -0,0 +1,218 @@
+# backend.py
+
+# LP/MILP backends for the robust selection problem.
+
+# All LP and MILP based solvers accept a backend argument. "gurobi" (default) uses gurobipy as before. "highs" uses the
+# open-source HiGHS solver through scipy.optimize (linprog for the LP relaxation, milp for the exact model), so no
+# Gurobi license is needed. Both backends solve the same epigraph formulation:
+#   min-max: min z  s.t.  sum_i x_i = p,  sum_i c[s,i] * x_i <= z  for all s,  x in [0, 1]^n (binary for exact)
+#   max-min: max z  s.t.  sum_i x_i = p,  sum_i c[s,i] * x_i >= z  for all s,  x in [0, 1]^n (binary for exact)
+
+import threading
+import time
+import numpy as np
+from utils import as_cost_array, as_cost_matrix, is_sparse
+from memory_profile import mark_stage
+
+# Gurobi is optional when only the HiGHS backend is used
+try:
+    import gurobipy as gp
+    from gurobipy import GRB
+except ImportError:
+    gp = None
+    GRB = None
+
+BACKENDS = ("gurobi", "highs")
+
+GUROBI_OUTPUT_FLAG = 0  # Solver log of the Gurobi environments (0: silent, e.g. service.py writes responses to stdout)
+
+_thread_state = threading.local()  # One Gurobi environment per thread
+_gurobi_envs = []  # All open environments (closed by close_gurobi_envs)
+_gurobi_envs_lock = threading.Lock()
+
+
+def check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Options: {', '.join(BACKENDS)}")
+    if backend == "gurobi" and gp is None:
+        raise RuntimeError("gurobipy is not installed. Install it or use backend='highs'.")
+
+
+def gurobi_available():
+    return gp is not None
+
+
+# New Gurobi model in the calling thread's own environment (Gurobi environments must not be shared between threads).
+# threads: Gurobi thread budget for this model (None = Gurobi default). The caller disposes the model after use.
+def gurobi_model(name, threads=None):
+    env = getattr(_thread_state, "env", None)
+    with _gurobi_envs_lock:
+        if env is None or env not in _gurobi_envs:  # First model of this thread or closed by close_gurobi_envs
+            env = gp.Env(empty=True)
+            env.setParam("OutputFlag", GUROBI_OUTPUT_FLAG)
+            env.start()
+            _thread_state.env = env
+            _gurobi_envs.append(env)
+    m = gp.Model(name, env=env)
+    if threads is not None:
+        m.Params.Threads = threads
+    return m
+
+
+# Close the Gurobi environments of all threads (no model may be in use); later models open new environments
+def close_gurobi_envs():
+    with _gurobi_envs_lock:
+        envs = list(_gurobi_envs)
+        _gurobi_envs.clear()
+    for env in envs:
+        env.dispose()
+
+
+# Feasible selection without a solver: the p items with the smallest (min-max) / largest (max-min) total cost
+def greedy_selection(C, p, criterion="minmax"):
+    total = C.sum(axis=0, dtype=np.float64)
+    order = np.argsort(total if criterion == "minmax" else -total, kind="stable")
+    x = np.zeros(C.shape[1])
+    x[order[:p]] = 1.0
+    return x
+
+
+# Bound on OPT without a solver: largest sum of the p smallest costs of a scenario (min-max), smallest sum of the p
+# largest profits of a scenario (max-min)
+def trivial_bound(C, p, criterion="minmax"):
+    C_sorted = np.sort(C, axis=1)
+    if criterion == "minmax":
+        return float(C_sorted[:, :p].sum(axis=1, dtype=np.float64).max())
+    return float(C_sorted[:, C.shape[1] - p:].sum(axis=1, dtype=np.float64).min())
+
+
+# MIP callback that appends (runtime, best objective, best bound) to trajectory whenever one of them changes
+def gurobi_trajectory_callback(trajectory):
+    def callback(model, where):
+        if where == GRB.Callback.MIP:
+            point = (model.cbGet(GRB.Callback.RUNTIME), model.cbGet(GRB.Callback.MIP_OBJBST),
+                     model.cbGet(GRB.Callback.MIP_OBJBND))
+        elif where == GRB.Callback.MIPSOL:
+            point = (model.cbGet(GRB.Callback.RUNTIME), model.cbGet(GRB.Callback.MIPSOL_OBJBST),
+                     model.cbGet(GRB.Callback.MIPSOL_OBJBND))
+        else:
+            return
+        if not trajectory or trajectory[-1][1:] != point[1:]:
+            trajectory.append(point)
+    return callback
+
+
+# Result of a (possibly time-limited) Gurobi MIP: incumbent objective, x-values and the info dict
+# (bound, gap, optimal, trajectory). Raises a RuntimeError if no feasible solution was found.
+def gurobi_mip_result(m, x, n, trajectory):
+    if m.Status not in (GRB.OPTIMAL, GRB.TIME_LIMIT) or m.SolCount == 0:
+        raise RuntimeError(f"Gurobi found no feasible solution (status {m.Status}).")
+    info = {
+        "bound": m.ObjBound,
+        "gap": m.MIPGap,
+        "optimal": m.Status == GRB.OPTIMAL,
+        "trajectory": trajectory,
+        "nodes": m.NodeCount
+    }
+    return m.ObjVal, [x[i].X for i in range(1, n + 1)], info
+
+
+# Rows [sign * C, -sign] of the scenario constraints (sign * c[s]·x - sign * z <= 0); sparse (CSR) for sparse C
+def epigraph_rows(C, sign):
+    if is_sparse(C):
+        from scipy.sparse import hstack
+        return hstack([sign * C, -sign * np.ones((C.shape[0], 1))], format="csr")
+    return np.hstack([sign * C, -sign * np.ones((C.shape[0], 1))])
+
+
+# Solve the epigraph model with HiGHS. Returns the objective value and the x-values (list of length n).
+# For the MILP, time_limit (seconds) returns the best incumbent instead of failing, and info (dict) receives the best
+# bound, the gap, whether the solution is optimal and a trajectory (only the final point; SciPy has no MIP callback).
+# strengthen: options of the strengthened MILP (strengthening.py), None for the plain model.
+def solve_epigraph_highs(costs, n, p, k, criterion="minmax", integral=False, mip_gap=None, time_limit=None,
+                         info=None, strengthen=None):
+    from scipy.optimize import linprog, milp, LinearConstraint, Bounds
+
+    mark_stage("model_build")
+    C = as_cost_matrix(costs, n, k)  # CSR for sparse costs, so the model has only the stored entries
+    sign = 1.0 if criterion == "minmax" else -1.0  # max-min: -c[s]·x + z <= 0 and minimize -z
+
+    # Variables: x_1, ..., x_n, z (z >= 0 as in the Gurobi models)
+    c_obj = np.zeros(n + 1)
+    c_obj[n] = sign
+    A_ub = epigraph_rows(C, sign)
+    b_ub = np.zeros(k)
+    A_eq = np.hstack([np.ones((1, n)), np.zeros((1, 1))])
+    b_eq = np.array([p], dtype=np.float64)
+    lb, ub = np.zeros(n + 1), np.r_[np.ones(n), np.inf]
+    if integral and strengthen:
+        from strengthening import strengthening_data, highs_strengthening_rows
+        data = strengthening_data(as_cost_array(costs, n, k), p, criterion, strengthen)
+        A_cuts, b_cuts, lb, ub = highs_strengthening_rows(data, n, criterion)
+        if is_sparse(A_ub):
+            from scipy.sparse import vstack
+            A_ub = vstack([A_ub, A_cuts], format="csr")
+        else:
+            A_ub = np.vstack([A_ub, A_cuts])
+        b_ub = np.r_[b_ub, b_cuts]
+
+    mark_stage("optimize")
+    start = time.perf_counter()
+    options = {} if mip_gap is None else {"mip_rel_gap": mip_gap}
+    if time_limit is not None:
+        options["time_limit"] = time_limit
+    if integral:
+        res = milp(
+            c_obj,
+            constraints=[LinearConstraint(A_ub, -np.inf, b_ub), LinearConstraint(A_eq, b_eq, b_eq)],
+            integrality=np.r_[np.ones(n), 0],
+            bounds=Bounds(lb, ub),
+            options=options
+        )
+    else:
+        # Dual simplex returns a basic solution (at most k fractional x-values for min-max)
+        res = linprog(c_obj, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq,
+                      bounds=[(0, 1)] * n + [(0, None)], method="highs-ds")
+
+    time_limit_hit = integral and res.status == 1 and time_limit is not None  # Status 1: time or iteration limit
+    if not (res.status == 0 or time_limit_hit) or (res.x is None and not time_limit_hit):
+        raise RuntimeError(f"HiGHS failed while solving the model (status {res.status}): {res.message}")
+
+    if res.x is None:
+        # Time limit without incumbent: fall back to the greedy selection and the trivial bound
+        x = greedy_selection(C, p, criterion)
+        scenario_sums = C.astype(np.float64) @ x
+        obj_val = float(scenario_sums.max() if criterion == "minmax" else scenario_sums.min())
+        bound = trivial_bound(as_cost_array(costs, n, k), p, criterion)
+    else:
+        x = res.x
+        obj_val = sign * float(res.fun)
+        bound = obj_val if res.mip_dual_bound is None else sign * float(res.mip_dual_bound)
+    if integral and info is not None:
+        info.update({
+            "bound": bound,
+            "gap": abs(obj_val - bound) / max(abs(obj_val), 1e-10),
+            "optimal": res.status == 0,
+            "trajectory": [(time.perf_counter() - start, obj_val, bound)],
+            "nodes": getattr(res, "mip_node_count", None)
+        })
+    x_val = x[:n].tolist()
+    return obj_val, x_val
+
+
+# Solve the same model with both backends and compare the objective values. solve_function must return the objective
+# value (or a tuple starting with it). Skipped (returns None) if Gurobi is not available.
+def cross_check_backends(solve_function, costs, n, p, k, rel_tol=1e-6):
+    if not gurobi_available():
+        return None
+
+    def objective(backend):
+        result = solve_function(costs, n, p, k, backend=backend)
+        return result[0] if isinstance(result, tuple) else result
+
+    obj_gurobi = objective("gurobi")
+    obj_highs = objective("highs")
+    if abs(obj_gurobi - obj_highs) > rel_tol * max(1.0, abs(obj_gurobi)):
+        raise RuntimeError(
+            f"Backend mismatch in {solve_function.__name__}: gurobi = {obj_gurobi}, highs = {obj_highs}")
+    return obj_gurobi, obj_highs
@@ -0,0 +1,95 @@
+# batch_lp.py
+
+# Batched LP relaxations: many small instances of the robust selection problem in one block-diagonal LP.
+
+# Description: For small n (e.g. n = 2..70, k = 5) model setup and solver overhead dominate the simplex work of a single
+# LP. B independent instances are therefore stacked into one LP with separate variables x_b, z_b, cardinality rows and
+# scenario rows per block. The objective is the sum of all z_b, so the LP separates and every block is optimal for its
+# own instance: the z_b are the LP objective values and the x_b the fractional solutions. If an instance has several
+# optimal vertices, the batched LP can return another optimal x_b than the single LP (same objective value).
+
+import numpy as np
+from backend import gp, GRB, check_backend, gurobi_model, epigraph_rows
+from utils import as_cost_matrix, scenario_terms
+from memory_profile import mark_stage
+
+
+# Solve the LP relaxations of all instances (list of (costs, n, p, k)) in one model.
+# Returns a list of (obj_val_lp, x_val_frac) in the order of the instances.
+def solve_lp_batch(instances, criterion="minmax", backend="gurobi", threads=None):
+    check_backend(backend)
+    if not instances:
+        return []
+    if backend == "highs":
+        return _solve_lp_batch_highs(instances, criterion)
+
+    m = None
+    try:
+
+        # Create optimization model with one block per instance
+        mark_stage("model_build")
+        m = gurobi_model(f"batch_lp_{criterion}", threads)
+        blocks = []
+        for b, (costs, n, p, k) in enumerate(instances):
+            x = m.addVars(range(1, n + 1), vtype=GRB.CONTINUOUS, lb=0, ub=1, name=f"x_{b}")
+            z = m.addVar(name=f"z_{b}")
+            m.addConstr(gp.quicksum(x[i] for i in range(1, n + 1)) == p, name=f"select_p_items_{b}")
+            if criterion == "minmax":
+                m.addConstrs(
+                    (gp.quicksum(c * x[i] for i, c in scenario_terms(costs, s, n)) <= z for s in range(1, k + 1)),
+                    name=f"worst_case_cost_{b}")
+            else:
+                m.addConstrs(
+                    (gp.quicksum(c * x[i] for i, c in scenario_terms(costs, s, n)) >= z for s in range(1, k + 1)),
+                    name=f"worst_case_profit_{b}")
+            blocks.append((x, z, n))
+
+        # Sum of the block objectives (separable)
+        m.setObjective(gp.quicksum(z for _, z, _ in blocks), GRB.MINIMIZE if criterion == "minmax" else GRB.MAXIMIZE)
+
+        # Optimize model
+        mark_stage("optimize")
+        m.optimize()
+        results = [(z.X, [x[i].X for i in range(1, n + 1)]) for x, z, n in blocks]
+        return results
+
+    # Error handling
+    except gp.GurobiError as e:
+        raise RuntimeError(
+            f"Gurobi failed while solving the model (error code {e.errno}): {e}") from e
+    except AttributeError as e:
+        raise RuntimeError(
+            "Failed to access solution attributes. "
+            "This usually means the model was not solved to optimality.") from e
+    finally:
+        if m is not None:
+            m.dispose()  # Also after a failed solve (the thread's environment is reused)
+
+
+# Same block-diagonal LP with HiGHS (sparse constraint matrices, dual simplex)
+def _solve_lp_batch_highs(instances, criterion):
+    from scipy.optimize import linprog
+    from scipy.sparse import block_diag
+
+    mark_stage("model_build")
+    sign = 1.0 if criterion == "minmax" else -1.0  # max-min: -c[s]·x + z <= 0 and minimize -z
+    c_obj, ub_blocks, eq_blocks, b_eq, bounds, offsets = [], [], [], [], [], []
+    offset = 0
+    for costs, n, p, k in instances:
+        c_obj.append(np.r_[np.zeros(n), sign])
+        ub_blocks.append(epigraph_rows(as_cost_matrix(costs, n, k), sign))
+        eq_blocks.append(np.r_[np.ones(n), 0.0][None, :])
+        b_eq.append(p)
+        bounds += [(0, 1)] * n + [(0, None)]
+        offsets.append((offset, n))
+        offset += n + 1
+    A_ub = block_diag(ub_blocks, format="csr")
+    A_eq = block_diag(eq_blocks, format="csr")
+
+    mark_stage("optimize")
+    res = linprog(np.concatenate(c_obj), A_ub=A_ub, b_ub=np.zeros(A_ub.shape[0]), A_eq=A_eq,
+                  b_eq=np.asarray(b_eq, dtype=np.float64), bounds=bounds, method="highs-ds")
+    if res.status != 0 or res.x is None:
+        raise RuntimeError(f"HiGHS failed while solving the model (status {res.status}): {res.message}")
+
+    return [(float(res.x[start + n]), res.x[start:start + n].tolist()) for start, n in offsets]
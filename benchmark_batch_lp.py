@@ -0,0 +1,59 @@
+# benchmark_batch_lp.py
+
+# Throughput of the batched LP relaxations (batch_lp.py) against one LP per instance.
+
+# Description: For every batch size B, B random instances with n in N_RANGE and k = 5 (p = n // 2, as in main.py) are
+# solved once per instance (solve_epigraph_highs / Gurobi LP of the primal rounding) and once in one block-diagonal LP.
+# Printed are LPs per second and the speedup. The LP objective values must agree (otherwise an AssertionError is
+# raised); the number of instances where the batched LP returned another optimal x (degenerate LPs) is printed as well.
+
+# Not intended to be run as part of the main program.
+
+import time
+import numpy as np
+from backend import gurobi_available, solve_epigraph_highs
+from batch_lp import solve_lp_batch
+from primal_rounding_minmax import solve_primal_lp_minmax_gurobi
+from utils import CostArray, get_random_costs_array
+
+BATCH_SIZES = [10, 100, 1000]
+N_RANGE = (2, 70)
+k = 5
+c_range = 100
+OBJ_TOL = 1e-6
+SEED = 0
+
+
+def single_lp(backend, costs, n, p, k):
+    if backend == "highs":
+        return solve_epigraph_highs(costs, n, p, k, "minmax")
+    return solve_primal_lp_minmax_gurobi(costs, n, p, k)
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(SEED)
+    backends = ["gurobi", "highs"] if gurobi_available() else ["highs"]
+    for backend in backends:
+        warm_up = (CostArray(get_random_costs_array(4, k, c_range, rng)), 4, 2, k)
+        single_lp(backend, *warm_up)  # Imports and solver environment
+        solve_lp_batch([warm_up], "minmax", backend)
+        for batch_size in BATCH_SIZES:
+            instances = []
+            for _ in range(batch_size):
+                n = int(rng.integers(N_RANGE[0], N_RANGE[1] + 1))
+                instances.append((CostArray(get_random_costs_array(n, k, c_range, rng)), n, n // 2, k))
+
+            start = time.perf_counter()
+            single = [single_lp(backend, *instance) for instance in instances]
+            t_single = time.perf_counter() - start
+            start = time.perf_counter()
+            batched = solve_lp_batch(instances, "minmax", backend)
+            t_batch = time.perf_counter() - start
+
+            for (obj_single, _), (obj_batch, _) in zip(single, batched):
+                assert abs(obj_single - obj_batch) <= OBJ_TOL * max(1.0, abs(obj_single)), (obj_single, obj_batch)
+            other_x = sum(not np.allclose(x_single, x_batch, atol=1e-9)
+                          for (_, x_single), (_, x_batch) in zip(single, batched))
+            print(f"{backend:>6}, B = {batch_size:>5}: single {batch_size / t_single:9.1f} LPs/s, "
+                  f"batched {batch_size / t_batch:9.1f} LPs/s (speedup {t_single / t_batch:5.1f}x), "
+                  f"other optimal x: {other_x}")
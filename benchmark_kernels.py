@@ -0,0 +1,78 @@
+# benchmark_kernels.py
+
+# Check and benchmark of the kernels in kernels.py (Numba if installed, otherwise NumPy).
+
+# Description: First, the kernels are compared with the reference implementations on many small random instances
+# (with many ties): the primal-dual selection loop (use_kernel=False), scenario_costs and minimum_profit from utils.py.
+# All outputs must be identical, otherwise an AssertionError is raised. Second, the run times for n = 10^4 ... 10^6 are
+# printed. The step-by-step primal-dual loop takes O(n p), so it is only timed while n * p <= REFERENCE_MAX_WORK.
+
+# Not intended to be run as part of the main program.
+
+import time
+import numpy as np
+from kernels import NUMBA_AVAILABLE, selection_costs, block_min_profits
+from primal_dual_rounding_minmax import solve_primal_dual_minmax
+from utils import CostArray, cost_matrix_to_dict, scenario_costs, minimum_profit, get_random_costs_array
+
+NUM_CHECKS = 300
+N_VALUES = [10 ** 4, 10 ** 5, 10 ** 6]
+k = 5
+c_range = 100
+REFERENCE_MAX_WORK = 10 ** 9
+SEED = 0
+
+
+def check_identical(rng):
+    for check in range(NUM_CHECKS):
+        n = int(rng.integers(2, 60))
+        k_check = int(rng.integers(1, 8))
+        p = int(rng.integers(1, n + 1))
+        c = rng.integers(0, int(rng.choice([3, 10, 100])), size=(k_check, n), endpoint=True)
+        costs = cost_matrix_to_dict(c.tolist()) if check % 2 else CostArray(c.astype(np.uint8))
+
+        kernel = solve_primal_dual_minmax(costs, n, p, k_check, use_kernel=True)
+        reference = solve_primal_dual_minmax(costs, n, p, k_check, use_kernel=False)
+        assert kernel == reference, (check, kernel, reference)
+
+        C = costs.array if isinstance(costs, CostArray) else c.astype(np.float64)
+        selected = rng.choice(n, size=p, replace=False)
+        assert np.array_equal(selection_costs(C, selected), scenario_costs(C, selected)), check
+
+        blocks = [rng.choice(n, size=p, replace=False) for _ in range(4)]
+        expected = [minimum_profit([(i + 1, None) for i in block], C) for block in blocks]
+        assert block_min_profits(C, blocks).tolist() == expected, check
+    print(f"Identical outputs on {NUM_CHECKS} random instances")
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(SEED)
+    print(f"Numba available: {NUMBA_AVAILABLE}")
+    check_identical(rng)
+    if NUMBA_AVAILABLE:
+        solve_primal_dual_minmax(CostArray(get_random_costs_array(10, k, c_range, rng)), 10, 5, k)  # JIT warm-up
+
+    for n in N_VALUES:
+        p = n // 2
+        costs = CostArray(get_random_costs_array(n, k, c_range, rng))
+        C = costs.array
+        selected = rng.choice(n, size=p, replace=False)
+        blocks = rng.permutation(n)[:(n // 100) * 100].reshape(-1, 100)
+
+        kernel, t_kernel = timed(solve_primal_dual_minmax, costs, n, p, k)
+        line = f"n = {n:>8}: primal-dual kernel {t_kernel:8.3f} s"
+        if n * p <= REFERENCE_MAX_WORK:
+            reference, t_reference = timed(solve_primal_dual_minmax, costs, n, p, k, use_kernel=False)
+            assert kernel == reference
+            line += f", loop {t_reference:8.3f} s (speedup {t_reference / t_kernel:6.1f}x)"
+        _, t_sel = timed(selection_costs, C, selected)
+        _, t_sel_ref = timed(scenario_costs, C, selected)
+        _, t_blocks = timed(block_min_profits, C, blocks)
+        line += f" | selection costs {t_sel:.4f} s (NumPy {t_sel_ref:.4f} s) | {len(blocks)} blocks {t_blocks:.4f} s"
+        print(line)
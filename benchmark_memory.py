@@ -0,0 +1,67 @@
+# benchmark_memory.py
+
+# Benchmark of peak memory per solver for growing n and k (memory_profile.py).
+
+# Description: For every solver and every (n, k) on the grid below, one random instance is converted to the cost
+# dictionary (as in main.py) and solved. The peak Python allocations per stage (conversion, model_build, optimize,
+# rounding) and the peak RSS of the process are printed as a table and saved as CSV. RSS rarely shrinks after a large
+# allocation, so it is only meaningful with increasing instance sizes (the grid is run in that order).
+
+# Not intended to be run as part of the main program.
+
+import os
+import pandas as pd
+from datetime import datetime
+from exact_solution_minmax import solve_exact_robust_selection_minmax
+from exact_solution_maxmin import solve_exact_robust_selection_maxmin
+from exact_solution_dp import solve_exact_dp_minmax, dp_is_tractable
+from primal_rounding_minmax import solve_primal_rounding_minmax
+from primal_rounding_maxmin import solve_primal_rounding_maxmin
+from primal_dual_rounding_minmax import solve_primal_dual_minmax_with_lp
+from backend import gurobi_available
+from memory_profile import enable_profiling, mark_stage, end_run, overall_peaks, STAGES
+from utils import get_random_costs, cost_matrix_to_dict
+
+BACKEND = "gurobi" if gurobi_available() else "highs"
+N_VALUES = [50, 100, 200, 400, 800]
+K_VALUES = [5, 20, 50]
+c_range = 100
+OUTPUT_DIR = "results"
+
+SOLVERS = {
+    "exact_minmax": lambda costs, n, p, k: solve_exact_robust_selection_minmax(costs, n, p, k, backend=BACKEND),
+    "exact_maxmin": lambda costs, n, p, k: solve_exact_robust_selection_maxmin(costs, n, p, k, backend=BACKEND),
+    "exact_dp_minmax": solve_exact_dp_minmax,
+    "primal_minmax": lambda costs, n, p, k: solve_primal_rounding_minmax(costs, n, p, k, backend=BACKEND),
+    "primal_maxmin": lambda costs, n, p, k: solve_primal_rounding_maxmin(costs, n, p, k, backend=BACKEND),
+    "primal_dual_minmax": lambda costs, n, p, k: solve_primal_dual_minmax_with_lp(costs, n, p, k, backend=BACKEND)
+}
+
+if __name__ == "__main__":
+    enable_profiling()
+    rows = []
+    for name, solve in SOLVERS.items():
+        for k in K_VALUES:
+            for n in N_VALUES:
+                p = n // 2
+                mark_stage("generation")
+                c = get_random_costs(n, k, c_range)
+                mark_stage("conversion")
+                costs = cost_matrix_to_dict(c)
+                if name == "exact_dp_minmax" and not dp_is_tractable(costs, n, p, k):
+                    end_run()
+                    continue
+                solve(costs, n, p, k)
+                run_memory = end_run()
+                traced, rss = overall_peaks(run_memory)
+                row = {"solver": name, "n": n, "k": k, "peak_mb": traced, "peak_rss_mb": rss}
+                row.update({f"{stage}_mb": run_memory.get(f"mem_{stage}_mb", 0.0) for stage in STAGES[1:5]})
+                rows.append(row)
+                print(f"{name:>20} n = {n:>5} k = {k:>4}: peak = {traced:8.2f} MB, RSS = {rss:8.1f} MB")
+
+    table = pd.DataFrame(rows)
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    path = os.path.join(OUTPUT_DIR, f"benchmark_memory_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.csv")
+    table.to_csv(path, index=False)
+    print(f"Saved in {path}")
@@ -0,0 +1,90 @@
+# benchmark_strengthening.py
+
+# Plain against strengthened exact MILPs (strengthening.py): run time and branch-and-bound nodes.
+
+# Description: For every corpus family and size, NUM_INSTANCES instances are solved with the plain epigraph model and
+# with all strengthening options (and with each option alone if PER_OPTION is True). The objective values must agree,
+# and no objective may be worse than the worst case of the returned selection (otherwise an AssertionError is raised;
+# the one-sided check catches values that are reported from a padded bound). Printed are the mean run time, the mean
+# node count and the number of added rows and fixed items. Results are written to results/benchmark_strengthening.csv.
+
+# Not intended to be run as part of the main program.
+
+import csv
+import os
+import time
+import numpy as np
+from backend import gurobi_available
+from exact_solution_minmax import solve_exact_robust_selection_minmax
+from exact_solution_maxmin import solve_exact_robust_selection_maxmin
+from instance_corpus import get_corpus_costs
+from strengthening import STRENGTHENING_OPTIONS, strengthening_data
+from utils import CostArray
+
+FAMILIES = ["uniform", "near_duplicate", "negatively_correlated"]
+SIZES = [(30, 5), (40, 10), (60, 10)]  # (n, k), p = n // 2
+NUM_INSTANCES = 5
+CRITERIA = ["minmax", "maxmin"]
+PER_OPTION = False
+TIME_LIMIT = 60  # Seconds per MILP
+OBJ_TOL = 1e-8  # Relative difference of the optimal values of two variants (solver round-off only)
+SELECTION_TOL = 1e-12  # Relative amount by which an objective may be worse than the worst case of its selection
+SOLVERS = {"minmax": solve_exact_robust_selection_minmax, "maxmin": solve_exact_robust_selection_maxmin}
+OUTPUT = os.path.join("results", "benchmark_strengthening.csv")
+
+
+def solve(criterion, C, n, p, k, backend, strengthen):
+    info = {}
+    start = time.perf_counter()
+    obj_val, x_val = SOLVERS[criterion](CostArray(C), n, p, k, backend=backend, time_limit=TIME_LIMIT, info=info,
+                                        strengthen=strengthen)
+    seconds = time.perf_counter() - start
+    sums = np.asarray(C, dtype=np.float64) @ np.round(x_val)
+    worse = obj_val - sums.max() if criterion == "minmax" else sums.min() - obj_val
+    assert worse <= SELECTION_TOL * max(1.0, abs(obj_val)), (criterion, n, k, strengthen, obj_val)
+    return obj_val, seconds, info
+
+
+if __name__ == "__main__":
+    backend = "gurobi" if gurobi_available() else "highs"
+    variants = {"plain": None, "all": STRENGTHENING_OPTIONS}
+    if PER_OPTION:
+        variants.update({option: (option,) for option in STRENGTHENING_OPTIONS})
+    rows = []
+    print(f"Backend: {backend}")
+    for criterion in CRITERIA:
+        for family in FAMILIES:
+            for n, k in SIZES:
+                p = n // 2
+                instances = [get_corpus_costs(family, n, k, index) for index in range(NUM_INSTANCES)]
+                reference = None
+                for variant, strengthen in variants.items():
+                    results = [solve(criterion, C, n, p, k, backend, strengthen) for C in instances]
+                    objectives = [obj_val for obj_val, _, _ in results]
+                    proven = [info["optimal"] for _, _, info in results]
+                    if reference is None:
+                        reference = (objectives, proven)
+                    for obj_val, obj_ref, opt, opt_ref in zip(objectives, reference[0], proven, reference[1]):
+                        assert not (opt and opt_ref) or abs(obj_val - obj_ref) <= OBJ_TOL * max(1.0, abs(obj_ref)), \
+                            (criterion, family, n, k, variant, obj_val, obj_ref)
+                    data = [strengthening_data(C, p, criterion, strengthen) for C in instances] if strengthen else []
+                    row = {
+                        "criterion": criterion, "family": family, "n": n, "k": k, "variant": variant,
+                        "time": float(np.mean([t for _, t, _ in results])),
+                        "nodes": float(np.mean([info["nodes"] or 0 for _, _, info in results])),
+                        "unproven": proven.count(False),
+                        "cuts": float(np.mean([len(d["order_pairs"]) + len(d["cover_cuts"]) for d in data])) if data
+                        else 0.0,
+                        "fixed": float(np.mean([len(d["fixed_zero"]) for d in data])) if data else 0.0
+                    }
+                    rows.append(row)
+                    print(f"{criterion} {family:>22} n = {n:>3}, k = {k:>3}, {variant:>11}: {row['time']:8.3f} s, "
+                          f"{row['nodes']:9.1f} nodes, {row['unproven']} unproven, {row['cuts']:6.1f} rows, "
+                          f"{row['fixed']:5.1f} fixed")
+
+    os.makedirs(os.path.dirname(OUTPUT), exist_ok=True)
+    with open(OUTPUT, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Saved {OUTPUT}")
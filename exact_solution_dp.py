@@ -0,0 +1,144 @@
+# exact_solution_dp.py
+
+# Exact pseudo-polynomial solution for the Robust Selection Problem with integer costs and few scenarios.
+
+# Description: There are n items with integer costs c[s,i] >= 0 and k scenarios. The items are processed one after
+# another (0/1 knapsack order). For every number of chosen items j and every reachable vector of scenario sums
+# (c_1·x, ..., c_{k-1}·x), the table keeps the best last-scenario sum (smallest for min-max, largest for max-min).
+# This is exact, because the final objective is monotone in the last scenario sum. The chosen items are recovered from
+# a bitset per (item, j) that marks where the item improved the table. For min-max, states whose partial sum already
+# exceeds a feasible objective (upper bound) are pruned. The work is about n·p·(p·c_max)^(k-1), so the solver is only
+# useful for small k (e.g. k <= 3). The p + 1 float64 tables of prod(shape) states each (plus n·p bitsets) can need far
+# more memory than the work suggests, so EXACT_METHOD "auto" in main.py only selects the DP if the estimated work, the
+# number of states per table and the estimated memory are all below their caps.
+
+import numpy as np
+from utils import as_cost_array
+from memory_profile import mark_stage
+
+DP_MAX_WORK = 2e8  # Estimated table updates up to which "auto" picks the DP over the MILP
+DP_MAX_STATES = 1e6  # States per table (prod of the table shape) up to which "auto" picks the DP
+DP_MAX_BYTES = 64 * 2 ** 20  # Estimated memory of the tables and bitsets up to which "auto" picks the DP
+
+
+# Upper bound for min-max: worst-case cost of the p items with the smallest total cost over all scenarios
+def _minmax_upper_bound(C, p):
+    selected = np.argsort(C.sum(axis=0), kind="stable")[:p]
+    return int(C[:, selected].sum(axis=1).max())
+
+
+# Size of the table per scenario axis (scenarios 1, ..., k-1)
+def _state_shape(C, p, criterion):
+    caps = np.sort(C[:-1], axis=1)[:, ::-1][:, :p].sum(axis=1)  # Sum of the p largest costs per scenario
+    if criterion == "minmax":
+        caps = np.minimum(caps, _minmax_upper_bound(C, p))
+    return tuple(int(cap) + 1 for cap in caps)
+
+
+def _integral_costs(costs, n, k):
+    C = as_cost_array(costs, n, k)
+    if np.any(C < 0) or not np.all(np.mod(C, 1) == 0):
+        return None
+    return C.astype(np.int64)
+
+
+# Estimated number of table updates (inf if the costs are not non-negative integers)
+def estimate_dp_work(costs, n, p, k, criterion="minmax"):
+    C = _integral_costs(costs, n, k)
+    if C is None:
+        return np.inf
+    return float(n) * p * float(np.prod(_state_shape(C, p, criterion), dtype=np.float64))
+
+
+# Estimated number of states per table and bytes of all tables and bitsets (inf if the costs are not non-negative
+# integers)
+def estimate_dp_memory(costs, n, p, k, criterion="minmax"):
+    C = _integral_costs(costs, n, k)
+    if C is None:
+        return np.inf, np.inf
+    states = float(np.prod(_state_shape(C, p, criterion), dtype=np.float64))
+    return states, (p + 1) * states * 8 + n * p * states / 8
+
+
+def dp_is_tractable(costs, n, p, k, criterion="minmax", max_work=DP_MAX_WORK, max_states=DP_MAX_STATES,
+                    max_bytes=DP_MAX_BYTES):
+    if estimate_dp_work(costs, n, p, k, criterion) > max_work:
+        return False
+    states, memory = estimate_dp_memory(costs, n, p, k, criterion)
+    return states <= max_states and memory <= max_bytes
+
+
+def _solve_dp(costs, n, p, k, criterion, debug=False):
+    mark_stage("optimize")
+    C = _integral_costs(costs, n, k)
+    if C is None:
+        raise ValueError("The DP solver requires non-negative integer costs.")
+    minimize = criterion == "minmax"
+    shape = _state_shape(C, p, criterion)
+
+    # dp[j][s_1, ..., s_{k-1}] = best last-scenario sum with j items chosen
+    fill = np.inf if minimize else -np.inf
+    dp = [np.full(shape, fill) for _ in range(p + 1)]
+    dp[0][(0,) * len(shape)] = 0.0
+    took = {}  # (i, j) -> packed bits over the shifted region where item i improved dp[j]
+
+    for i in range(n):
+        shift = C[:-1, i]
+        src = tuple(slice(0, max(0, size - c)) for size, c in zip(shape, shift)) + (Ellipsis,)
+        dst = tuple(slice(c, None) for c in shift) + (Ellipsis,)
+        for j in range(min(i + 1, p), 0, -1):  # Descending j, so dp[j - 1] does not contain item i yet
+            candidate = dp[j - 1][src] + C[-1, i]
+            target = dp[j][dst]  # View
+            better = candidate < target if minimize else candidate > target
+            np.copyto(target, candidate, where=better)
+            took[i, j] = np.packbits(better, axis=None)
+
+    # Objective over all final states: max (min-max) or min (max-min) of all scenario sums
+    final = dp[p]
+    objective = final.copy()
+    for axis, size in enumerate(shape):
+        sums = np.arange(size).reshape([-1 if a == axis else 1 for a in range(len(shape))])
+        objective = np.maximum(objective, sums) if minimize else np.minimum(objective, sums)
+    best = int(np.argmin(objective)) if minimize else int(np.argmax(objective))
+    if not np.isfinite(objective.flat[best]):
+        raise RuntimeError("DP found no feasible selection.")
+
+    # Backtracking
+    state = np.unravel_index(best, shape) if shape else ()
+    x_val = [0.0] * n
+    j = p
+    for i in range(n - 1, -1, -1):
+        if j == 0:
+            break
+        if (i, j) not in took:
+            continue
+        shift = C[:-1, i]
+        if any(state[a] < shift[a] for a in range(len(shape))):
+            continue
+        local = tuple(int(state[a] - shift[a]) for a in range(len(shape)))
+        local_shape = tuple(max(0, size - c) for size, c in zip(shape, shift))
+        flat = int(np.ravel_multi_index(local, local_shape)) if local else 0
+        if (took[i, j][flat >> 3] >> (7 - (flat & 7))) & 1:
+            x_val[i] = 1.0
+            j -= 1
+            state = local  # Coordinates before adding item i
+
+    scenario_sums = C @ np.asarray(x_val, dtype=np.int64)
+    obj_val = float(scenario_sums.max() if minimize else scenario_sums.min())
+
+    if debug:
+        print("\n--- Debug: DP ---")
+        print(f"Table shape per j: {shape}, items chosen: {int(sum(x_val))}")  # should be equal to p
+        for s in range(k):
+            print(f"Scenario {s + 1}: total = {scenario_sums[s]}")
+        print(f"Objective (DP) = {obj_val}")
+
+    return obj_val, x_val
+
+
+def solve_exact_dp_minmax(costs, n, p, k, debug=False):
+    return _solve_dp(costs, n, p, k, "minmax", debug=debug)
+
+
+def solve_exact_dp_maxmin(costs, n, p, k, debug=False):
+    return _solve_dp(costs, n, p, k, "maxmin", debug=debug)
@@ -5,15 +5,34 @@
 # Description: There are n items with cost c[s,i]. The goal is to pick exactly p items such that the wost-case cost is
 # minimized. The problem is formulated as a Mixed Integer Linear Program using the epigraph-reformulation.
 
-import gurobipy as gp
-from gurobipy import GRB
+from backend import (gp, GRB, check_backend, solve_epigraph_highs, gurobi_model, gurobi_trajectory_callback,
+                     gurobi_mip_result, greedy_selection)
+from utils import as_cost_array, scenario_terms
+from strengthening import strengthening_data, add_gurobi_strengthening
+from memory_profile import mark_stage
 
 
-def solve_exact_robust_selection_minmax(costs, n, p, k, debug=False):
+# mip_gap: optional relative MIP gap target (None = solve to optimality with the solver's default gap)
+# threads: Gurobi thread budget (None = Gurobi default; not supported by the HiGHS interface in SciPy)
+# time_limit: seconds until the best incumbent is returned (None = no limit)
+# info: optional dict that receives the best bound, the gap, whether the solution is optimal and the trajectory of
+#       (runtime, incumbent, bound) recorded by a MIP callback, and the number of branch-and-bound nodes
+# strengthen: options of the strengthened formulation (subset of strengthening.STRENGTHENING_OPTIONS; None = plain)
+def solve_exact_robust_selection_minmax(costs, n, p, k, debug=False, backend="gurobi", mip_gap=None, threads=None,
+                                        time_limit=None, info=None, strengthen=None):
+    check_backend(backend)
+    if backend == "highs":
+        obj_val_exact_minmax, x_val_exact_minmax = solve_epigraph_highs(costs, n, p, k, "minmax", integral=True,
+                                                                          mip_gap=mip_gap, time_limit=time_limit,
+                                                                          info=info, strengthen=strengthen)
+        return obj_val_exact_minmax, x_val_exact_minmax
+
+    m = None
     try:
 
         # Create optimization model
-        m = gp.Model("exact_robust_selection_minmax")
+        mark_stage("model_build")
+        m = gurobi_model("exact_robust_selection_minmax", threads)
 
         # Create variables
         x = m.addVars(range(1, n + 1), vtype=GRB.BINARY, name="x")  # Binary variable for selection
@@ -26,11 +45,28 @@ def solve_exact_robust_selection_minmax(costs, n, p, k, debug=False):
         m.addConstr(gp.quicksum(x[i] for i in range(1, n + 1)) == p, name="select_p_items")  # Select exactly
 
         m.addConstrs(
-            (gp.quicksum(costs[s, i] * x[i] for i in range(1, n + 1)) <= z for s in range(1, k + 1)),
+            (gp.quicksum(c * x[i] for i, c in scenario_terms(costs, s, n)) <= z for s in range(1, k + 1)),
             name="worst_case_cost")  # Worst-case cost constraints
 
+        # Optional strengthening: dominance (symmetry breaking), z bounds, fixing and cuts
+        if strengthen:
+            add_gurobi_strengthening(m, x, z, strengthening_data(as_cost_array(costs, n, k), p, "minmax", strengthen),
+                                     "minmax")
+
         # Optimize model
-        m.optimize()
+        mark_stage("optimize")
+        if mip_gap is not None:
+            m.Params.MIPGap = mip_gap
+        if time_limit is not None:
+            m.Params.TimeLimit = time_limit
+            start = greedy_selection(as_cost_array(costs, n, k), p, "minmax")  # Incumbent if the limit is hit early
+            for i in range(1, n + 1):
+                x[i].Start = start[i - 1]
+        trajectory = []
+        m.optimize(gurobi_trajectory_callback(trajectory))
+        obj_val_exact_minmax, x_val_exact_minmax, mip_info = gurobi_mip_result(m, x, n, trajectory)
+        if info is not None:
+            info.update(mip_info)
 
         # Post-solution checks and debug prints
         if debug:
@@ -42,9 +78,7 @@ def solve_exact_robust_selection_minmax(costs, n, p, k, debug=False):
                 print(f"Scenario {s}: total cost = {cost_s}")  # All cost_s ≤ z
             print(f"Max scenario cost (z) = {m.ObjVal}")  # z = max cost_s
 
-        # Extract and return results
-        x_val_exact_minmax = [x[i].X for i in range(1, n + 1)]
-        obj_val_exact_minmax = m.ObjVal  # Value of z
+        # Return results (best incumbent if the time limit was hit)
         return obj_val_exact_minmax, x_val_exact_minmax
 
     # Error handling
@@ -55,3 +89,6 @@ def solve_exact_robust_selection_minmax(costs, n, p, k, debug=False):
         raise RuntimeError(
             "Failed to access solution attributes. "
             "This usually means the model was not solved to optimality.") from e
+    finally:
+        if m is not None:
+            m.dispose()  # Also after a failed solve (the thread's environment is reused)
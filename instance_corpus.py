@@ -0,0 +1,118 @@
+# instance_corpus.py
+
+# Versioned, seeded benchmark corpus of structured cost instances for the robust selection problem.
+
+# Description: get_random_costs only draws i.i.d. uniform costs without any structure between items or scenarios. The
+# families below add structure that is typical for real data and makes instances harder for the solvers:
+# - uniform:               i.i.d. costs in [1, c_range] (baseline, as get_random_costs)
+# - negatively_correlated: the second half of the scenarios mirrors the first (c -> c_range + 1 - c, plus noise), so
+#                          every item that is cheap in one scenario is expensive in another
+# - low_rank:              costs are combinations of RANK latent factors; every scenario mostly weights one factor and
+#                          every item trades off the factors (few effective scenarios that conflict, many near-ties)
+# - budgeted:              small nominal costs plus a large deviation on a random subset of BUDGET * n items per
+#                          scenario (sampled budgeted uncertainty)
+# - near_duplicate:        items are noisy copies (+-1) of n / DUPLICATES prototypes (large symmetric groups for the MILP)
+# Every instance depends only on (version, family, seed, n, k, index), so an instance can be regenerated without the
+# corpus file. A set (one family and seed, several sizes) is stored in one .npz file with its metadata.
+
+# Usage: python instance_corpus.py (writes the default sets below to corpus/)
+
+import json
+import os
+import numpy as np
+from utils import cost_dtype
+
+CORPUS_VERSION = 1
+CORPUS_DIR = "corpus"
+RANK = 3
+DUPLICATES = 4  # Items per prototype (near_duplicate)
+NOISE = 0.05  # Relative noise (negatively_correlated)
+BUDGET = 0.5  # Share of items with a deviation per scenario (budgeted)
+
+
+def _uniform(rng, n, k, c_range):
+    return rng.integers(1, c_range, size=(k, n), endpoint=True)
+
+
+def _negatively_correlated(rng, n, k, c_range):
+    base = rng.integers(1, c_range, size=(k - k // 2, n), endpoint=True)
+    mirrored = (c_range + 1 - base[:k // 2]) + np.rint(rng.normal(0.0, NOISE * c_range, size=(k // 2, n)))
+    return np.clip(np.vstack([base, mirrored]), 1, c_range)
+
+
+def _low_rank(rng, n, k, c_range):
+    loadings = rng.dirichlet(np.full(RANK, 0.3), size=k)  # Every scenario mostly weights one factor
+    items = rng.dirichlet(np.ones(RANK), size=n).T  # Every item trades off the factors (columns sum to 1)
+    factors = loadings @ items
+    return 1 + np.rint((c_range - 1) * factors / factors.max())
+
+
+def _budgeted(rng, n, k, c_range):
+    nominal = rng.integers(1, max(2, c_range // 4), size=n, endpoint=True)
+    deviation = rng.integers(0, c_range - nominal, endpoint=True)
+    budget = max(1, int(BUDGET * n))
+    deviated = np.argsort(rng.random((k, n)), axis=1)[:, :budget]  # Random subset of budget items per scenario
+    mask = np.zeros((k, n), dtype=bool)
+    np.put_along_axis(mask, deviated, True, axis=1)
+    return nominal + mask * deviation
+
+
+def _near_duplicate(rng, n, k, c_range):
+    prototypes = rng.integers(1, c_range, size=(k, -(-n // DUPLICATES)), endpoint=True)
+    copies = np.repeat(prototypes, DUPLICATES, axis=1)[:, :n] + rng.integers(-1, 1, size=(k, n), endpoint=True)
+    return np.clip(copies[:, rng.permutation(n)], 1, c_range)
+
+
+FAMILIES = {
+    "uniform": _uniform,
+    "negatively_correlated": _negatively_correlated,
+    "low_rank": _low_rank,
+    "budgeted": _budgeted,
+    "near_duplicate": _near_duplicate
+}
+
+
+# Instance number index of a family (k x n array in [1, c_range] with the smallest dtype)
+def get_corpus_costs(family, n, k, index=0, seed=0, c_range=100):
+    if family not in FAMILIES:
+        raise ValueError(f"Unknown family: {family}. Options: {', '.join(FAMILIES)}")
+    family_id = list(FAMILIES).index(family)
+    rng = np.random.default_rng([CORPUS_VERSION, family_id, seed, n, k, index])
+    return FAMILIES[family](rng, n, k, int(c_range)).astype(cost_dtype(c_range))
+
+
+def corpus_path(family, seed, output_dir=CORPUS_DIR):
+    return os.path.join(output_dir, f"{family}_v{CORPUS_VERSION}_seed{seed}.npz")
+
+
+# Write one set: num_instances instances for every (n, k) in sizes. Returns the path of the .npz file.
+def write_corpus_set(family, sizes, num_instances, seed=0, c_range=100, output_dir=CORPUS_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    arrays = {f"n{n}_k{k}_i{index}": get_corpus_costs(family, n, k, index, seed, c_range)
+              for n, k in sizes for index in range(num_instances)}
+    metadata = {"version": CORPUS_VERSION, "family": family, "seed": seed, "c_range": c_range,
+                "sizes": [list(size) for size in sizes], "num_instances": num_instances}
+    path = corpus_path(family, seed, output_dir)
+    np.savez_compressed(path, metadata=json.dumps(metadata), **arrays)
+    return path
+
+
+# Read a set. Returns the metadata and {(n, k): [instances]}.
+def load_corpus_set(path):
+    with np.load(path) as data:
+        metadata = json.loads(str(data["metadata"]))
+        if metadata["version"] != CORPUS_VERSION:
+            print(f"Warning: corpus version {metadata['version']} in {path}, generator version {CORPUS_VERSION}")
+        instances = {
+            (n, k): [data[f"n{n}_k{k}_i{index}"] for index in range(metadata["num_instances"])]
+            for n, k in metadata["sizes"]
+        }
+    return metadata, instances
+
+
+if __name__ == "__main__":
+    SIZES = [(50, 5), (100, 10), (200, 20), (500, 50), (1000, 100)]
+    NUM_INSTANCES = 10
+    SEED = 0
+    for family_name in FAMILIES:
+        print(f"Saved {write_corpus_set(family_name, SIZES, NUM_INSTANCES, SEED)}")
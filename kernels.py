@@ -0,0 +1,109 @@
+# kernels.py
+
+# Compiled kernels for the interpreter-bound loops of the algorithms. Numba is optional: if it is installed the kernels
+# are JIT-compiled, otherwise the NumPy versions are used. Both return identical results.
+
+# Description:
+# - primal_dual_select: selection loop of the primal-dual algorithm. With gamma_i = 0 for unselected items, the slack of
+#   item i is w_i - a, so every iteration raises a to the smallest weighted cost w_i of the remaining items and selects
+#   that item (smallest index on ties, as min(Q, key=(w_j, j))). The kernel therefore sorts w once (stable) and only
+#   repeats the sequence of raises of a with the same floating point operations as the loop. gamma_i of a selected item
+#   is max(0, a_final - w_i), except for the last item (selected after the last update). O(n log n) instead of O(n p).
+# - selection_costs: cost of the selected items per scenario (scenario_costs in utils.py).
+# - block_min_profits: minimum profit over all scenarios of every block of the max-min rounding (minimum_profit).
+# The compiled versions of selection_costs and block_min_profits are only used for integer costs. For float costs the
+# summation order of NumPy cannot be repeated in a loop, so the NumPy versions are used to keep results identical.
+
+import numpy as np
+from utils import scenario_costs
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+
+# Sequence of raises of a for the sorted weighted costs. Returns a and -1, or the position of a significantly negative
+# slack (the caller raises the error, as in the loop of solve_primal_dual_minmax).
+def _raise_dual(w_sorted, feas_tol):
+    a = 0.0
+    for t in range(len(w_sorted)):
+        delta = 0.0 - (a - w_sorted[t])
+        if -feas_tol < delta < 0.0:
+            delta = 0.0
+        elif delta < -feas_tol:
+            return a, t
+        a += delta
+    return a, -1
+
+
+def _selection_costs_loop(C, selected):
+    k = C.shape[0]
+    total = np.zeros(k, dtype=np.int64)
+    for s in range(k):
+        acc = 0
+        for j in range(selected.size):
+            acc += C[s, selected[j]]
+        total[s] = acc
+    return total
+
+
+def _block_min_profits_loop(C, blocks):
+    k = C.shape[0]
+    num_blocks, block_size = blocks.shape
+    profits = np.empty(num_blocks, dtype=np.int64)
+    for b in range(num_blocks):
+        worst = 0
+        for s in range(k):
+            acc = 0
+            for j in range(block_size):
+                acc += C[s, blocks[b, j]]
+            if s == 0 or acc < worst:
+                worst = acc
+        profits[b] = worst
+    return profits
+
+
+if NUMBA_AVAILABLE:
+    _raise_dual_numba = njit(cache=True)(_raise_dual)
+    _selection_costs_numba = njit(cache=True)(_selection_costs_loop)
+    _block_min_profits_numba = njit(cache=True)(_block_min_profits_loop)
+
+
+def _compiled_for(C):
+    return NUMBA_AVAILABLE and isinstance(C, np.ndarray) and np.issubdtype(C.dtype, np.integer)
+
+
+# Selection of the primal-dual algorithm for weighted costs w. Returns the selected indices (in order of selection),
+# the final dual variable a and gamma (length n).
+def primal_dual_select(w, p, feas_tol=1e-12):
+    w = np.asarray(w, dtype=np.float64)
+    order = np.argsort(w, kind="stable")[:p]
+    w_sorted = w[order]
+    if NUMBA_AVAILABLE:
+        a, failed = _raise_dual_numba(w_sorted, feas_tol)
+    else:
+        a, failed = _raise_dual(w_sorted.tolist(), feas_tol)
+    if failed >= 0:
+        raise RuntimeError("Dual slack significantly negative; infeasibility suspected.")
+    gamma = np.zeros(w.size, dtype=np.float64)
+    before_last = order[:p - 1]
+    gamma[before_last] = np.maximum(0.0, a - w[before_last])
+    return order, a, gamma
+
+
+# Cost of the selected items (0-based indices) in every scenario
+def selection_costs(C, selected):
+    if _compiled_for(C):
+        return _selection_costs_numba(C, np.asarray(selected, dtype=np.intp))
+    return scenario_costs(C, selected)
+
+
+# Minimum profit over all scenarios for every block (list or 2D array of 0-based indices, all blocks of equal size)
+def block_min_profits(C, blocks):
+    blocks = np.asarray(blocks, dtype=np.intp)
+    if _compiled_for(C):
+        return _block_min_profits_numba(C, blocks)
+    return np.array([scenario_costs(C, block).min() for block in blocks])
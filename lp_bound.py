@@ -0,0 +1,75 @@
+# lp_bound.py
+
+# LP-free bounds on OPT_LP of the Robust Selection Problem with the min-max criterion.
+
+# Description: By LP duality, OPT_LP = max over scenario weights b (b >= 0, sum b = 1) of L(b), where L(b) is the sum of
+# the p smallest weighted costs w = C^T b. Every L(b) is a certified lower bound on OPT_LP (and on OPT). The weights are
+# improved with multiplicative-weights updates: the p cheapest items under b form the best response x_b, and scenarios
+# that are expensive for x_b gain weight. Averaging the best responses gives a fractional primal solution, whose
+# worst-case cost is an upper bound on OPT_LP. The averaging restarts at powers of two (only recent iterates count).
+# The loop stops when the relative gap between both bounds is at most tol. Pure NumPy, no LP solver needed.
+
+import numpy as np
+from utils import as_cost_matrix, weighted_costs, scenario_costs, is_sparse
+from memory_profile import mark_stage
+
+
+# L(b) and the best response (indices of the p smallest weighted costs)
+def lagrangian_bound(C, b, p):
+    w = weighted_costs(C, b)
+    best_response = np.argpartition(w, p - 1)[:p]
+    return float(w[best_response].sum()), best_response
+
+
+# Largest possible scenario cost: max over scenarios of the sum of the p largest costs (for sparse C, the entries that
+# are not stored count as 0)
+def largest_scenario_cost(C, p):
+    if not is_sparse(C):
+        return float(np.sort(C, axis=1)[:, -p:].sum(axis=1, dtype=np.float64).max())
+    n = C.shape[1]
+    rows = (C.data[C.indptr[s]:C.indptr[s + 1]].astype(np.float64) for s in range(C.shape[0]))
+    return max(float(np.sort(np.r_[row, np.zeros(min(p, n - row.size))])[-p:].sum()) for row in rows)
+
+
+# Returns lower bound, upper bound, relative gap and number of iterations
+def solve_lp_bound_mwu(costs, n, p, k, tol=1e-3, max_iter=5000, eta=4.0, debug=False):
+    mark_stage("optimize")
+    C = as_cost_matrix(costs, n, k)
+    b = np.full(k, 1.0 / k)  # Start with uniform weights (as in the primal-dual algorithm)
+    scale = largest_scenario_cost(C, p)
+    step = eta * np.sqrt(np.log(max(k, 2))) / max(scale, 1e-12)
+
+    lower = -np.inf
+    upper = np.inf
+    gap = np.inf
+    g_sum = np.zeros(k, dtype=np.float64)  # Sum of C x_t over the current averaging window
+    window_start = 1
+    window_size = 0
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        value, best_response = lagrangian_bound(C, b, p)
+        g = scenario_costs(C, best_response).astype(np.float64)  # Supergradient of L at b
+        lower = max(lower, value)
+        g_sum += g
+        window_size += 1
+        upper = min(upper, float(g.max()), float(g_sum.max()) / window_size)
+        gap = (upper - lower) / upper if upper > 0 else 0.0
+        if gap <= tol:
+            break
+
+        # Restart the averaging window at powers of two
+        if iteration == 2 * window_start:
+            g_sum[:] = 0.0
+            window_size = 0
+            window_start = iteration
+
+        # Multiplicative-weights update (shifted by the maximum for numerical stability)
+        b *= np.exp(step / np.sqrt(iteration) * (g - g.max()))
+        b /= b.sum()
+
+    if debug:
+        print("\n--- Debug: LP bound (multiplicative weights) ---")
+        print(f"Iterations: {iteration}, lower bound = {lower:.6g}, upper bound = {upper:.6g}, gap = {gap:.3e}")
+        print(f"Scenario weights b = {np.round(b, 4)}")
+
+    return lower, upper, gap, iteration
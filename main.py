@@ -9,31 +9,77 @@
 
 import pickle
 import os
+import json
 import math
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from exact_solution_minmax import solve_exact_robust_selection_minmax
 from exact_solution_maxmin import solve_exact_robust_selection_maxmin
-from primal_rounding_minmax import solve_primal_rounding_minmax
-from primal_rounding_maxmin import solve_primal_rounding_maxmin
-from primal_dual_rounding_minmax import solve_primal_dual_minmax_with_lp
+from primal_rounding_minmax import (solve_primal_rounding_minmax, solve_primal_rounding_minmax_batch,
+                                    round_primal_minmax)
+from primal_repair_minmax import solve_primal_repair_minmax, solve_primal_repair_minmax_batch, repair_primal_minmax
+from primal_rounding_maxmin import solve_primal_rounding_maxmin, solve_primal_rounding_maxmin_batch, round_primal_maxmin
+from primal_dual_rounding_minmax import (solve_primal_dual_minmax_with_lp, solve_primal_minmax,
+                                         solve_primal_dual_minmax_with_lp_batch, primal_dual_minmax_from_lp)
+from exact_solution_dp import solve_exact_dp_minmax, solve_exact_dp_maxmin, dp_is_tractable
+from parametric import solve_p_curve, solve_k_curve
+from backend import cross_check_backends
+from presolve import presolve_instance, postsolve_x
+from memory_profile import enable_profiling, mark_stage, end_run
+from instance_corpus import get_corpus_costs
+from stats import SweepProgress, RunningStats
+from adaptive_grid import AdaptiveGrid
+from prefetch import Prefetcher, missing_files
+import numpy as np
 from utils import (get_fixed_costs, get_random_costs, dprint_costs, cost_matrix_to_dict,
-                   dprint_all_results_from_pkl)
+                   dprint_all_results_from_pkl, get_random_costs_array, cost_dtype, CostArray, as_cost_array,
+                   has_integer_costs, bound_closes, get_sparse_random_costs, SparseCostArray, as_cost_matrix,
+                   is_sparse, sparse_cost_record)
 
 ALGORITHM_DISPATCH = {
     "primal_minmax": {
         "algorithm": "Primal Rounding",
         "type": "minmax",
-        "function": solve_primal_rounding_minmax
+        "function": solve_primal_rounding_minmax,
+        "batch_function": solve_primal_rounding_minmax_batch,  # All runs of one value in one LP (BATCH_LP)
+        "lp_function": round_primal_minmax,  # Result from an LP solution solved elsewhere (parametric LP curves)
+        "x_positions": (1, 2)  # Positions of x-vectors in the returned tuple
+    },
+    "primal_repair_minmax": {
+        "algorithm": "Primal Rounding with Repair",
+        "type": "minmax",
+        "function": solve_primal_repair_minmax,
+        "batch_function": solve_primal_repair_minmax_batch,
+        "lp_function": repair_primal_minmax,
+        "x_positions": (1, 2)
     },
     "primal_maxmin": {
         "algorithm": "Primal Rounding",
         "type": "maxmin",
-        "function": solve_primal_rounding_maxmin
+        "function": solve_primal_rounding_maxmin,
+        "batch_function": solve_primal_rounding_maxmin_batch,
+        "lp_function": round_primal_maxmin,
+        "x_positions": (1, 3)
     },
     "primal_dual_minmax": {
         "algorithm": "Primal-Dual Rounding",
         "type": "minmax",
-        "function": solve_primal_dual_minmax_with_lp
+        "function": solve_primal_dual_minmax_with_lp,
+        "batch_function": solve_primal_dual_minmax_with_lp_batch,
+        "lp_function": primal_dual_minmax_from_lp,
+        "x_positions": (1,)
+    }
+}
+
+EXACT_DISPATCH = {
+    "minmax": {
+        "milp": solve_exact_robust_selection_minmax,
+        "dp": solve_exact_dp_minmax
+    },
+    "maxmin": {
+        "milp": solve_exact_robust_selection_maxmin,
+        "dp": solve_exact_dp_maxmin
     }
 }
 
@@ -48,7 +94,7 @@ k: int | None = None
 
 # Base data
 ALGORITHMS = ["primal_minmax", "primal_maxmin", "primal_dual_minmax"]  # Choose algorithms that should be run.
-# Available: "primal_minmax", "primal_maxmin", "primal_dual_minmax"
+# Available: "primal_minmax", "primal_repair_minmax", "primal_maxmin", "primal_dual_minmax"
 var_param = "n"  # x-axis for the plot, can be "n" or "k" or "p"
 if var_param == "n":
     var_values = [2, 4, 6, 8, 10, 12, 14, 16, 18, 20, 22, 24, 26, 28, 30, 32, 34, 36, 38, 40, 42, 44, 46, 48, 50, 52,
@@ -64,10 +110,45 @@ elif var_param == "p":
     fixed_k = 5
     var_values = list(range(2, fixed_n, 2))  # p in steps of 2 from 2 to n-2
 num_runs = 100  # Number of runs for the loop
-COST_MODE = "random"    # Options: "random", "fixed", "reproduce"
+COST_MODE = "random"    # Options: "random", "fixed", "reproduce", "corpus" (structured families, instance_corpus.py),
+# "sparse" (random costs in a few scenarios per item, kept as a CSR matrix)
 c_range = 100  # Range for random costs [0, c_range]
 PLOT = True  # Set True to enable plotting
 DEBUG = False  # Set True to enable debug prints
+EXACT_BACKEND = "gurobi"  # Solver for the exact MILPs. Options: "gurobi", "highs" (open-source, via SciPy)
+LP_BACKEND = "gurobi"  # Solver for the LP relaxations of the algorithms. Options: "gurobi", "highs"
+CROSS_CHECK_BACKENDS = False  # Set True to re-solve exact models and LPs with both backends and compare (needs Gurobi)
+LARGE_INSTANCES = False  # Set True to keep costs in a compact typed array (no dictionary, no flat_costs in results)
+EXACT_METHOD = "milp"  # Options: "milp", "dp" (integer costs, small k), "auto" (DP if its work and memory are small)
+PARAMETRIC = False  # Set True (var_param "p" or "k") to use one instance per run for all values, warm-started exact
+# MILPs and warm-started LPs of the algorithms (not with SCENARIO_SKETCH or LP_BOUND "mwu", which solve their own LP)
+LP_BOUND = "lp"  # OPT_LP for primal-dual: "lp" (solve the LP) or "mwu" (LP-free certified lower bound, lp_bound.py)
+CERTIFY_OPTIMALITY = False  # Set True to skip the exact problem if the objective meets its LP/dual bound
+CERTIFY_TOL = 1e-6  # Tolerance for bound closure
+EXACT_MIP_GAP = None  # Relative MIP gap target for the exact MILP (None = solver default, i.e. optimal)
+EXACT_TIME_LIMIT = None  # Seconds per exact MILP (None = no limit); unproven optima are reported as ratio intervals
+EXACT_STRENGTHENING = None  # Strengthened exact MILP, e.g. ("symmetry",) or strengthening.STRENGTHENING_OPTIONS
+PRESOLVE = False  # Set True to remove dominated scenarios and items before solving (presolve.py)
+CONCURRENT = False  # Set True to solve the exact problem on a worker thread while the algorithm runs
+STAGE_THREADS = None  # Gurobi threads per stage (exact, algorithm LP); None = Gurobi default
+CORPUS_FAMILY = "negatively_correlated"  # Family for COST_MODE "corpus" (see instance_corpus.FAMILIES)
+CORPUS_SEED = 0  # Seed of the corpus set (instance = run number)
+SPARSE_DENSITY = 0.05  # Share of the scenarios in which an item has nonzero cost (COST_MODE "sparse")
+MEMORY_PROFILE = False  # Set True to record peak memory per stage and run (tracemalloc + RSS, memory_profile.py)
+SCENARIO_SKETCH = None  # Number of sketch scenarios for very large k (primal_minmax, primal_dual_minmax); None = off
+SKETCH_METHOD = "kmeans"  # Options: "kmeans", "extreme", "sample"
+BATCH_LP = False  # Set True to solve the LPs of all runs of one value in one block-diagonal model (batch_lp.py)
+LIVE_SUMMARY = False  # Set True to write running means, CIs, throughput and ETA to live_summary.json (stats.py)
+ADAPTIVE_RUNS = False  # Set True to stop the runs of a value once the 95% CI of ratio_alg_opt is narrow enough
+TARGET_CI = 0.01  # Target half-width of the 95% CI of ratio_alg_opt (same estimator as safe_ci95 in plot.py)
+MIN_RUNS = 10  # Minimum number of runs per value (ADAPTIVE_RUNS)
+MAX_RUNS = 100  # Maximum number of runs per value (ADAPTIVE_RUNS; num_runs is not used)
+ADAPTIVE_GRID = False  # Set True to refine a coarse grid where the metrics change most instead of running var_values
+GRID_RUN_BUDGET = 1000  # Total runs per algorithm for ADAPTIVE_GRID (the initial grid is always run)
+GRID_INITIAL_POINTS = 5  # Values of the coarse grid, evenly spread over [min(var_values), max(var_values)]
+GRID_STEP = 2  # Spacing of the candidate values between min(var_values) and max(var_values)
+PREFETCH = False  # Set True to read and convert upcoming "reproduce" instances on a background thread (prefetch.py)
+PREFETCH_DEPTH = 8  # Max. number of instances loaded ahead (PREFETCH)
 
 
 def dprint(*args, **kwargs):
@@ -75,12 +156,202 @@ def dprint(*args, **kwargs):
         print(*args, **kwargs)
 
 
+# Info of an exact solution that is proven optimal (DP, certification, parametric curves)
+def proven_info(obj_val):
+    return {"bound": obj_val, "gap": 0.0, "optimal": True, "trajectory": []}
+
+
+# Solve the exact problem with the MILP or the DP (EXACT_METHOD). Returns objective value, x-values, the method used and
+# the info dict of the solver (best bound, gap, optimal, trajectory, solve_time in seconds).
+def solve_exact(criterion, costs, n, p, k):
+    start = time.perf_counter()
+    method = EXACT_METHOD
+    if method == "auto":
+        method = "dp" if dp_is_tractable(costs, n, p, k, criterion) else "milp"
+    if method not in EXACT_DISPATCH[criterion]:
+        raise ValueError(f"Unknown EXACT_METHOD: {EXACT_METHOD}")
+    exact_function = EXACT_DISPATCH[criterion][method]
+    if method == "milp":
+        info = {}
+        obj_val, x_val = exact_function(costs, n, p, k, debug=DEBUG, backend=EXACT_BACKEND, mip_gap=EXACT_MIP_GAP,
+                                        threads=STAGE_THREADS, time_limit=EXACT_TIME_LIMIT, info=info,
+                                        strengthen=EXACT_STRENGTHENING)
+    else:
+        obj_val, x_val = exact_function(costs, n, p, k, debug=DEBUG)
+        info = proven_info(obj_val)
+    info["solve_time"] = time.perf_counter() - start
+    return obj_val, x_val, method, info
+
+
+# Interval of ALG / OPT when OPT is only known to lie between the exact incumbent and the exact bound
+def ratio_interval(obj_alg, obj_exact, bound_exact):
+    ends = [obj_alg / val if val != 0 else math.nan for val in (obj_exact, bound_exact)]
+    if any(math.isnan(end) for end in ends):
+        return math.nan, math.nan
+    return min(ends), max(ends)
+
+
+# Run an algorithm from ALGORITHM_DISPATCH. info (dict) receives extra metrics of the algorithm (scenario sketch,
+# residual repair).
+def solve_algorithm(algorithm, costs, n, p, k, info=None):
+    solve_function = ALGORITHM_DISPATCH[algorithm]["function"]
+    sketch = {} if SCENARIO_SKETCH is None else {"sketch_size": SCENARIO_SKETCH, "sketch_method": SKETCH_METHOD,
+                                                 "info": info}
+    if algorithm == "primal_dual_minmax":
+        return solve_function(costs, n, p, k, debug=DEBUG, backend=LP_BACKEND, lp_bound=LP_BOUND, threads=STAGE_THREADS,
+                              **sketch)
+    if algorithm == "primal_minmax":
+        return solve_function(costs, n, p, k, debug=DEBUG, backend=LP_BACKEND, threads=STAGE_THREADS, **sketch)
+    if algorithm == "primal_repair_minmax":
+        return solve_function(costs, n, p, k, debug=DEBUG, backend=LP_BACKEND, threads=STAGE_THREADS, info=info)
+    return solve_function(costs, n, p, k, debug=DEBUG, backend=LP_BACKEND, threads=STAGE_THREADS)
+
+
+# Run an algorithm on all instances (list of (costs, n, p, k)) with one batched LP (BATCH_LP mode). infos: one dict
+# per instance for the extra metrics of the algorithm (as info of solve_algorithm).
+def solve_algorithm_batch(algorithm, instances, infos):
+    if algorithm == "primal_dual_minmax" and LP_BOUND != "lp":  # The MWU bound solves no LP
+        return [solve_algorithm(algorithm, *instance, info=info) for instance, info in zip(instances, infos)]
+    batch_function = ALGORITHM_DISPATCH[algorithm]["batch_function"]
+    extra = {"infos": infos} if algorithm == "primal_repair_minmax" else {}
+    return batch_function(instances, debug=DEBUG, backend=LP_BACKEND, threads=STAGE_THREADS, **extra)
+
+
+# n, p, k and the p label of the plots for the value a of var_param
+def value_parameters(a):
+    if var_param == "n":
+        if fixed_p is None:
+            return a, a // 2, fixed_k, "n/2"
+        return a, fixed_p, fixed_k, str(fixed_p)
+    if var_param == "k":
+        return fixed_n, fixed_p, a, str(fixed_p)
+    return fixed_n, a, fixed_k, str(a)
+
+
+# Cost file of one run (COST_MODE "reproduce")
+def repro_cost_file(a, n, p, k, run):
+    return os.path.join(COSTS_SOURCE_DIR, f"costs_n{n}_p{p}_k{k}_a{a}_run{run + 1}.pkl")
+
+
+# Cost matrix of one run (COST_MODE, PARAMETRIC); announce=False skips the message for loaded cost files
+def generate_costs(a, n, p, k, run, announce=True):
+    if PARAMETRIC:
+        # Same instance for all values of var_param (for var_param "k": its first k scenarios)
+        if run not in parametric_costs:
+            k_all = max(var_values) if var_param == "k" else k
+            if COST_MODE == "fixed":
+                parametric_costs[run] = get_fixed_costs(n, k_all)
+            elif COST_MODE == "corpus":
+                c_all = get_corpus_costs(CORPUS_FAMILY, n, k_all, run, CORPUS_SEED, c_range)
+                parametric_costs[run] = c_all if LARGE_INSTANCES else c_all.tolist()
+            elif LARGE_INSTANCES:
+                parametric_costs[run] = get_random_costs_array(n, k_all, c_range)
+            else:
+                parametric_costs[run] = get_random_costs(n, k_all, c_range)
+        return parametric_costs[run][:k]
+    if COST_MODE == "fixed":
+        return get_fixed_costs(n, k)
+    if COST_MODE == "reproduce":
+        cost_file = repro_cost_file(a, n, p, k, run)
+        if not os.path.exists(cost_file):
+            raise FileNotFoundError(
+                f"Repro file not found: {cost_file}. "
+            )
+        with open(cost_file, "rb") as f:
+            c = pickle.load(f)
+        if announce:
+            print(f"[Loaded costs] {cost_file}")
+        return c
+    if COST_MODE == "corpus":
+        c = get_corpus_costs(CORPUS_FAMILY, n, k, run, CORPUS_SEED, c_range)
+        return c if LARGE_INSTANCES else c.tolist()
+    if COST_MODE == "sparse":
+        return get_sparse_random_costs(n, k, c_range, SPARSE_DENSITY)
+    if COST_MODE == "random":
+        return get_random_costs_array(n, k, c_range) if LARGE_INSTANCES else get_random_costs(n, k, c_range)
+    raise ValueError(f"Unknown COST_MODE: {COST_MODE}")
+
+
+# Solver input from a cost matrix: returns the matrix, the costs (dictionary, CostArray or SparseCostArray) and
+# flat_costs for results. debug=False: no output (prefetch thread, printed by prefetched_instance instead)
+def convert_costs(c, n, k, debug=None):
+    debug = DEBUG if debug is None else debug
+    if debug:
+        print("--- Cost matrix ---")
+    dprint_costs(c.toarray() if is_sparse(c) and debug else c, debug=debug)
+    if is_sparse(c):
+        # CSR matrix: memory and model size scale with the nonzeros; results store the CSR arrays
+        costs = SparseCostArray(c)
+        flat_costs = sparse_cost_record(costs)
+    elif LARGE_INSTANCES:
+        # Compact k x n array with the smallest dtype for the cost range; costs are not copied into results
+        c = np.asarray(c)
+        costs = CostArray(c.astype(cost_dtype(max(c_range, int(c.max()))), copy=False))
+        flat_costs = None
+    else:
+        costs = cost_matrix_to_dict(c)  # Convert costs to a dictionary with keys (s, i)
+        if debug:
+            print("--- Cost dictionary ---")
+            print(costs)
+        flat_costs = [costs[(s + 1, i + 1)] for s in range(k) for i in range(n)]  # Flattened list for .pkl
+    return c, costs, flat_costs
+
+
+# Converted instance of one run (prefetch key (algorithm, a, run), the algorithm only keeps the keys unique). Runs on
+# the prefetch thread, so it prints nothing; prefetched_instance prints the messages in the main thread.
+def load_instance(key):
+    _, a, run = key
+    n, p, k, _ = value_parameters(a)
+    return convert_costs(generate_costs(a, n, p, k, run, announce=False), n, k, debug=False)
+
+
+# Instance of one run from the prefetcher, with the output generate_costs and convert_costs would have printed
+def prefetched_instance(prefetcher, algorithm, a, run):
+    c, costs, flat_costs = prefetcher.get((algorithm, a, run))
+    n, p, k, _ = value_parameters(a)
+    print(f"[Loaded costs] {repro_cost_file(a, n, p, k, run)} (prefetched)")
+    dprint("--- Cost matrix ---")
+    dprint_costs(c.toarray() if is_sparse(c) and DEBUG else c, debug=DEBUG)
+    if isinstance(costs, dict):
+        dprint("--- Cost dictionary ---")
+        dprint(costs)
+    return c, costs, flat_costs
+
+
+# Objective value, bound on OPT (lower bound for min-max, upper bound for max-min) and selection from an algorithm
+def algorithm_certificate(algorithm, result):
+    if algorithm in ("primal_minmax", "primal_repair_minmax"):
+        return result[0], result[3], result[2]  # LP value
+    if algorithm == "primal_maxmin":
+        return result[0], result[2], result[1]  # LP value
+    if algorithm == "primal_dual_minmax":
+        return result[0], max(result[2], result[3]), result[1]  # Dual objective, OPT_LP (or its lower bound)
+    raise ValueError(f"No certificate for algorithm '{algorithm}'")
+
+
+# Objective values and x-values of the exact MILP (integral) or the LP relaxation for all var_values on one instance
+# c_all (PARAMETRIC mode)
+def solve_curve(criterion, c_all, n, p, k, integral=True):
+    costs_all = CostArray(np.asarray(c_all)) if LARGE_INSTANCES else cost_matrix_to_dict(c_all)
+    backend = EXACT_BACKEND if integral else LP_BACKEND
+    if var_param == "p":
+        return solve_p_curve(costs_all, n, k, var_values, criterion, integral=integral, backend=backend)
+    return solve_k_curve(costs_all, n, p, var_values, criterion, integral=integral, backend=backend)
+
+
+# True if the algorithm can take its LP solution from a parametric LP curve (PARAMETRIC mode)
+def uses_lp_curve(algorithm):
+    if SCENARIO_SKETCH is not None and algorithm in ("primal_minmax", "primal_dual_minmax"):
+        return False  # The LP is solved on the sketch
+    return not (algorithm == "primal_dual_minmax" and LP_BOUND != "lp")
+
+
 if __name__ == "__main__":
     # Create unique results subfolder based on algorithm, k, and timestamp
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     RESULT_DIR = f"results/{var_param}_{timestamp}"
     os.makedirs(RESULT_DIR, exist_ok=True)
-    if COST_MODE not in {"random", "fixed", "reproduce"}:
+    if COST_MODE not in {"random", "fixed", "reproduce", "corpus", "sparse"}:
         raise ValueError(f"Unknown COST_MODE: {COST_MODE}")
     VAR_DIR_MAP = {
         "n": "n_var",
@@ -92,8 +363,53 @@ if __name__ == "__main__":
 
     COSTS_SOURCE_DIR = os.path.join("repro_costs", VAR_DIR_MAP[var_param])
 
+    if PARAMETRIC and (var_param not in {"p", "k"} or COST_MODE in {"reproduce", "sparse"}):
+        raise ValueError("PARAMETRIC requires var_param 'p' or 'k' and COST_MODE 'random', 'fixed' or 'corpus'.")
+    if PARAMETRIC and PRESOLVE:
+        raise ValueError("PRESOLVE cannot be combined with PARAMETRIC (the reduction depends on p and k).")
+    if BATCH_LP and PRESOLVE:
+        raise ValueError("PRESOLVE cannot be combined with BATCH_LP (reduced instances have different sizes).")
+    if BATCH_LP and SCENARIO_SKETCH is not None:
+        raise ValueError("SCENARIO_SKETCH cannot be combined with BATCH_LP.")
+    if BATCH_LP and ADAPTIVE_RUNS:
+        raise ValueError("ADAPTIVE_RUNS cannot be combined with BATCH_LP (the number of runs is not known upfront).")
+    if ADAPTIVE_RUNS and not 2 <= MIN_RUNS <= MAX_RUNS:
+        raise ValueError("ADAPTIVE_RUNS requires 2 <= MIN_RUNS <= MAX_RUNS.")
+    if ADAPTIVE_GRID and PARAMETRIC:
+        raise ValueError("ADAPTIVE_GRID cannot be combined with PARAMETRIC (the curves are solved for var_values).")
+    max_runs = MAX_RUNS if ADAPTIVE_RUNS else num_runs
+
+    # Reproduce mode: report all missing cost files before the sweep starts (ADAPTIVE_GRID: values are not known)
+    if COST_MODE == "reproduce" and not ADAPTIVE_GRID:
+        missing = missing_files([repro_cost_file(a, *value_parameters(a)[:3], run)
+                                 for a in var_values for run in range(max_runs)])
+        if missing:
+            raise FileNotFoundError(f"{len(missing)} repro files not found in {COSTS_SOURCE_DIR}, e.g.: "
+                                    + ", ".join(missing[:5]))
+    parametric_costs = {}  # run -> instance shared by all values of var_param (PARAMETRIC mode)
+    exact_curves = {}  # (criterion, run) -> {value: (obj_val, x_val)}
+    lp_curves = {}  # (criterion, run) -> ({value: (obj_val_lp, x_frac)}, solve time per value)
+
+    # Worker thread for the exact stage (CONCURRENT mode); Gurobi releases the GIL while optimizing
+    stage_pool = ThreadPoolExecutor(max_workers=1) if CONCURRENT else None
+
+    if MEMORY_PROFILE:
+        enable_profiling()
+
     results_by_alg = {}
 
+    # Streaming statistics per (algorithm, varying_param) in constant memory, written periodically while running
+    progress = None
+    if LIVE_SUMMARY:
+        progress = SweepProgress(os.path.join(RESULT_DIR, "live_summary.json"),
+                                 len(ALGORITHMS) * (GRID_RUN_BUDGET if ADAPTIVE_GRID else len(var_values) * max_runs))
+
+    # Reproduce mode: read and convert the instances of the upcoming runs while the current one is solved
+    prefetcher = None
+    if PREFETCH and COST_MODE == "reproduce" and not ADAPTIVE_GRID:
+        prefetcher = Prefetcher([(algorithm, a, run) for algorithm in ALGORITHMS if algorithm in ALGORITHM_DISPATCH
+                                 for a in var_values for run in range(max_runs)], load_instance, PREFETCH_DEPTH)
+
     for algorithm in ALGORITHMS:
         algo_info = ALGORITHM_DISPATCH.get(algorithm)
         if not algo_info:
@@ -101,34 +417,19 @@ if __name__ == "__main__":
             continue
 
         criterion = algo_info["type"]
-        solve_function = algo_info["function"]
 
         algo_result_dir = os.path.join(RESULT_DIR, algorithm)
         os.makedirs(algo_result_dir, exist_ok=True)
 
         all_results = []
+        exact_solves_avoided = 0
+        exact_unproven = 0
 
-        for a in var_values:
-            p_label = ""
-            if var_param == "n":
-                n = a
-                if fixed_p is None:
-                    p = n // 2
-                    p_label = "n/2"
-                else:
-                    p = fixed_p
-                    p_label = str(fixed_p)
-                k = fixed_k
-            elif var_param == "k":
-                n = fixed_n
-                p = fixed_p
-                p_label = str(fixed_p)
-                k = a
-            elif var_param == "p":
-                n = fixed_n
-                p = a
-                p_label = str(a)
-                k = fixed_k
+        # ADAPTIVE_GRID: values are chosen one by one from the rows of the values run so far
+        grid_values = AdaptiveGrid(var_values, GRID_RUN_BUDGET, GRID_INITIAL_POINTS, GRID_STEP).values(all_results) \
+            if ADAPTIVE_GRID else var_values
+        for a in grid_values:
+            n, p, k, p_label = value_parameters(a)
 
             # Ensure these exist for all branches before we solve the exact problem
             obj_val_exact: float = 0.0
@@ -136,59 +437,125 @@ if __name__ == "__main__":
 
             print(f"\n=== Running experiments for n = {n}, p = {p}, k = {k} ===")
 
-            for run in range(num_runs):
+            # BATCH_LP: generate all runs of this value first and solve their LPs in one block-diagonal model
+            batch, batch_results, batch_infos, batch_time = None, None, None, 0.0
+            if BATCH_LP:
+                mark_stage("generation")
+                batch = [prefetched_instance(prefetcher, algorithm, a, run) if prefetcher is not None
+                         else convert_costs(generate_costs(a, n, p, k, run), n, k) for run in range(num_runs)]
+                batch_infos = [{} for _ in batch]
+                start_batch = time.perf_counter()
+                batch_results = solve_algorithm_batch(algorithm, [(costs, n, p, k) for _, costs, _ in batch],
+                                                      batch_infos)
+                batch_time = (time.perf_counter() - start_batch) / num_runs  # Share of every run
+
+            # ADAPTIVE_RUNS: streaming CI of ratio_alg_opt for this value (rows of this value start at point_start)
+            point_stats = RunningStats()
+            point_start = len(all_results)
+
+            for run in range(max_runs):
                 print(f"\n=== Running {algorithm} ({criterion}) for run {run + 1} ===")
+                mark_stage("generation")
 
-                # Choose cost type
-                if COST_MODE == "fixed":
-                    c = get_fixed_costs(n, k)
-                elif COST_MODE == "reproduce":
-                    cost_file = os.path.join(
-                        COSTS_SOURCE_DIR,
-                        f"costs_n{n}_p{p}_k{k}_a{a}_run{run + 1}.pkl"
-                    )
-                    if not os.path.exists(cost_file):
-                        raise FileNotFoundError(
-                            f"Repro file not found: {cost_file}. "
-                        )
-                    with open(cost_file, "rb") as f:
-                        c = pickle.load(f)
-                    print(f"[Loaded costs] {cost_file}")
-                elif COST_MODE == "random":
-                    c = get_random_costs(n, k, c_range)
+                # Choose cost type (BATCH_LP: already generated and converted)
+                if batch is not None:
+                    c, costs, flat_costs = batch[run]
+                elif prefetcher is not None:
+                    c, costs, flat_costs = prefetched_instance(prefetcher, algorithm, a, run)
                 else:
-                    raise ValueError(f"Unknown COST_MODE: {COST_MODE}")
+                    c = generate_costs(a, n, p, k, run)
+                    mark_stage("conversion")
+                    c, costs, flat_costs = convert_costs(c, n, k)
+
+                # Presolve: all solvers below work on the reduced instance (costs_red, n_red, k_red)
+                costs_red, n_red, k_red = costs, n, k
+                reduction = None
+                if PRESOLVE:
+                    reduction = presolve_instance(as_cost_array(costs, n, k), p, criterion)
+                    c_dense = c.toarray() if is_sparse(c) else c  # Presolve works on dense costs
+                    c_red = np.asarray(c_dense)[np.ix_(reduction["scenarios"], reduction["items"])]
+                    costs_red = CostArray(c_red) if LARGE_INSTANCES else cost_matrix_to_dict(c_red.tolist())
+                    k_red, n_red = c_red.shape
+                    dprint(f"Presolve: n = {n} -> {n_red}, k = {k} -> {k_red}, "
+                           f"fixable to 1: {reduction['fixable_one']}, duplicates: {reduction['duplicate_items']}")
+
+                # Stages: exact problem (on the worker thread in CONCURRENT mode) and algorithm (this thread)
+                exact_future = None
+                algorithm_info = {}  # Extra metrics (scenario sketch, timings), added to the result row
+                if CONCURRENT and not PARAMETRIC:
+                    exact_future = stage_pool.submit(solve_exact, criterion, costs_red, n_red, p, k_red)
+                start_algorithm = time.perf_counter()
+                if batch_results is not None:
+                    result = batch_results[run]
+                    algorithm_info.update(batch_infos[run])
+                elif PARAMETRIC and uses_lp_curve(algorithm):
+                    if (criterion, run) not in lp_curves:
+                        start_curve = time.perf_counter()
+                        curve = solve_curve(criterion, parametric_costs[run], n, p, k, integral=False)
+                        lp_curves[criterion, run] = curve, (time.perf_counter() - start_curve) / len(var_values)
+                    curve, batch_time = lp_curves[criterion, run]  # Share of the curve solve of every value
+                    start_algorithm = time.perf_counter()
+                    extra = {"info": algorithm_info} if algorithm == "primal_repair_minmax" else {}
+                    result = algo_info["lp_function"](costs_red, n_red, p, k_red, *curve[a], debug=DEBUG, **extra)
+                else:
+                    result = solve_algorithm(algorithm, costs_red, n_red, p, k_red, info=algorithm_info)
+                algorithm_info["time_algorithm"] = time.perf_counter() - start_algorithm + batch_time
 
-                # Print costs
-                dprint("--- Cost matrix ---")
-                dprint_costs(c, debug=DEBUG)
-                costs = cost_matrix_to_dict(c)  # Convert costs to a dictionary with keys (s, i)
-                dprint("--- Cost dictionary ---")
-                dprint(costs)
-                flat_costs = [costs[(s + 1, i + 1)] for s in range(k) for i in range(n)]  # Flattened cost list for .pkl
+                # Certification: if the algorithm's objective meets its bound, it is optimal and the MILP is skipped
+                # (in CONCURRENT mode the exact problem is already running, so runs are only marked as certified)
+                exact_certified = False
+                if CERTIFY_OPTIMALITY and not PARAMETRIC:
+                    obj_val_alg, bound_alg, x_vector_alg = algorithm_certificate(algorithm, result)
+                    integer_costs = has_integer_costs(as_cost_matrix(costs_red, n_red, k_red))
+                    exact_certified = bound_closes(criterion, obj_val_alg, bound_alg, integer_costs, CERTIFY_TOL)
 
                 # Exact problem
-                if criterion == "minmax":
-                    print("\n--- Exact robust solution min-max ---")
-                    obj_val_exact_minmax, x_val_exact_minmax = (solve_exact_robust_selection_minmax
-                                                                (costs, n, p, k, debug=DEBUG))
-                    obj_val_exact = obj_val_exact_minmax
-                    x_vector_exact = [1 if val > 0.5 else 0 for val in x_val_exact_minmax]  # For rounding discrepancy
-                    dprint(f"Selected items (exact): {x_vector_exact}")
-                    dprint(f"Objective value: {obj_val_exact:.2f}")
-                elif criterion == "maxmin":
-                    print("\n--- Exact robust solution max-min ---")
-                    obj_val_exact_maxmin, x_val_exact_maxmin = (solve_exact_robust_selection_maxmin
-                                                                (costs, n, p, k, debug=DEBUG))
-                    obj_val_exact = obj_val_exact_maxmin
-                    x_vector_exact = [1 if val > 0.5 else 0 for val in x_val_exact_maxmin]
-                    dprint(f"Selected items (exact): {x_vector_exact}")
-                    dprint(f"Objective value: {obj_val_exact:.2f}")
-
-                result = solve_function(costs, n, p, k, debug=DEBUG)
-
-                if algorithm == "primal_minmax":
-                    print("\n--- Primal Rounding min-max ---")
+                print(f"\n--- Exact robust solution {'min-max' if criterion == 'minmax' else 'max-min'} ---")
+                if exact_future is not None:
+                    obj_val_exact, x_val_exact, exact_method, exact_info = exact_future.result()
+                elif exact_certified:
+                    obj_val_exact, x_val_exact = obj_val_alg, x_vector_alg
+                    exact_method = "certified"
+                    exact_info = proven_info(obj_val_exact)
+                    exact_solves_avoided += 1
+                elif PARAMETRIC:
+                    if (criterion, run) not in exact_curves:
+                        exact_curves[criterion, run] = solve_curve(criterion, parametric_costs[run], n, p, k)
+                    obj_val_exact, x_val_exact = exact_curves[criterion, run][a]
+                    exact_method = "milp_parametric"
+                    exact_info = proven_info(obj_val_exact)
+                else:
+                    obj_val_exact, x_val_exact, exact_method, exact_info = solve_exact(criterion, costs_red, n_red, p,
+                                                                                       k_red)
+                algorithm_info["time_exact"] = exact_info.get("solve_time", 0.0)  # 0 if certified or parametric
+                if not exact_info["optimal"]:
+                    exact_unproven += 1
+                    print(f"Exact solution not proven optimal: bound = {exact_info['bound']:.4f}, "
+                          f"gap = {exact_info['gap']:.2e}")
+
+                # Postsolve: map x-vectors of the reduced instance back to all n items
+                if PRESOLVE:
+                    x_val_exact = postsolve_x(reduction, x_val_exact)
+                    result = list(result)
+                    for pos in algo_info["x_positions"]:
+                        result[pos] = postsolve_x(reduction, result[pos])
+                x_vector_exact = [1 if val > 0.5 else 0 for val in x_val_exact]  # For rounding discrepancy
+                dprint(f"Exact method: {exact_method}")
+                dprint(f"Selected items (exact): {x_vector_exact}")
+                dprint(f"Objective value: {obj_val_exact:.2f}")
+                dprint(f"Bound: {exact_info['bound']:.2f}, gap: {exact_info['gap']:.2e}")
+                dprint(f"Trajectory (time, incumbent, bound): {exact_info['trajectory']}")
+
+                # Compare Gurobi and HiGHS on the exact model (and the min-max LP relaxation)
+                if CROSS_CHECK_BACKENDS:
+                    checked = cross_check_backends(EXACT_DISPATCH[criterion]["milp"], costs_red, n_red, p, k_red)
+                    if criterion == "minmax":
+                        cross_check_backends(solve_primal_minmax, costs_red, n_red, p, k_red)
+                    dprint(f"Backend cross-check (gurobi, highs): {checked}")
+
+                mark_stage("result_storage")
+                if algorithm in ("primal_minmax", "primal_repair_minmax"):
+                    print(f"\n--- {algo_info['algorithm']} min-max ---")
                     obj_val_primal, x_val_primal_frac, x_vector_primal_rounded, obj_val_primal_lp, tau = result
                     x_vector_primal_frac = [round(val, 2) for val in x_val_primal_frac]
                     fractional_count = sum(1 for val in x_val_primal_frac if 0.0001 < val < 0.9999)
@@ -200,6 +567,7 @@ if __name__ == "__main__":
 
                     # Metrics calculations
                     ratio_primal_opt = obj_val_primal / obj_val_exact if obj_val_exact != 0 else math.nan
+                    ratio_low, ratio_high = ratio_interval(obj_val_primal, obj_val_exact, exact_info["bound"])
                     integrality_gap = obj_val_exact / obj_val_primal_lp if obj_val_primal_lp != 0 else math.nan
                     approximation_guarantee = min(k, n - p + 1)
                     a_posteriori_bound = 1 / tau if tau != 0 else math.nan
@@ -220,9 +588,19 @@ if __name__ == "__main__":
                         "k": k,
                         "run": run + 1,
                         "obj_exact": obj_val_exact,
+                        "exact_method": exact_method,
+                        "exact_certified": exact_certified,
+                        "exact_optimal": exact_info["optimal"],
+                        "exact_bound": exact_info["bound"],
+                        "exact_gap": exact_info["gap"],
+                        "exact_trajectory": exact_info["trajectory"],
+                        "presolve_item_ratio": reduction["item_ratio"] if PRESOLVE else 1.0,
+                        "presolve_scenario_ratio": reduction["scenario_ratio"] if PRESOLVE else 1.0,
                         "obj_primal_lp": obj_val_primal_lp,
                         "obj_primal": obj_val_primal,
                         "ratio_alg_opt": ratio_primal_opt,
+                        "ratio_alg_opt_low": ratio_low,
+                        "ratio_alg_opt_high": ratio_high,
                         "tau": tau,
                         "a_posteriori_bound": a_posteriori_bound,
                         "alg_div_opt_lp": alg_div_opt_lp,
@@ -246,6 +624,7 @@ if __name__ == "__main__":
 
                     # Metrics calculations
                     ratio_primal_opt = obj_val_primal / obj_val_exact if obj_val_exact != 0 else math.nan
+                    ratio_low, ratio_high = ratio_interval(obj_val_primal, obj_val_exact, exact_info["bound"])
                     integrality_gap = obj_val_primal_lp / obj_val_exact if obj_val_exact != 0 else math.nan
                     dprint(f"Approximation ratio: {ratio_primal_opt:.2f}")
                     dprint(f"Integrality gap: {integrality_gap:.2f}")
@@ -261,9 +640,19 @@ if __name__ == "__main__":
                         "k": k,
                         "run": run + 1,
                         "obj_exact": obj_val_exact,
+                        "exact_method": exact_method,
+                        "exact_certified": exact_certified,
+                        "exact_optimal": exact_info["optimal"],
+                        "exact_bound": exact_info["bound"],
+                        "exact_gap": exact_info["gap"],
+                        "exact_trajectory": exact_info["trajectory"],
+                        "presolve_item_ratio": reduction["item_ratio"] if PRESOLVE else 1.0,
+                        "presolve_scenario_ratio": reduction["scenario_ratio"] if PRESOLVE else 1.0,
                         "obj_primal_lp": obj_val_primal_lp,
                         "obj_primal": obj_val_primal,
                         "ratio_alg_opt": ratio_primal_opt,
+                        "ratio_alg_opt_low": ratio_low,
+                        "ratio_alg_opt_high": ratio_high,
                         "x_vector_exact": x_vector_exact,
                         "x_vector_primal_frac": x_val_primal_frac,
                         "x_vector_primal_rounded": x_vector_primal_rounded,
@@ -272,18 +661,20 @@ if __name__ == "__main__":
 
                 elif algorithm == "primal_dual_minmax":
                     print("\n--- Primal-Dual Rounding min-max ---")
-                    obj_val_primaldual, x_vector_primaldual_rounded, obj_dual, obj_val_primal_lp = result
+                    obj_val_primaldual, x_vector_primaldual_rounded, obj_dual, obj_val_primal_lp, lp_bound_gap = result
                     dprint(f"Selected items (rounded): {x_vector_primaldual_rounded}")
                     dprint(f"Objective value: {obj_val_primaldual:.2f}")
 
                     # Metrics calculations
                     ratio_primaldual_opt = obj_val_primaldual / obj_val_exact if obj_val_exact != 0 else math.nan
+                    ratio_low, ratio_high = ratio_interval(obj_val_primaldual, obj_val_exact, exact_info["bound"])
                     dprint(f"Approximation ratio: {ratio_primaldual_opt:.2f}")
                     approximation_guarantee = k
                     a_posteriori_bound = (obj_val_primaldual / obj_dual) if obj_dual != 0 else math.nan
                     alg_div_opt_lp = obj_val_primaldual / obj_val_primal_lp if obj_val_primal_lp != 0 else math.nan
                     dprint(f"a-posteriori (ALG/LB_dual): {a_posteriori_bound:.2f}")
                     dprint(f"a-posteriori (ALG/OPT_LP): {alg_div_opt_lp:.2f}")
+                    dprint(f"OPT_LP ({LP_BOUND}): {obj_val_primal_lp:.4f}, relative gap to OPT_LP ≤ {lp_bound_gap:.2e}")
 
                     # Store results
                     all_results.append({
@@ -296,18 +687,59 @@ if __name__ == "__main__":
                         "k": k,
                         "run": run + 1,
                         "obj_exact": obj_val_exact,
+                        "exact_method": exact_method,
+                        "exact_certified": exact_certified,
+                        "exact_optimal": exact_info["optimal"],
+                        "exact_bound": exact_info["bound"],
+                        "exact_gap": exact_info["gap"],
+                        "exact_trajectory": exact_info["trajectory"],
+                        "presolve_item_ratio": reduction["item_ratio"] if PRESOLVE else 1.0,
+                        "presolve_scenario_ratio": reduction["scenario_ratio"] if PRESOLVE else 1.0,
                         "obj_dual": obj_dual,
+                        "obj_primal_lp": obj_val_primal_lp,
+                        "lp_bound": LP_BOUND,
+                        "lp_bound_gap": lp_bound_gap,
                         "obj_val_primaldual": obj_val_primaldual,
                         "a_posteriori_bound": a_posteriori_bound,
                         "alg_div_opt_lp": alg_div_opt_lp,
                         "approximation_guarantee": approximation_guarantee,
                         "ratio_alg_opt": ratio_primaldual_opt,
+                        "ratio_alg_opt_low": ratio_low,
+                        "ratio_alg_opt_high": ratio_high,
                         "x_vector_exact": x_vector_exact,
                         "x_vector_primaldual_rounded": x_vector_primaldual_rounded,
                         "flat_costs": flat_costs,
                     })
 
+                all_results[-1].update(algorithm_info)
+
+                # Peak memory per stage of this run (mem_<stage>_mb, rss_<stage>_mb)
+                if MEMORY_PROFILE:
+                    all_results[-1].update(end_run())
+                if progress is not None:
+                    progress.add(all_results[-1])
+
+                # Sequential stopping: enough runs for the target CI half-width
+                point_stats.update(all_results[-1]["ratio_alg_opt"])
+                if ADAPTIVE_RUNS and point_stats.count >= MIN_RUNS and point_stats.ci95() <= TARGET_CI:
+                    break
+
+            runs_used = len(all_results) - point_start
+            for res in all_results[point_start:]:
+                res["runs_used"] = runs_used
+            if ADAPTIVE_RUNS:
+                print(f"Runs used for {var_param} = {a}: {runs_used} (CI half-width of the ratio: "
+                      f"{point_stats.ci95():.4f}, target {TARGET_CI})")
+
+        if CERTIFY_OPTIMALITY:
+            print(f"Exact solves avoided by certification for {algorithm}: "
+                  f"{exact_solves_avoided} of {len(all_results)}")
+        if EXACT_TIME_LIMIT is not None or EXACT_MIP_GAP is not None:
+            print(f"Exact solutions not proven optimal for {algorithm}: {exact_unproven} of {len(all_results)} "
+                  f"(ratios reported as intervals ratio_alg_opt_low, ratio_alg_opt_high)")
+
         # Save results as pickle file
+        mark_stage("result_storage")
         with open(os.path.join(algo_result_dir, f"all_results_{criterion.lower()}.pkl"), "wb") as f:
             pickle.dump(all_results, f)
         print(f"Results for {algorithm} saved in {algo_result_dir} ")
@@ -316,11 +748,12 @@ if __name__ == "__main__":
         dprint_all_results_from_pkl(os.path.join(algo_result_dir, f"all_results_{criterion.lower()}.pkl"), debug=DEBUG)
 
         # Plot results
+        mark_stage("plotting")
         if PLOT:
             from plot import (plot_approx_ratio_only, plot_approximation_ratios_primal,
                               plot_approximation_ratios_primaldual, plot_fractional_variable_count)
 
-            if algorithm == "primal_minmax":
+            if algorithm in ("primal_minmax", "primal_repair_minmax"):
                 plot_approx_ratio_only(
                     all_results, num_runs, var_param,
                     fixed_n=n, fixed_k=k, c_range=c_range,
@@ -358,8 +791,21 @@ if __name__ == "__main__":
                     output_dir=algo_result_dir
                 )
 
+        # Peak memory of storing and plotting all results of the algorithm
+        if MEMORY_PROFILE:
+            with open(os.path.join(algo_result_dir, "memory_sweep.json"), "w") as f:
+                json.dump(end_run(), f, indent=2)
+
         results_by_alg[algorithm] = all_results
 
+    if stage_pool is not None:
+        stage_pool.shutdown()
+    if prefetcher is not None:
+        prefetcher.close()
+        print(f"Prefetch: {prefetcher.summary()}")
+    if progress is not None:
+        progress.write()
+
     if PLOT and {'primal_minmax', 'primal_dual_minmax'}.issubset(results_by_alg):
         from plot import plot_ratio_comp
 
@@ -0,0 +1,116 @@
+# memory_profile.py
+
+# Opt-in memory profiling per stage of a run (generation, conversion, model_build, optimize, rounding, result_storage,
+# plotting).
+
+# Description: mark_stage(name) closes the current stage and opens the next one. For every stage two peaks are recorded:
+# the largest increase of Python allocations over the start of the stage (tracemalloc) and the largest resident set size
+# of the process (RSS, sampled by a background thread). The RSS also contains memory of the solvers (Gurobi, HiGHS),
+# which tracemalloc cannot see. end_run() closes the last stage and returns the peaks of the run in MB; stages that
+# occur more than once in a run keep their maximum. Without enable_profiling() every call is a no-op. Only the main
+# thread marks stages (in CONCURRENT mode the exact solve on the worker thread counts towards the current main stage).
+
+import os
+import threading
+import tracemalloc
+
+# RSS is read with psutil if installed, otherwise from /proc (Linux); elsewhere only tracemalloc is used
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+STAGES = ("generation", "conversion", "model_build", "optimize", "rounding", "result_storage", "plotting")
+MB = 1024 * 1024
+
+_state = {
+    "enabled": False,
+    "stage": None,
+    "stage_start": 0,  # Traced memory at the start of the current stage
+    "rss_peak": 0,  # Largest RSS since the start of the current stage
+    "run": {}  # stage -> [traced peak, RSS peak] (bytes)
+}
+_lock = threading.Lock()
+_stop = threading.Event()
+
+
+def _read_rss():
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _sample_rss(interval):
+    while not _stop.wait(interval):
+        rss = _read_rss()
+        with _lock:
+            _state["rss_peak"] = max(_state["rss_peak"], rss)
+
+
+def enable_profiling(interval=0.005):
+    if _state["enabled"]:
+        return
+    tracemalloc.start()
+    _stop.clear()
+    threading.Thread(target=_sample_rss, args=(interval,), daemon=True).start()
+    _state["enabled"] = True
+
+
+def disable_profiling():
+    if not _state["enabled"]:
+        return
+    _stop.set()
+    tracemalloc.stop()
+    _state.update(enabled=False, stage=None, run={})
+
+
+def profiling_enabled():
+    return _state["enabled"]
+
+
+def _close_stage():
+    stage = _state["stage"]
+    if stage is None:
+        return
+    _, traced_peak = tracemalloc.get_traced_memory()
+    with _lock:
+        rss_peak = max(_state["rss_peak"], _read_rss())
+    peaks = _state["run"].setdefault(stage, [0, 0])
+    peaks[0] = max(peaks[0], traced_peak - _state["stage_start"])
+    peaks[1] = max(peaks[1], rss_peak)
+    _state["stage"] = None
+
+
+def mark_stage(name):
+    if not _state["enabled"] or threading.current_thread() is not threading.main_thread():
+        return
+    _close_stage()
+    tracemalloc.reset_peak()
+    _state["stage_start"], _ = tracemalloc.get_traced_memory()
+    with _lock:
+        _state["rss_peak"] = _read_rss()
+    _state["stage"] = name
+
+
+# Peaks of the finished run as {"mem_<stage>_mb": Python allocations, "rss_<stage>_mb": RSS} ({} if disabled)
+def end_run():
+    if not _state["enabled"]:
+        return {}
+    _close_stage()
+    result = {}
+    for stage, (traced_peak, rss_peak) in _state["run"].items():
+        result[f"mem_{stage}_mb"] = traced_peak / MB
+        result[f"rss_{stage}_mb"] = rss_peak / MB
+    _state["run"] = {}
+    return result
+
+
+# Largest values over all stages of end_run() output: (Python allocations, RSS) in MB
+def overall_peaks(run_memory):
+    traced = max((v for key, v in run_memory.items() if key.startswith("mem_")), default=0.0)
+    rss = max((v for key, v in run_memory.items() if key.startswith("rss_")), default=0.0)
+    return traced, rss
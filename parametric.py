@@ -0,0 +1,123 @@
+# parametric.py
+
+# Parametric sweeps over p and k on one fixed instance of the Robust Selection Problem.
+
+# Description: Instead of building a new model for every sweep value, one LP or MILP (epigraph formulation) is built
+# per instance and only modified: for a p-curve the right-hand side of the cardinality constraint is changed, for a
+# k-curve the next scenario rows are appended. Gurobi reoptimizes from the previous basis (dual simplex for the LP);
+# for the MILP the previous selection is repaired into a feasible start for the next value. The HiGHS interface in SciPy
+# cannot modify a model, so with backend="highs" every value is solved from scratch (same results, no warm start).
+
+import numpy as np
+from backend import gp, GRB, check_backend, solve_epigraph_highs, gurobi_model
+from utils import as_cost_array, scenario_terms
+
+
+def _add_scenario_rows(m, x, z, costs, n, scenarios, criterion):
+    for s in scenarios:
+        row = gp.quicksum(c * x[i] for i, c in scenario_terms(costs, s, n))
+        if criterion == "minmax":
+            m.addConstr(row <= z, name=f"worst_case_cost[{s}]")
+        else:
+            m.addConstr(row >= z, name=f"worst_case_profit[{s}]")
+
+
+def _build_model(costs, n, p, k, criterion, integral):
+    m = gurobi_model(f"parametric_robust_selection_{criterion}")
+    vtype = GRB.BINARY if integral else GRB.CONTINUOUS
+    x = m.addVars(range(1, n + 1), vtype=vtype, lb=0, ub=1, name="x")
+    z = m.addVar(name="z")
+    m.setObjective(z, GRB.MINIMIZE if criterion == "minmax" else GRB.MAXIMIZE)
+    card = m.addConstr(gp.quicksum(x[i] for i in range(1, n + 1)) == p, name="select_p_items")
+    _add_scenario_rows(m, x, z, costs, n, range(1, k + 1), criterion)
+    if not integral:
+        m.Params.Method = 1  # Dual simplex, reoptimizes from the previous basis after a modification
+    return m, x, z, card
+
+
+# Feasible MILP start for cardinality p from the previous selection: add the cheapest (min-max) / most profitable
+# (max-min) unselected items or drop the most expensive / least profitable selected ones
+def _repair_selection(x_prev, C, p, criterion):
+    selected = [i for i, val in enumerate(x_prev) if val > 0.5]
+    total = C.sum(axis=0)
+    order = np.argsort(total if criterion == "minmax" else -total, kind="stable")
+    if len(selected) < p:
+        chosen = set(selected)
+        selected += [int(i) for i in order if int(i) not in chosen][:p - len(selected)]
+    elif len(selected) > p:
+        rank = {int(i): r for r, i in enumerate(order)}
+        selected = sorted(selected, key=lambda i: rank[i])[:p]
+    start = [0.0] * len(x_prev)
+    for i in selected:
+        start[i] = 1.0
+    return start
+
+
+def _optimize(m, x, n):
+    m.optimize()
+    if m.Status != GRB.OPTIMAL:
+        raise RuntimeError(f"Parametric model not solved to optimality (status {m.Status}).")
+    return m.ObjVal, [x[i].X for i in range(1, n + 1)]
+
+
+# Solve the model for all p in p_values on one instance with k scenarios. Returns {p: (obj_val, x_val)}.
+def solve_p_curve(costs, n, k, p_values, criterion="minmax", integral=True, backend="gurobi"):
+    check_backend(backend)
+    p_values = sorted(p_values)
+    if backend == "highs":
+        return {p: solve_epigraph_highs(costs, n, p, k, criterion, integral=integral) for p in p_values}
+
+    m = None
+    try:
+        C = as_cost_array(costs, n, k)
+        m, x, _, card = _build_model(costs, n, p_values[0], k, criterion, integral)
+        curve = {}
+        x_val = None
+        for p in p_values:
+            card.RHS = p
+            if integral and x_val is not None:
+                start = _repair_selection(x_val, C, p, criterion)
+                for i in range(1, n + 1):
+                    x[i].Start = start[i - 1]
+            curve[p] = _optimize(m, x, n)
+            x_val = curve[p][1]
+        return curve
+
+    # Error handling
+    except gp.GurobiError as e:
+        raise RuntimeError(
+            f"Gurobi failed while solving the model (error code {e.errno}): {e}") from e
+    finally:
+        if m is not None:
+            m.dispose()  # Also after a failed solve (the thread's environment is reused)
+
+
+# Solve the model for all k in k_values on one instance (costs must contain max(k_values) scenarios); scenario rows are
+# appended one block at a time. Returns {k: (obj_val, x_val)}.
+def solve_k_curve(costs, n, p, k_values, criterion="minmax", integral=True, backend="gurobi"):
+    check_backend(backend)
+    k_values = sorted(k_values)
+    if backend == "highs":
+        return {k: solve_epigraph_highs(costs, n, p, k, criterion, integral=integral) for k in k_values}
+
+    m = None
+    try:
+        m, x, z, _ = _build_model(costs, n, p, k_values[0], criterion, integral)
+        curve = {}
+        k_prev = k_values[0]
+        for k in k_values:
+            _add_scenario_rows(m, x, z, costs, n, range(k_prev + 1, k + 1), criterion)
+            if integral and curve:
+                for i in range(1, n + 1):
+                    x[i].Start = curve[k_prev][1][i - 1]  # Previous selection stays feasible
+            curve[k] = _optimize(m, x, n)
+            k_prev = k
+        return curve
+
+    # Error handling
+    except gp.GurobiError as e:
+        raise RuntimeError(
+            f"Gurobi failed while solving the model (error code {e.errno}): {e}") from e
+    finally:
+        if m is not None:
+            m.dispose()  # Also after a failed solve (the thread's environment is reused)
@@ -62,6 +62,16 @@ def safe_ci95(values):
     return 1.98 * float(np.std(vals, ddof=1)) / math.sqrt(sample_size)
 
 
+# Number of runs per value for the subtitles: num_runs, or the range of runs_used (ADAPTIVE_RUNS in main.py)
+def runs_label(all_results, num_runs):
+    runs_used = {res["runs_used"] for res in all_results if "runs_used" in res}
+    if not runs_used:
+        return str(num_runs)
+    if len(runs_used) == 1:
+        return str(runs_used.pop())
+    return f"{min(runs_used)}--{max(runs_used)}"
+
+
 def plot_approx_ratio_only(all_results, num_runs, var_param, fixed_n=None, fixed_k=None, c_range=None,
                            output_dir="results", criterion=None):
     if criterion is None:
@@ -81,10 +91,14 @@ def plot_approx_ratio_only(all_results, num_runs, var_param, fixed_n=None, fixed
 
     # Organize data by varying parameter (n, k, p)
     param_to_ratios = {}
+    param_to_intervals = {}  # Ratio intervals (low, high) for exact solutions that are not proven optimal
     for entry in all_results:
         param = entry["varying_param"]
         ratio = entry["ratio_alg_opt"]
         param_to_ratios.setdefault(param, []).append(ratio)
+        interval = (entry.get("ratio_alg_opt_low", ratio), entry.get("ratio_alg_opt_high", ratio))
+        param_to_intervals.setdefault(param, []).append(interval)
+    has_unproven = any(not entry.get("exact_optimal", True) for entry in all_results)
 
     # Prepare data for plotting
     param_values = sorted(param_to_ratios.keys())
@@ -94,6 +108,11 @@ def plot_approx_ratio_only(all_results, num_runs, var_param, fixed_n=None, fixed
     # Plot
     plt.errorbar(param_values, avg_ratios, yerr=ci_ratios_95, fmt='-o', capsize=5,
                  label=rf"{method_label} (Ø $\pm$ 95\% CI)", color=color_line)
+    if has_unproven:
+        avg_low = [safe_mean([low for low, _ in param_to_intervals[param]]) for param in param_values]
+        avg_high = [safe_mean([high for _, high in param_to_intervals[param]]) for param in param_values]
+        plt.fill_between(param_values, avg_low, avg_high, color=color_line, alpha=0.2,
+                         label=r"Ø ratio interval (OPT not proven)")
     xlabel_map = {
         "n": r"Number of items $n$",
         "k": r"Number of scenarios $k$",
@@ -105,7 +124,7 @@ def plot_approx_ratio_only(all_results, num_runs, var_param, fixed_n=None, fixed
     # main_title = f"Primal Rounding Approximation Ratio {titles[criterion]} criterion"
     p_label = all_results[0]["p_label"] if all_results and "p_label" in all_results[0] else ""
     subtitle = (
-            r"(Average over " + str(num_runs) + r" runs $\mid$ "
+            r"(Average over " + runs_label(all_results, num_runs) + r" runs $\mid$ "
             + (r"$n$=" + str(fixed_n) + ", " if var_param != "n" and fixed_n is not None else "")
             + (r"$p$=" + p_label + ", " if var_param != "p" and p_label else "")
             + (r"$k$=" + str(fixed_k) + ", " if var_param != "k" and fixed_k is not None else "")
@@ -177,7 +196,7 @@ def plot_approximation_ratios_primal(all_results, num_runs, var_param, fixed_n=N
     # main_title = f"Approximation Ratio vs. Approximation Guarantees for {titles[criterion]} criterion"
     p_label = all_results[0].get("p_label", "") if all_results else ""
     subtitle = (
-            r"(Average over " + str(num_runs) + r" runs $\mid$ "
+            r"(Average over " + runs_label(all_results, num_runs) + r" runs $\mid$ "
             + (r"$n$=" + str(fixed_n) + ", " if var_param != "n" and fixed_n is not None else "")
             + (r"$p$=" + p_label + ", " if var_param != "p" and p_label else "")
             + (r"$k$=" + str(fixed_k) + ", " if var_param != "k" and fixed_k is not None else "")
@@ -252,7 +271,7 @@ def plot_approximation_ratios_primaldual(all_results, num_runs, var_param, fixed
     # main_title = f"Approximation Ratio vs. Approximation Guarantees for {titles[criterion]} criterion"
     p_label = all_results[0].get("p_label", "") if all_results else ""
     subtitle = (
-            r"(Average over " + str(num_runs) + r" runs $\mid$ "
+            r"(Average over " + runs_label(all_results, num_runs) + r" runs $\mid$ "
             + (r"$n$=" + str(fixed_n) + ", " if var_param != "n" and fixed_n is not None else "")
             + (r"$p$=" + p_label + ", " if var_param != "p" and p_label else "")
             + (r"$k$=" + str(fixed_k) + ", " if var_param != "k" and fixed_k is not None else "")
@@ -312,7 +331,7 @@ def plot_fractional_variable_count(all_results, num_runs, var_param, fixed_n=Non
             + (r"$p$=" + p_label + ", " if var_param != "p" else "")
             + (r"$k$=" + str(fixed_k) if var_param != "k" and fixed_k is not None else "")
             + (", cost range: [1, " + str(c_range) + "]" if c_range is not None else "")
-            + f", {num_runs} runs per ${var_param}$)"
+            + f", {runs_label(all_results, num_runs)} runs per ${var_param}$)"
     )
     # plt.title(f"{main_title}\n{subtitle}")
     plt.title(subtitle)
@@ -376,7 +395,7 @@ def plot_ratio_comp(results_primal, results_primaldual, num_runs, var_param, fix
     # main_title = f"Approximation Ratio Primal vs. Primal–Dual Rounding under the {titles[criterion]} criterion"
     p_label = results_primal[0].get("p_label", "") if results_primal else ""
     subtitle = (
-            r"(Average over " + str(num_runs) + r" runs $\mid$ "
+            r"(Average over " + runs_label(results_primal + results_primaldual, num_runs) + r" runs $\mid$ "
             + (r"$n$=" + str(fixed_n) + ", " if var_param != "n" and fixed_n is not None else "")
             + (r"$p$=" + p_label + ", " if var_param != "p" and p_label != "" else "")
             + (r"$k$=" + str(fixed_k) + ", " if var_param != "k" and fixed_k is not None else "")
@@ -0,0 +1,84 @@
+# prefetch.py
+
+# Background prefetching of instances: a loader thread reads and converts upcoming instances into a bounded queue
+# while the main thread solves the current one.
+
+# Description: Prefetcher(keys, load, depth) calls load(key) for the (unique) keys in the given order on a daemon thread
+# and keeps at most depth loaded instances in the queue (bounded memory). get(key) returns the instance of key; keys
+# that are skipped by the consumer (e.g. runs not needed after an early stop) are discarded, keys that are not ahead in
+# the order are loaded synchronously. Errors of load are raised by get for the key that caused them. The time get spends
+# waiting for the loader is counted in wait_time, so wait_time close to 0 means the loading is fully overlapped.
+# missing_files checks a list of paths upfront, so a sweep fails before it starts instead of in the middle.
+
+import os
+import queue
+import threading
+import time
+
+PREFETCH_DEPTH = 8  # Default number of loaded instances kept ahead of the consumer
+
+
+# Paths (in order, without duplicates) that do not exist
+def missing_files(paths):
+    return [path for path in dict.fromkeys(paths) if not os.path.exists(path)]
+
+
+class Prefetcher:
+    def __init__(self, keys, load, depth=PREFETCH_DEPTH):
+        self.keys = list(keys)
+        self.load = load
+        self.position = {key: index for index, key in enumerate(self.keys)}
+        if len(self.position) != len(self.keys):
+            raise ValueError("Prefetch keys must be unique.")
+        self.next_index = 0  # Position of the next key the consumer is expected to request
+        self.queue = queue.Queue(maxsize=max(1, depth))
+        self.stop = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.wait_time = 0.0
+        self.thread = threading.Thread(target=self._worker, name="prefetch", daemon=True)
+        self.thread.start()
+
+    def _worker(self):
+        for index, key in enumerate(self.keys):
+            try:
+                item = (index, key, self.load(key), None)
+            except Exception as error:  # Raised in the consumer thread by get
+                item = (index, key, None, error)
+            while not self.stop.is_set():
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if self.stop.is_set():
+                return
+
+    def get(self, key):
+        target = self.position.get(key)
+        if target is None or target < self.next_index:
+            self.misses += 1
+            return self.load(key)
+        while True:
+            start = time.perf_counter()
+            index, item_key, value, error = self.queue.get()
+            self.wait_time += time.perf_counter() - start
+            self.next_index = index + 1
+            if index == target:
+                break
+        self.hits += 1
+        if error is not None:
+            raise error
+        return value
+
+    def close(self):
+        self.stop.set()
+        while True:  # Unblock a worker waiting on a full queue
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.thread.join()
+
+    def summary(self):
+        return {"prefetched": self.hits, "loaded_synchronously": self.misses, "wait_time": self.wait_time}
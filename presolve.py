@@ -0,0 +1,74 @@
+# presolve.py
+
+# Presolve for the Robust Selection Problem: dominance reductions before any model is built.
+
+# Description: Two reductions are applied to the k x n cost matrix. Both keep the optimal objective value.
+# 1. Scenario dominance: for min-max, a scenario whose costs are component-wise <= those of another scenario can never
+#    be the unique worst case and is dropped (for max-min: component-wise >=). It is also redundant in the LP (x >= 0).
+# 2. Item dominance: item i dominates item j if it is at least as good in every scenario (cost <= for min-max,
+#    profit >= for max-min). Ties between identical items are broken by index. Some optimal selection contains all
+#    dominators of each selected item (swapping in a dominator never makes a scenario worse). So an item with at least
+#    p dominators can be fixed to 0 and removed. Of a group of identical items, at most p copies remain.
+# Items that could be fixed to 1 (fewer than p items not dominated by them) and identical items are only counted.
+# Removing them would need constant offsets or integer multiplicities in every formulation. postsolve_x maps a solution
+# of the reduced instance back to all n items.
+
+import numpy as np
+
+PRESOLVE_BLOCK = 1 << 22  # Max. number of pairwise comparisons evaluated at once
+
+
+# For every column of A (m x r), the number of columns that dominate it and the number of columns it dominates
+# (column i dominates column j if better_or_equal holds in every row; ties broken by index)
+def _dominance_counts(A, better_or_equal):
+    m, r = A.shape
+    dominators = np.zeros(r, dtype=np.int64)
+    dominated = np.zeros(r, dtype=np.int64)
+    block = max(1, PRESOLVE_BLOCK // max(1, m * r))
+    for start in range(0, r, block):
+        cols = A[:, start:start + block]  # Candidate dominators
+        weak = np.all(better_or_equal(cols[:, :, None], A[:, None, :]), axis=0)  # weak[a, j]: column start+a vs j
+        equal = np.all(cols[:, :, None] == A[:, None, :], axis=0)
+        index = np.arange(start, start + cols.shape[1])[:, None]
+        strict = weak & (~equal | (index < np.arange(r)[None, :]))
+        dominators += strict.sum(axis=0)
+        dominated[start:start + cols.shape[1]] = strict.sum(axis=1)
+    return dominators, dominated
+
+
+def presolve_instance(C, p, criterion="minmax"):
+    C = np.asarray(C)
+    k, n = C.shape
+    better_or_equal = np.less_equal if criterion == "minmax" else np.greater_equal
+
+    # Scenario dominance (rows): dominated means "never the worst case", i.e. the other scenario is worse or equal
+    scenario_dominators, _ = _dominance_counts(C.T, lambda a, b: better_or_equal(b, a))
+    scenarios = np.flatnonzero(scenario_dominators == 0)
+
+    # Item dominance (columns) on the remaining scenarios
+    C_red = C[scenarios]
+    item_dominators, item_dominated = _dominance_counts(C_red, better_or_equal)
+    items = np.flatnonzero(item_dominators < p)
+
+    # Counted only: items that could be fixed to 1 and identical items
+    fixable_one = int(np.sum(n - 1 - item_dominated[items] < p))
+    duplicates = n - np.unique(C_red, axis=1).shape[1]
+
+    return {
+        "items": items,
+        "scenarios": scenarios,
+        "n": n,
+        "k": k,
+        "item_ratio": items.size / n,
+        "scenario_ratio": scenarios.size / k,
+        "fixable_one": fixable_one,
+        "duplicate_items": int(duplicates)
+    }
+
+
+# Map x-values of the reduced instance back to all n items (removed items are 0)
+def postsolve_x(reduction, x_red):
+    x_full = [0] * reduction["n"]
+    for i, val in zip(reduction["items"], x_red):
+        x_full[int(i)] = val
+    return x_full
@@ -8,93 +8,110 @@
 # accordingly, maintaining dual feasibility. It achieves an approximation guarantee of ≤ 1/β_min (k for uniform weights)
 
 import numpy as np
-import gurobipy as gp
-from gurobipy import GRB
-
-
-def solve_primal_dual_minmax(costs, n, p, k, feas_tol=1e-12, select_tol=1e-9, debug=False):
+from backend import gp, GRB, check_backend, solve_epigraph_highs, gurobi_model
+from utils import as_cost_array, as_cost_matrix, weighted_costs, CostArray, scenario_terms
+from kernels import primal_dual_select, selection_costs
+from lp_bound import solve_lp_bound_mwu
+from batch_lp import solve_lp_batch
+from memory_profile import mark_stage
+from scenario_sketch import sketch_scenarios, sketch_info
+
+
+# sketch: optional (S, weights) from scenario_sketch.sketch_scenarios; the weighted costs are then S^T weights (the
+#         dual solution belongs to the sketch, its objective is still a lower bound on OPT), the objective value is
+#         evaluated on all k scenarios.
+def solve_primal_dual_minmax(costs, n, p, k, feas_tol=1e-12, select_tol=1e-9, debug=False, use_kernel=True,
+                             sketch=None):
+    mark_stage("rounding")
     # --- Build cost matrix C[s, i] ---
-    C = np.zeros((k, n), dtype=np.float64)
-    for (s, i), val in costs.items():
-        C[s - 1, i - 1] = float(val)
+    C = as_cost_matrix(costs, n, k)  # Compact dtype is kept for CostArray, CSR for SparseCostArray
 
     # --- Init primal/dual ---
     x = np.zeros(n, dtype=int)
-    S = set()
-    b = np.ones(k, dtype=np.float64) / k  # uniform weights
-    a = 0.0
-    w = C.T @ b  # weighted costs
-    gamma = np.zeros(n, dtype=np.float64)
-
-    # --- Main loop: select p items ---
-    while len(S) < p:
-        # Slacks BEFORE raising a (store for defining Q)
-        old_sigma = gamma - (a - w)
-
-        # Numerics: clamp tiny negatives to zero
-        neg = old_sigma < 0.0
-        if np.any(neg):
-            old_sigma[neg] = np.where(old_sigma[neg] > -feas_tol, 0.0, old_sigma[neg])
-
-        # Mask for not-yet-selected items
-        notS = np.ones(n, dtype=bool)
-        if S:
-            notS[list(S)] = False
-
-        # Δ = min slack over remaining items
-        if not np.any(notS):
-            break  # safety
-        delta = float(np.min(old_sigma[notS]))
-        if -feas_tol < delta < 0.0:
-            delta = 0.0
-        if delta < -feas_tol:
-            raise RuntimeError("Dual slack significantly negative; infeasibility suspected.")
-
-        # Raise a (dual objective increases by (p - |S|)·Δ)
-        a += delta
-
-        # Keep selected constraints tight (increase gamma only for S; never decrease)
-        if S:
-            idx = np.fromiter(S, dtype=int)
-            gamma[idx] = np.maximum(gamma[idx], a - w[idx])
-
-        # Newly tight constraints: those with old slack == delta (within tolerance)
-        Q = [i for i in range(n) if notS[i] and abs(old_sigma[i] - delta) <= select_tol]
-        if not Q:
-            # numeric fallback: pick the argmin of old_sigma over remaining
-            d = int(np.argmin(np.where(notS, old_sigma, np.inf)))
-            Q = [d]
-
-        # --- Debug: check weighted costs of newly tight constraints ---
-        if debug:
-            vals = w[Q]  # weighted costs of the newly tight indices
-            spread = float(np.ptp(vals)) if len(vals) > 1 else 0.0
-            dev_from_alpha = float(np.max(np.abs(vals - a)))  # should be ~0 (γ_i=0 for i∉S)
-
-            # new slacks after the α-update
-            new_sigma = gamma - (a - w)
-            dev_slack = float(np.max(np.abs(new_sigma[Q])))
-
-            print(f"\nIter {len(S)} -> {len(S) + 1}")
-            print(f"  |Q|={len(Q)}, a={a:.6g}")
-            print(f"  w[Q] = {vals}")
-            print(f"  spread(w[Q]) = {spread:.3e}")
-            print(f"  max|w[Q] - a| = {dev_from_alpha:.3e}")
-            print(f"  max|new_sigma[Q]| = {dev_slack:.3e}")
-
-            if spread <= max(select_tol, 10 * feas_tol) and dev_from_alpha <= 10 * select_tol:
-                print("  OK: all newly tight constraints have (numerically) equal w_i ≈ a.")
-            else:
-                print("  WARN: deviations detected")
-
-        # Choose from Q the item with the smallest weighted value w_i (tie-break by index)
-        chosen = min(Q, key=lambda j: (w[j], j))
-        x[chosen] = 1
-        S.add(chosen)
+    if sketch is None:
+        b = np.ones(k, dtype=np.float64) / k  # uniform weights
+        w = weighted_costs(C, b)  # weighted costs C^T b
+    else:
+        S, b = sketch  # weights of the sketch scenarios
+        w = weighted_costs(S, b)
+
+    # --- Selection: kernel (sorted weighted costs, kernels.py) or the step-by-step loop (debug output) ---
+    if use_kernel and not debug:
+        selected, a, gamma = primal_dual_select(w, p, feas_tol)
+        x[selected] = 1
+    else:
+        S = set()
+        a = 0.0
+        gamma = np.zeros(n, dtype=np.float64)
+
+        # --- Main loop: select p items ---
+        while len(S) < p:
+            # Slacks BEFORE raising a (store for defining Q)
+            old_sigma = gamma - (a - w)
+
+            # Numerics: clamp tiny negatives to zero
+            neg = old_sigma < 0.0
+            if np.any(neg):
+                old_sigma[neg] = np.where(old_sigma[neg] > -feas_tol, 0.0, old_sigma[neg])
+
+            # Mask for not-yet-selected items
+            notS = np.ones(n, dtype=bool)
+            if S:
+                notS[list(S)] = False
+
+            # Δ = min slack over remaining items
+            if not np.any(notS):
+                break  # safety
+            delta = float(np.min(old_sigma[notS]))
+            if -feas_tol < delta < 0.0:
+                delta = 0.0
+            if delta < -feas_tol:
+                raise RuntimeError("Dual slack significantly negative; infeasibility suspected.")
+
+            # Raise a (dual objective increases by (p - |S|)·Δ)
+            a += delta
+
+            # Keep selected constraints tight (increase gamma only for S; never decrease)
+            if S:
+                idx = np.fromiter(S, dtype=int)
+                gamma[idx] = np.maximum(gamma[idx], a - w[idx])
+
+            # Newly tight constraints: those with old slack == delta (within tolerance)
+            Q = [i for i in range(n) if notS[i] and abs(old_sigma[i] - delta) <= select_tol]
+            if not Q:
+                # numeric fallback: pick the argmin of old_sigma over remaining
+                d = int(np.argmin(np.where(notS, old_sigma, np.inf)))
+                Q = [d]
+
+            # --- Debug: check weighted costs of newly tight constraints ---
+            if debug:
+                vals = w[Q]  # weighted costs of the newly tight indices
+                spread = float(np.ptp(vals)) if len(vals) > 1 else 0.0
+                dev_from_alpha = float(np.max(np.abs(vals - a)))  # should be ~0 (γ_i=0 for i∉S)
+
+                # new slacks after the α-update
+                new_sigma = gamma - (a - w)
+                dev_slack = float(np.max(np.abs(new_sigma[Q])))
+
+                print(f"\nIter {len(S)} -> {len(S) + 1}")
+                print(f"  |Q|={len(Q)}, a={a:.6g}")
+                print(f"  w[Q] = {vals}")
+                print(f"  spread(w[Q]) = {spread:.3e}")
+                print(f"  max|w[Q] - a| = {dev_from_alpha:.3e}")
+                print(f"  max|new_sigma[Q]| = {dev_slack:.3e}")
+
+                if spread <= max(select_tol, 10 * feas_tol) and dev_from_alpha <= 10 * select_tol:
+                    print("  OK: all newly tight constraints have (numerically) equal w_i ≈ a.")
+                else:
+                    print("  WARN: deviations detected")
+
+            # Choose from Q the item with the smallest weighted value w_i (tie-break by index)
+            chosen = min(Q, key=lambda j: (w[j], j))
+            x[chosen] = 1
+            S.add(chosen)
 
     # --- Evaluate primal and dual values ---
-    scenario_costs = C @ x
-    obj_val = float(np.max(scenario_costs))
+    obj_val = float(np.max(selection_costs(C, np.flatnonzero(x))))
 
     # Dual objective: p*a - sum_i gamma_i  (gamma kept minimal & feasible)
     obj_dual = float(p * a - np.sum(gamma))
@@ -102,11 +119,18 @@ def solve_primal_dual_minmax(costs, n, p, k, feas_tol=1e-12, select_tol=1e-9, de
     return obj_val, x.tolist(), obj_dual
 
 
-def solve_primal_minmax(costs, n, p, k):
+def solve_primal_minmax(costs, n, p, k, backend="gurobi", threads=None):
+    check_backend(backend)
+    if backend == "highs":
+        obj_val_primal_lp, _ = solve_epigraph_highs(costs, n, p, k, "minmax")
+        return obj_val_primal_lp
+
+    m = None
     try:
 
         # Create optimization model
-        m = gp.Model("robust_selection_lp")
+        mark_stage("model_build")
+        m = gurobi_model("robust_selection_lp", threads)
 
         # Create variables
         x = m.addVars(range(1, n + 1), vtype=GRB.CONTINUOUS, lb=0, ub=1, name="x")  # Continuous variable for selection
@@ -118,10 +142,11 @@ def solve_primal_minmax(costs, n, p, k):
         # Add constraints
         m.addConstr(gp.quicksum(x[i] for i in range(1, n + 1)) == p, name="select_p_items")  # Select exactly p
         m.addConstrs(
-            (gp.quicksum(costs[s, i] * x[i] for i in range(1, n + 1)) <= z for s in range(1, k + 1)),
+            (gp.quicksum(c * x[i] for i, c in scenario_terms(costs, s, n)) <= z for s in range(1, k + 1)),
             name="worst_case_cost")
 
         # Optimize model
+        mark_stage("optimize")
         m.optimize()
         obj_val_primal_lp = m.ObjVal
 
@@ -135,9 +160,44 @@ def solve_primal_minmax(costs, n, p, k):
         raise RuntimeError(
             "Failed to access solution attributes. "
             "This usually means the model was not solved to optimality.") from e
-
-
-def solve_primal_dual_minmax_with_lp(costs, n, p, k, debug=False):
+    finally:
+        if m is not None:
+            m.dispose()  # Also after a failed solve (the thread's environment is reused)
+
+
+# lp_bound="lp" solves the LP (OPT_LP = OPT_dual, gap 0). lp_bound="mwu" uses the certified lower bound of the
+# LP-free bound engine instead (relative gap to OPT_LP at most lp_bound_tol).
+# sketch_size: run the algorithm and the LP on a sketch of sketch_size scenarios (scenario_sketch.py); OPT_LP is then
+#              the LP value of the sketch (a lower bound on the full OPT_LP). info (dict) receives the sketch error.
+def solve_primal_dual_minmax_with_lp(costs, n, p, k, debug=False, backend="gurobi", lp_bound="lp", lp_bound_tol=1e-3,
+                                     threads=None, sketch_size=None, sketch_method="kmeans", info=None):
+    sketch, lp_costs, lp_k = None, costs, k
+    if sketch_size is not None and sketch_size < k:
+        sketch = sketch_scenarios(as_cost_array(costs, n, k), sketch_size, sketch_method)
+        lp_costs, lp_k = CostArray(sketch[0]), sketch[0].shape[0]
+    obj_val, x_vec, obj_dual = solve_primal_dual_minmax(costs, n, p, k, debug=debug, sketch=sketch)
+    if lp_bound == "lp":
+        obj_val_primal_lp = solve_primal_minmax(lp_costs, n, p, lp_k, backend=backend, threads=threads)
+        lp_bound_gap = 0.0  # OPT_LP = OPT_dual (of the sketch if sketched)
+    elif lp_bound == "mwu":
+        obj_val_primal_lp, _, lp_bound_gap, _ = solve_lp_bound_mwu(lp_costs, n, p, lp_k, tol=lp_bound_tol, debug=debug)
+    else:
+        raise ValueError(f"Unknown lp_bound: {lp_bound}")
+    if sketch is not None and info is not None:
+        info.update(sketch_info(as_cost_array(costs, n, k), sketch[0], sketch_method, np.flatnonzero(x_vec)))
+    return obj_val, x_vec, obj_dual, obj_val_primal_lp, lp_bound_gap
+
+
+# Primal-dual rounding for many instances (list of (costs, n, p, k)) with the LP objective values of all instances from
+# one block-diagonal LP (batch_lp.py). Returns the results of solve_primal_dual_minmax_with_lp (lp_bound="lp").
+def solve_primal_dual_minmax_with_lp_batch(instances, debug=False, backend="gurobi", threads=None):
+    lp_results = solve_lp_batch(instances, "minmax", backend, threads)
+    return [primal_dual_minmax_from_lp(costs, n, p, k, obj_val_primal_lp, x_val_primal_frac, debug)
+            for (costs, n, p, k), (obj_val_primal_lp, x_val_primal_frac) in zip(instances, lp_results)]
+
+
+# Primal-dual rounding with OPT_LP from an LP solved elsewhere (batched or parametric LP). The x-values are not used;
+# the signature matches round_primal_minmax. Returns the results of solve_primal_dual_minmax_with_lp (lp_bound="lp").
+def primal_dual_minmax_from_lp(costs, n, p, k, obj_val_primal_lp, x_val_primal_frac=None, debug=False):
     obj_val, x_vec, obj_dual = solve_primal_dual_minmax(costs, n, p, k, debug=debug)
-    obj_val_primal_lp = solve_primal_minmax(costs, n, p, k)  # OPT_LP = OPT_dual
-    return obj_val, x_vec, obj_dual, obj_val_primal_lp
+    return obj_val, x_vec, obj_dual, obj_val_primal_lp, 0.0
@@ -0,0 +1,131 @@
+# primal_repair_minmax.py
+
+# Primal rounding with an exact repair of the fractional variables for the min-max Robust Selection Problem.
+
+# Description: A basic optimal solution of the min-max LP relaxation has at most k fractional x-values (see
+# plot_fractional_variable_count). Instead of selecting the p largest x-values (primal_rounding_minmax.py), the items
+# with x = 1 are fixed to 1, the items with x = 0 are fixed to 0, and the residual problem "select the remaining
+# r = p - #(x = 1) items from the f fractional items" is solved exactly: all binom(f, r) subsets are enumerated in
+# chunks, and the scenario sums of every subset are computed with one matrix product per chunk. The top-p rounding is
+# one of these subsets, so the repaired selection is never worse. If there are more than MAX_SUBSETS subsets (f is
+# large, e.g. for an interior-point LP solution without crossover or for large k), the top-r fractional items are
+# improved by swapping one selected and one unselected fractional item while the worst case gets better, and the
+# residual is not solved exactly (info["repair_exact"] = False).
+
+from itertools import combinations, islice
+from math import comb
+import numpy as np
+from backend import check_backend, solve_epigraph_highs
+from batch_lp import solve_lp_batch
+from primal_rounding_minmax import solve_primal_lp_minmax_gurobi
+from utils import as_cost_matrix, is_sparse, scenario_costs
+from kernels import selection_costs
+from memory_profile import mark_stage
+
+INTEGRAL_TOL = 1e-6  # x-values within this distance of 0 or 1 count as integral
+MAX_SUBSETS = 1_000_000  # Max. number of enumerated subsets of the fractional items
+CHUNK_SIZE = 4096  # Subsets per matrix product
+SWAP_ROUNDS = 100  # Max. number of improving swaps if the residual is too large to enumerate
+
+
+# info (dict) receives the number of fractional items, of enumerated subsets, whether the residual was solved exactly
+# and the worst case of the top-p rounding for comparison.
+def solve_primal_repair_minmax(costs, n, p, k, debug=False, backend="gurobi", threads=None, info=None):
+    check_backend(backend)
+    if backend == "highs":
+        obj_val_primal_lp, x_val_primal_frac = solve_epigraph_highs(costs, n, p, k, "minmax")
+    else:
+        obj_val_primal_lp, x_val_primal_frac = solve_primal_lp_minmax_gurobi(costs, n, p, k, threads)
+    return repair_primal_minmax(costs, n, p, k, obj_val_primal_lp, x_val_primal_frac, debug, info)
+
+
+# Primal repair for many instances (list of (costs, n, p, k)) with one block-diagonal LP (batch_lp.py). infos: one
+# dict per instance for the repair metrics (as info of solve_primal_repair_minmax), or None.
+def solve_primal_repair_minmax_batch(instances, debug=False, backend="gurobi", threads=None, infos=None):
+    lp_results = solve_lp_batch(instances, "minmax", backend, threads)
+    infos = infos if infos is not None else [None] * len(instances)
+    return [repair_primal_minmax(costs, n, p, k, obj_val_primal_lp, x_val_primal_frac, debug, info)
+            for (costs, n, p, k), (obj_val_primal_lp, x_val_primal_frac), info in zip(instances, lp_results, infos)]
+
+
+# Best r-subset of the f fractional items (costs C_F, k x f) for the scenario sums base of the fixed items, by
+# enumeration. Returns the positions of the chosen items in C_F and the number of enumerated subsets.
+def _enumerate_residual(C_F, base, r):
+    f = C_F.shape[1]
+    best_value, best_subset = np.inf, None
+    subsets = combinations(range(f), r)
+    count = 0
+    while True:
+        chunk = np.array(list(islice(subsets, CHUNK_SIZE)), dtype=np.intp).reshape(-1, r)
+        if chunk.shape[0] == 0:
+            break
+        count += chunk.shape[0]
+        indicator = np.zeros((f, chunk.shape[0]))
+        indicator[chunk, np.arange(chunk.shape[0])[:, None]] = 1.0
+        worst = (base[:, None] + C_F @ indicator).max(axis=0)
+        j = int(np.argmin(worst))
+        if worst[j] < best_value:
+            best_value, best_subset = worst[j], chunk[j]
+    return best_subset, count
+
+
+# Improve the r fractional items with the largest x-values (x_F) by swaps within the fractional items
+def _swap_residual(C_F, base, r, x_F):
+    order = np.argsort(-x_F, kind="stable")
+    chosen, rest = order[:r].copy(), order[r:].copy()
+    for _ in range(SWAP_ROUNDS):
+        if chosen.size == 0 or rest.size == 0:
+            break
+        sums = base + C_F[:, chosen].sum(axis=1)
+        swapped = (sums[:, None, None] - C_F[:, chosen, None] + C_F[:, None, rest]).max(axis=0)
+        a, b = np.unravel_index(np.argmin(swapped), swapped.shape)
+        if swapped[a, b] >= sums.max() - INTEGRAL_TOL * max(1.0, abs(sums.max())):
+            break
+        chosen[a], rest[b] = rest[b], chosen[a]
+    return chosen
+
+
+# Repair of the LP solution: fix the integral x-values and solve the residual problem over the fractional items
+def repair_primal_minmax(costs, n, p, k, obj_val_primal_lp, x_val_primal_frac, debug=False, info=None):
+    mark_stage("rounding")
+    C = as_cost_matrix(costs, n, k)  # CSR for SparseCostArray; only the fractional columns are made dense
+    x_frac = np.asarray(x_val_primal_frac, dtype=np.float64)
+
+    # Top-p rounding (reference and fallback for degenerate LP solutions)
+    top_p = np.argsort(-x_frac, kind="stable")[:p]
+    ones = np.flatnonzero(x_frac >= 1 - INTEGRAL_TOL)
+    F = np.flatnonzero((x_frac > INTEGRAL_TOL) & (x_frac < 1 - INTEGRAL_TOL))
+    r = p - ones.size
+    exact, subsets = True, 0
+    if r < 0 or r > F.size:
+        selected = top_p  # x does not sum to p within the tolerance
+        exact = False
+    elif r == 0 or r == F.size:
+        selected = np.r_[ones, F[:r]]
+    else:
+        base = scenario_costs(C, ones).astype(np.float64)
+        C_F = (C[:, F].toarray() if is_sparse(C) else C[:, F]).astype(np.float64)
+        if comb(F.size, r) <= MAX_SUBSETS:
+            residual, subsets = _enumerate_residual(C_F, base, r)
+        else:
+            residual = _swap_residual(C_F, base, r, x_frac[F])
+            exact = False
+        selected = np.r_[ones, F[residual]]
+
+    selected_indices_primal = sorted(int(i) for i in selected)
+    x_vector_primal_rounded = [0] * n
+    for i in selected_indices_primal:
+        x_vector_primal_rounded[i] = 1
+    tau = min(x_val_primal_frac[i] for i in selected_indices_primal) if selected_indices_primal else 1.0
+    obj_val_primal = selection_costs(C, selected_indices_primal).max().item()
+    obj_val_top_p = selection_costs(C, top_p).max().item()
+
+    if debug:
+        print(f"Fractional items: {F.tolist()}, fixed to 1: {ones.tolist()}, residual size: {r}")
+        print(f"Enumerated subsets: {subsets}, exact residual: {exact}")
+        print(f"Worst case (repair): {obj_val_primal}, worst case (top-p rounding): {obj_val_top_p}")
+    if info is not None:
+        info.update({"repair_fractional": int(F.size), "repair_subsets": subsets, "repair_exact": exact,
+                     "obj_top_p_rounding": obj_val_top_p})
+
+    return obj_val_primal, x_val_primal_frac, x_vector_primal_rounded, obj_val_primal_lp, tau
@@ -8,15 +8,69 @@
 # epigraph-reformulation. The decision variable x is relaxed to a continuous variable and the solution is rounded
 # to a feasible solution.
 
-import gurobipy as gp
-from gurobipy import GRB
-from utils import build_chunks_with_fill, minimum_profit
+import numpy as np
+from backend import gp, GRB, check_backend, solve_epigraph_highs, gurobi_model
+from batch_lp import solve_lp_batch
+from utils import build_chunks_with_fill, as_cost_matrix, scenario_terms
+from kernels import block_min_profits
+from memory_profile import mark_stage
 
 
-def solve_primal_rounding_maxmin(costs, n, p, k, debug=False):
+def solve_primal_rounding_maxmin(costs, n, p, k, debug=False, backend="gurobi", threads=None):
+    check_backend(backend)
+    if backend == "highs":
+        obj_val_primal_lp, x_val_primal_frac = solve_epigraph_highs(costs, n, p, k, "maxmin")
+    else:
+        obj_val_primal_lp, x_val_primal_frac = solve_primal_lp_maxmin_gurobi(costs, n, p, k, threads)
+    return round_primal_maxmin(costs, n, p, k, obj_val_primal_lp, x_val_primal_frac, debug)
+
+
+# Primal rounding for many instances (list of (costs, n, p, k)) with one block-diagonal LP (batch_lp.py).
+# Returns the results of solve_primal_rounding_maxmin in the order of the instances.
+def solve_primal_rounding_maxmin_batch(instances, debug=False, backend="gurobi", threads=None):
+    lp_results = solve_lp_batch(instances, "maxmin", backend, threads)
+    return [round_primal_maxmin(costs, n, p, k, obj_val_primal_lp, x_val_primal_frac, debug)
+            for (costs, n, p, k), (obj_val_primal_lp, x_val_primal_frac) in zip(instances, lp_results)]
+
+
+# Rounding of the LP solution: best block of p items in the order of decreasing fractional x-values
+def round_primal_maxmin(costs, n, p, k, obj_val_primal_lp, x_val_primal_frac, debug=False):
+    mark_stage("rounding")
+
+    # Approximation procedure
+    C = as_cost_matrix(costs, n, k)
+    # Relaxed x-values
+    indexed_x_vals = list(enumerate(x_val_primal_frac, start=1))
+    filtered_vals = [pair for pair in indexed_x_vals if pair[1] > 0.0]  # Filter out zero values
+    sorted_x_vals = sorted(filtered_vals, key=lambda pair: pair[1], reverse=True)
+    x_vector_primal_rounded = [0] * n  # Initialize binary vector
+    # Create blocks of items (with length p)
+    chunks = build_chunks_with_fill(sorted_x_vals, p)
+    # Calculate minimum profit for each block and choose the best block (maximizing the minimum profit)
+    profits = block_min_profits(C, [[i - 1 for i, _ in block] for block in chunks])  # Block items are 1-based
+    best = int(np.argmax(profits))  # First best block (as max() with a key)
+    best_block = chunks[best]
+    selected_indices = [i for i, _ in best_block]  # Get indices of selected items
+    obj_val_primal = profits[best].item()
+    for i in selected_indices:
+        x_vector_primal_rounded[i - 1] = 1  # Set selected items to 1 in the binary vector
+
+    # Post-solution checks and debug prints
+    if debug:
+        print("Best block (rounded solution):", [i for i, _ in best_block])
+        print("Worst-case profit of selected block:", obj_val_primal)
+        print("Rounded primal solution vector:", x_vector_primal_rounded)
+
+    return obj_val_primal, x_vector_primal_rounded, obj_val_primal_lp, x_val_primal_frac
+
+
+# LP relaxation of the max-min model with Gurobi. Returns the LP objective value and the fractional x-values.
+def solve_primal_lp_maxmin_gurobi(costs, n, p, k, threads=None):
+    m = None
     try:
         # Create optimization model
-        m = gp.Model("primal_rounding_robust_selection_maxmin")
+        mark_stage("model_build")
+        m = gurobi_model("primal_rounding_robust_selection_maxmin", threads)
 
         # Create variables
         x = m.addVars(range(1, n + 1), vtype=GRB.CONTINUOUS, lb=0, ub=1, name="x")  # Continuous variable for selection
@@ -29,37 +83,17 @@ def solve_primal_rounding_maxmin(costs, n, p, k, debug=False):
         m.addConstr(gp.quicksum(x[i] for i in range(1, n + 1)) == p, name="select_p_items")  # Select exactly p
 
         m.addConstrs(
-            (gp.quicksum(costs[s, i] * x[i] for i in range(1, n + 1)) >= z for s in range(1, k + 1)),
+            (gp.quicksum(c * x[i] for i, c in scenario_terms(costs, s, n)) >= z for s in range(1, k + 1)),
             name="worst_case_profit"
         )
 
         # Optimize model
+        mark_stage("optimize")
         m.optimize()
         obj_val_primal_lp = m.ObjVal
+        x_val_primal_frac = [x[i].X for i in range(1, n + 1)]  # Relaxed x-values
 
-        # Approximation procedure
-        # Relaxed x-values
-        x_val_primal_frac = [x[i].X for i in range(1, n + 1)]
-        indexed_x_vals = list(enumerate(x_val_primal_frac, start=1))
-        filtered_vals = [pair for pair in indexed_x_vals if pair[1] > 0.0]  # Filter out zero values
-        sorted_x_vals = sorted(filtered_vals, key=lambda pair: pair[1], reverse=True)
-        x_vector_primal_rounded = [0] * n  # Initialize binary vector
-        # Create blocks of items (with length p)
-        chunks = build_chunks_with_fill(sorted_x_vals, p)
-        # Calculate minimum profit for each block and choose the best block (maximizing the minimum profit)
-        best_block = max(chunks, key=lambda block: minimum_profit(block, costs, k))
-        selected_indices = [i for i, _ in best_block]  # Get indices of selected items
-        obj_val_primal = minimum_profit(best_block, costs, k)
-        for i in selected_indices:
-            x_vector_primal_rounded[i - 1] = 1  # Set selected items to 1 in the binary vector
-
-        # Post-solution checks and debug prints
-        if debug:
-            print("Best block (rounded solution):", [i for i, _ in best_block])
-            print("Worst-case profit of selected block:", obj_val_primal)
-            print("Rounded primal solution vector:", x_vector_primal_rounded)
-
-        return obj_val_primal, x_vector_primal_rounded, obj_val_primal_lp, x_val_primal_frac
+        return obj_val_primal_lp, x_val_primal_frac
 
     # Error handling
     except gp.GurobiError as e:
@@ -69,3 +103,6 @@ def solve_primal_rounding_maxmin(costs, n, p, k, debug=False):
         raise RuntimeError(
             "Failed to access solution attributes. "
             "This usually means the model was not solved to optimality.") from e
+    finally:
+        if m is not None:
+            m.dispose()  # Also after a failed solve (the thread's environment is reused)
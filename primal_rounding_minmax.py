@@ -6,15 +6,93 @@
 # minimized. The problem is formulated as a Mixed Integer Linear Program using the epigraph-reformulation. The
 # decision variable x is relaxed to a continuous variable and the solution is rounded to a feasible solution.
 
-import gurobipy as gp
-from gurobipy import GRB
-
-
-def solve_primal_rounding_minmax(costs, n, p, k, debug=False):
+import numpy as np
+from backend import gp, GRB, check_backend, solve_epigraph_highs, gurobi_model
+from batch_lp import solve_lp_batch
+from utils import as_cost_array, as_cost_matrix, CostArray, scenario_terms
+from kernels import selection_costs
+from memory_profile import mark_stage
+from scenario_sketch import sketch_scenarios, sketch_info
+
+
+# sketch_size: solve the LP on a sketch of sketch_size weighted scenarios (scenario_sketch.py, method sketch_method)
+#              instead of all k; the rounded selection is evaluated on all k scenarios. The LP value stays a lower
+#              bound on OPT. info (dict) receives the sketch size, method, worst case on the sketch and relative error.
+def solve_primal_rounding_minmax(costs, n, p, k, debug=False, backend="gurobi", threads=None, sketch_size=None,
+                                 sketch_method="kmeans", info=None):
+    check_backend(backend)
+    lp_costs, lp_k, S = costs, k, None
+    if sketch_size is not None and sketch_size < k:
+        S, _ = sketch_scenarios(as_cost_array(costs, n, k), sketch_size, sketch_method)
+        lp_costs, lp_k = CostArray(S), S.shape[0]
+    if backend == "highs":
+        obj_val_primal_lp, x_val_primal_frac = solve_epigraph_highs(lp_costs, n, p, lp_k, "minmax")
+    else:
+        obj_val_primal_lp, x_val_primal_frac = solve_primal_lp_minmax_gurobi(lp_costs, n, p, lp_k, threads)
+    result = round_primal_minmax(costs, n, p, k, obj_val_primal_lp, x_val_primal_frac, debug)
+    if S is not None and info is not None:
+        info.update(sketch_info(as_cost_array(costs, n, k), S, sketch_method, np.flatnonzero(result[2])))
+    return result
+
+
+# Primal rounding for many instances (list of (costs, n, p, k)) with one block-diagonal LP (batch_lp.py).
+# Returns the results of solve_primal_rounding_minmax in the order of the instances.
+def solve_primal_rounding_minmax_batch(instances, debug=False, backend="gurobi", threads=None):
+    lp_results = solve_lp_batch(instances, "minmax", backend, threads)
+    return [round_primal_minmax(costs, n, p, k, obj_val_primal_lp, x_val_primal_frac, debug)
+            for (costs, n, p, k), (obj_val_primal_lp, x_val_primal_frac) in zip(instances, lp_results)]
+
+
+# Rounding of the LP solution: select the p items with the largest fractional x-values
+def round_primal_minmax(costs, n, p, k, obj_val_primal_lp, x_val_primal_frac, debug=False):
+    mark_stage("rounding")
+
+    # Relaxed x-values
+    selected_items_primal = sorted(
+        [(i, val) for i, val in enumerate(x_val_primal_frac)],
+        key=lambda item: item[1],
+        reverse=True
+    )[:p]  # Select top p items
+    selected_indices_primal = [i for i, _ in selected_items_primal]  # Get indices of selected
+    tau = min(x_val_primal_frac[i] for i in selected_indices_primal)
+    x_vector_primal_rounded = [0] * n  # Binary vector
+    for i in selected_indices_primal:
+        x_vector_primal_rounded[i] = 1
+
+    # Post-solution checks and debug prints
+    if debug:
+        print("\n---Relaxed x-values (fractional):---")
+        for i in range(n):
+            print(f"x[{i + 1}] = {x_val_primal_frac[i]:.4f}")
+        print("\n---Relaxed x-values (binary):---")
+        for i in range(n):
+            print(f"x[{i + 1}] = {x_vector_primal_rounded[i]}")
+
+    # Compute worst-case cost of rounded solution (results)
+    obj_val_primal = selection_costs(as_cost_matrix(costs, n, k), selected_indices_primal).max().item()
+
+    # Debugging worst case cost
+    if debug:
+        print("\n--- Scenario costs (rounded solution): ---")
+        scenario_cost_list = []
+        for s in range(1, k + 1):
+            cost_s = sum(costs[s, i + 1] for i in range(n) if x_vector_primal_rounded[i] == 1)
+            scenario_cost_list.append(cost_s)
+            print(f"Scenario {s}: total cost = {cost_s}")
+        print(f"\nMax scenario cost (should match obj_val_primal): {max(scenario_cost_list)}")
+        print(f"Returned objective value (obj_val_primal): {obj_val_primal}")
+
+    return obj_val_primal, x_val_primal_frac, x_vector_primal_rounded, obj_val_primal_lp, tau
+
+
+# LP relaxation of the min-max model with Gurobi. Returns the LP objective value and the fractional x-values.
+def solve_primal_lp_minmax_gurobi(costs, n, p, k, threads=None):
+    m = None
     try:
 
         # Create optimization model
-        m = gp.Model("primal_rounding_robust_selection_minmax")
+        mark_stage("model_build")
+        m = gurobi_model("primal_rounding_robust_selection_minmax", threads)
 
         # Create variables
         x = m.addVars(range(1, n + 1), vtype=GRB.CONTINUOUS, lb=0, ub=1, name="x")  # Continuous variable for selection
@@ -27,50 +105,16 @@ def solve_primal_rounding_minmax(costs, n, p, k, debug=False):
         m.addConstr(gp.quicksum(x[i] for i in range(1, n + 1)) == p, name="select_p_items")  # Select exactly p
 
         m.addConstrs(
-            (gp.quicksum(costs[s, i] * x[i] for i in range(1, n + 1)) <= z for s in range(1, k + 1)),
+            (gp.quicksum(c * x[i] for i, c in scenario_terms(costs, s, n)) <= z for s in range(1, k + 1)),
             name="worst_case_cost")
 
         # Optimize model
+        mark_stage("optimize")
         m.optimize()
         obj_val_primal_lp = m.ObjVal
+        x_val_primal_frac = [x[i].X for i in range(1, n + 1)]  # Relaxed x-values
 
-        # Relaxed x-values
-        x_val_primal_frac = [x[i].X for i in range(1, n + 1)]
-        selected_items_primal = sorted(
-            [(i, val) for i, val in enumerate(x_val_primal_frac)],
-            key=lambda item: item[1],
-            reverse=True
-        )[:p]  # Select top p items
-        selected_indices_primal = [i for i, _ in selected_items_primal]  # Get indices of selected
-        tau = min(x_val_primal_frac[i] for i in selected_indices_primal)
-        x_vector_primal_rounded = [1 if i in selected_indices_primal else 0 for i in range(n)]  # Binary vector
-
-        # Post-solution checks and debug prints
-        if debug:
-            print("\n---Relaxed x-values (fractional):---")
-            for i in range(n):
-                print(f"x[{i + 1}] = {x_val_primal_frac[i]:.4f}")
-            print("\n---Relaxed x-values (binary):---")
-            for i in range(n):
-                print(f"x[{i + 1}] = {x_vector_primal_rounded[i]}")
-
-        # Compute worst-case cost of rounded solution (results)
-        obj_val_primal = max(
-            sum(costs[s, i + 1] for i in range(n) if x_vector_primal_rounded[i] == 1)
-            for s in range(1, k + 1))  # Computes the maximum cost across all scenarios for the rounded solution
-
-        # Debugging worst case cost
-        if debug:
-            print("\n--- Scenario costs (rounded solution): ---")
-            scenario_costs = []
-            for s in range(1, k + 1):
-                cost_s = sum(costs[s, i + 1] for i in range(n) if x_vector_primal_rounded[i] == 1)
-                scenario_costs.append(cost_s)
-                print(f"Scenario {s}: total cost = {cost_s}")
-            print(f"\nMax scenario cost (should match obj_val_primal): {max(scenario_costs)}")
-            print(f"Returned objective value (obj_val_primal): {obj_val_primal}")
-
-        return obj_val_primal, x_val_primal_frac, x_vector_primal_rounded, obj_val_primal_lp, tau
+        return obj_val_primal_lp, x_val_primal_frac
 
     # Error handling
     except gp.GurobiError as e:
@@ -80,3 +124,6 @@ def solve_primal_rounding_minmax(costs, n, p, k, debug=False):
         raise RuntimeError(
             "Failed to access solution attributes. "
             "This usually means the model was not solved to optimality.") from e
+    finally:
+        if m is not None:
+            m.dispose()  # Also after a failed solve (the thread's environment is reused)
@@ -0,0 +1,201 @@
+# results_index.py
+
+# Index of all result directories for fast queries across experiments.
+
+# Description: main.py stores every experiment in results/{var_param}_{timestamp}/{algorithm}/all_results_*.pkl. This
+# module scans these pickles once and loads the per-run metadata (algorithm, criterion, n, p, k, run, ...) and all
+# scalar metrics (ratio_alg_opt, tau, obj_exact, ...) into a SQLite file. Later scans only load pickles that are new or
+# have changed (path and modification time). Queries then run on the index without unpickling anything.
+
+# Usage:
+#   python results_index.py update                                     # Scan results/ and update the index
+#   python results_index.py query ratio_alg_opt --algorithm primal_dual_minmax --group-by n --where k=5
+#   python results_index.py metrics                                    # List all indexed metrics
+
+import argparse
+import glob
+import math
+import numbers
+import os
+import pickle
+import sqlite3
+import numpy as np
+
+RESULTS_DIR = "results"
+INDEX_PATH = os.path.join(RESULTS_DIR, "index.sqlite")
+
+# Per-run fields stored as columns (filters and groups) with their declared types; all other scalar numbers are
+# stored as metrics
+RUN_COLUMN_TYPES = {
+    "sweep": "TEXT", "var_param": "TEXT", "algorithm": "TEXT", "criterion": "TEXT", "varying_param": "NUMERIC",
+    "p_label": "TEXT", "n": "INTEGER", "p": "INTEGER", "k": "INTEGER", "run": "INTEGER", "exact_method": "TEXT",
+    "lp_bound": "TEXT"
+}
+RUN_COLUMNS = tuple(RUN_COLUMN_TYPES)
+SCHEMA_VERSION = 2  # Stored as user_version; an index with another version is rebuilt on the next update
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS files (
+    file_id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(file_id) ON DELETE CASCADE,
+    {", ".join(f"{column} {column_type}" for column, column_type in RUN_COLUMN_TYPES.items())}
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS runs_file ON runs(file_id);
+CREATE INDEX IF NOT EXISTS runs_lookup ON runs(algorithm, var_param, n, p, k);
+CREATE INDEX IF NOT EXISTS metrics_lookup ON metrics(name, run_id);
+"""
+
+
+def connect(index_path=INDEX_PATH):
+    con = sqlite3.connect(index_path)
+    con.execute("PRAGMA foreign_keys = ON")
+    if con.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        # Index of an older version (e.g. untyped run columns): start empty, update_index reloads all result files
+        con.executescript("DROP TABLE IF EXISTS metrics; DROP TABLE IF EXISTS runs; DROP TABLE IF EXISTS files;")
+        con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    con.executescript(_SCHEMA)
+    return con
+
+
+# Value of a run column as int, float or str (numpy scalars would be stored as BLOBs and never match a filter)
+def _column_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return None if math.isnan(value) else float(value)
+    return str(value)
+
+
+# Scalar metrics of one result row (bool -> 0/1, NaN -> NULL); lists such as x-vectors and flat_costs are skipped
+def _row_metrics(row):
+    metrics = []
+    for name, value in row.items():
+        if name in RUN_COLUMNS or isinstance(value, (str, list, tuple, dict)) or value is None:
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        metrics.append((name, None if math.isnan(value) else value))
+    return metrics
+
+
+def _insert_file(con, path, mtime, rows):
+    sweep = os.path.basename(os.path.dirname(os.path.dirname(path)))  # {var_param}_{timestamp}
+    var_param = sweep.split("_", 1)[0]
+    file_id = con.execute("INSERT INTO files (path, mtime) VALUES (?, ?)", (path, mtime)).lastrowid
+    for row in rows:
+        values = {**row, "sweep": sweep, "var_param": var_param}
+        run_id = con.execute(
+            f"INSERT INTO runs (file_id, {', '.join(RUN_COLUMNS)}) VALUES (?{', ?' * len(RUN_COLUMNS)})",
+            (file_id, *[_column_value(values.get(column)) for column in RUN_COLUMNS])
+        ).lastrowid
+        con.executemany("INSERT INTO metrics (run_id, name, value) VALUES (?, ?, ?)",
+                        [(run_id, name, value) for name, value in _row_metrics(row)])
+
+
+# Add new and changed result files to the index and remove deleted ones. Returns the number of (re)loaded files.
+def update_index(results_dir=RESULTS_DIR, index_path=INDEX_PATH):
+    paths = sorted(glob.glob(os.path.join(results_dir, "*", "*", "all_results_*.pkl")))
+    with connect(index_path) as con:
+        known = dict(con.execute("SELECT path, mtime FROM files"))
+        loaded = 0
+        for path in paths:
+            mtime = os.path.getmtime(path)
+            if known.get(path) == mtime:
+                continue
+            with open(path, "rb") as f:
+                rows = pickle.load(f)
+            con.execute("DELETE FROM files WHERE path = ?", (path,))
+            _insert_file(con, path, mtime, rows)
+            loaded += 1
+        removed = set(known) - set(paths)
+        con.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+    con.close()
+    return loaded
+
+
+# Mean, standard deviation, count, min and max of a metric per group. filters: {column: value} on RUN_COLUMNS,
+# e.g. query_metric("ratio_alg_opt", group_by="n", algorithm="primal_dual_minmax", k=5)
+def query_metric(metric, group_by="varying_param", index_path=INDEX_PATH, **filters):
+    for column in (group_by, *filters):
+        if column not in RUN_COLUMNS:
+            raise ValueError(f"Unknown column: {column}. Options: {', '.join(RUN_COLUMNS)}")
+    where = "".join(f" AND r.{column} = ?" for column in filters)
+    sql = (f"SELECT r.{group_by}, AVG(m.value), AVG(m.value * m.value), COUNT(m.value), MIN(m.value), MAX(m.value) "
+           f"FROM metrics m JOIN runs r ON r.run_id = m.run_id "
+           f"WHERE m.name = ? AND m.value IS NOT NULL{where} GROUP BY r.{group_by} ORDER BY r.{group_by}")
+    con = connect(index_path)
+    rows = con.execute(sql, (metric, *[_column_value(value) for value in filters.values()])).fetchall()
+    con.close()
+
+    result = []
+    for group, mean, mean_sq, count, minimum, maximum in rows:
+        sd = math.sqrt(max(0.0, mean_sq - mean * mean) * count / (count - 1)) if count > 1 else math.nan
+        result.append({group_by: group, "mean": mean, "sd": sd, "count": count, "min": minimum, "max": maximum})
+    return result
+
+
+def list_metrics(index_path=INDEX_PATH):
+    con = connect(index_path)
+    names = [name for (name,) in con.execute("SELECT DISTINCT name FROM metrics ORDER BY name")]
+    con.close()
+    return names
+
+
+# Convert "k=5" to ("k", 5); numbers are compared as numbers, everything else as text
+def _parse_filter(text):
+    column, _, value = text.partition("=")
+    for convert in (int, float):
+        try:
+            return column, convert(value)
+        except ValueError:
+            pass
+    return column, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and query results of all experiments.")
+    parser.add_argument("--index", default=INDEX_PATH, help="Path of the SQLite index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    update = commands.add_parser("update", help="Scan result directories and update the index")
+    update.add_argument("--results-dir", default=RESULTS_DIR)
+    query = commands.add_parser("query", help="Aggregate a metric per group")
+    query.add_argument("metric")
+    query.add_argument("--group-by", default="varying_param")
+    query.add_argument("--algorithm")
+    query.add_argument("--where", action="append", default=[], help="Filter column=value (repeatable)")
+    commands.add_parser("metrics", help="List all indexed metrics")
+    args = parser.parse_args()
+
+    if args.command == "update":
+        print(f"Loaded {update_index(args.results_dir, args.index)} new or changed result files into {args.index}")
+    elif args.command == "metrics":
+        print("\n".join(list_metrics(args.index)))
+    else:
+        filters = dict(_parse_filter(text) for text in args.where)
+        if args.algorithm:
+            filters["algorithm"] = args.algorithm
+        rows = query_metric(args.metric, args.group_by, args.index, **filters)
+        print(f"{args.group_by:>14} {'mean':>10} {'sd':>10} {'count':>6} {'min':>10} {'max':>10}")
+        for row in rows:
+            print(f"{str(row[args.group_by]):>14} {row['mean']:>10.4f} {row['sd']:>10.4f} {row['count']:>6} "
+                  f"{row['min']:>10.4f} {row['max']:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# scenario_sketch.py
+
+# Scenario sketches for very large k: the algorithms solve on a few weighted representative scenarios instead of all k.
+
+# Description: A sketch is a size x n matrix S with weights (summing to 1) that summarises the k scenarios:
+# - "kmeans":  k-means clustering of the scenario rows (farthest-point initialisation, Lloyd iterations). The rows of S
+#              are the cluster means, the weights the cluster sizes / k (so weights @ S is the exact mean scenario).
+# - "extreme": farthest-point selection of actual scenarios, starting with the scenario of largest total cost (the
+#              scenarios that are most different from each other, typically the worst cases). Weights: share of the
+#              scenarios closest to each selected one.
+# - "sample":  uniform sample of actual scenarios with equal weights.
+# Every sketch row is a scenario or a convex combination of scenarios, so max_s' S[s']·x <= max_s c[s]·x for every x:
+# LP values and dual objectives computed on the sketch remain valid lower bounds for the full problem. The selection of
+# an algorithm is evaluated exactly on all k scenarios in one pass (selection_costs); the worst-case error of the
+# sketch is (full worst case - sketch worst case) / full worst case of that selection.
+
+import numpy as np
+from kernels import selection_costs
+
+SKETCH_METHODS = ("kmeans", "extreme", "sample")
+KMEANS_ITERATIONS = 20
+
+
+def _squared_distances(A, B):
+    return np.maximum((A * A).sum(axis=1)[:, None] - 2.0 * A @ B.T + (B * B).sum(axis=1)[None, :], 0.0)
+
+
+def _farthest_points(C, size):
+    chosen = [int(np.argmax(C.sum(axis=1)))]
+    distance = _squared_distances(C, C[chosen])[:, 0]
+    for _ in range(size - 1):
+        chosen.append(int(np.argmax(distance)))
+        distance = np.minimum(distance, _squared_distances(C, C[chosen[-1:]])[:, 0])
+    return chosen
+
+
+# Sketch of the k x n cost matrix C with size rows. Returns S (size x n, float64) and the weights (length size).
+def sketch_scenarios(C, size, method="kmeans", seed=0):
+    if method not in SKETCH_METHODS:
+        raise ValueError(f"Unknown sketch method: {method}. Options: {', '.join(SKETCH_METHODS)}")
+    C = np.asarray(C, dtype=np.float64)
+    k = C.shape[0]
+    size = min(int(size), k)
+    if size < 1:
+        raise ValueError("Sketch size must be at least 1.")
+
+    if method == "sample":
+        rows = np.sort(np.random.default_rng(seed).choice(k, size=size, replace=False))
+        return C[rows], np.full(size, 1.0 / size)
+
+    chosen = _farthest_points(C, size)
+    S = C[chosen]
+    labels = np.argmin(_squared_distances(C, S), axis=1)
+    if method == "kmeans":
+        for _ in range(KMEANS_ITERATIONS):
+            counts = np.bincount(labels, minlength=size)
+            sums = np.zeros_like(S)
+            np.add.at(sums, labels, C)
+            S = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], S)
+            new_labels = np.argmin(_squared_distances(C, S), axis=1)
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+        # Means of the final clusters (empty clusters keep their row and get weight 0)
+        counts = np.bincount(labels, minlength=size)
+        sums = np.zeros_like(S)
+        np.add.at(sums, labels, C)
+        S = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], S)
+    weights = np.bincount(labels, minlength=size) / k
+    return S, weights
+
+
+# Worst case of the selection (0-based indices) on all scenarios and on the sketch, and the relative sketch error
+def sketch_error(C, S, selected):
+    full = float(selection_costs(C, selected).max())
+    sketched = float(S[:, selected].sum(axis=1).max())
+    return full, sketched, (full - sketched) / full if full != 0 else 0.0
+
+
+# Sketch info for the info dict of the algorithms
+def sketch_info(C, S, method, selected):
+    _, sketched, error = sketch_error(C, S, selected)
+    return {"sketch_size": S.shape[0], "sketch_method": method, "sketch_worst_case": sketched,
+            "sketch_error": error}
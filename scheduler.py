@@ -0,0 +1,183 @@
+# scheduler.py
+
+# Makespan-aware scheduling of solver tasks on a pool of workers with a learned solve-time model.
+
+# Description: Solve times grow by orders of magnitude with n, p and k (the exact MILP is hardest for p close to n/2),
+# so running tasks in grid order leaves workers idle at the end. SolveTimeModel predicts the time of a task from
+#   log t = b0 + b1 log n + b2 log k + b3 log binom(n, p)
+# per algorithm (ridge least squares on the sufficient statistics X^T X and X^T y, so updates are O(1) in the number of
+# observations). It is fitted on the per-run timings of earlier sweeps (time_exact, time_algorithm in the results index)
+# and refined with every finished task. run_lpt dispatches the task with the longest predicted time whenever a worker
+# becomes free (longest processing time first, re-predicted with the refined model) and reports predicted and actual
+# makespan and the predicted and actual time of every task. The actual time of a task is measured in the worker around
+# the function call, so queueing, pickling and the time until the result is collected are not counted.
+# The scheduler is standalone: main.py runs its sweep in grid order and does not use it.
+
+# Usage: python scheduler.py (exact MILPs of a small grid with HiGHS on all cores, cost matrices in shared memory, see
+# shared_instances.py; fitted on results/index.sqlite if it exists, see results_index.py)
+
+import heapq
+import math
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+
+RIDGE = 1e-3
+PRIOR_SECONDS_PER_UNIT = 1e-4  # Prior without observations: t = PRIOR_SECONDS_PER_UNIT * n * k * log binom(n, p)
+
+
+def _log_binomial(n, p):
+    return math.lgamma(n + 1) - math.lgamma(p + 1) - math.lgamma(n - p + 1)
+
+
+class SolveTimeModel:
+    def __init__(self, ridge=RIDGE):
+        self.ridge = ridge
+        self.stats = {}  # algorithm -> [X^T X, X^T y, count]
+        self.coefficients = {}
+
+    @staticmethod
+    def features(n, p, k):
+        return np.array([1.0, math.log(n), math.log(k), math.log1p(_log_binomial(n, p))])
+
+    def update(self, algorithm, n, p, k, seconds):
+        if seconds <= 0:
+            return  # Certified or skipped runs carry no timing information
+        x = self.features(n, p, k)
+        xtx, xty, count = self.stats.get(algorithm, (np.zeros((x.size, x.size)), np.zeros(x.size), 0))
+        self.stats[algorithm] = [xtx + np.outer(x, x), xty + x * math.log(seconds), count + 1]
+        self.coefficients.pop(algorithm, None)
+
+    def _coefficients(self, algorithm):
+        if algorithm not in self.coefficients:
+            xtx, xty, _ = self.stats[algorithm]
+            self.coefficients[algorithm] = np.linalg.solve(xtx + self.ridge * np.eye(xty.size), xty)
+        return self.coefficients[algorithm]
+
+    def observations(self, algorithm):
+        return self.stats[algorithm][2] if algorithm in self.stats else 0
+
+    # Predicted seconds (prior while fewer observations than features)
+    def predict(self, algorithm, n, p, k):
+        x = self.features(n, p, k)
+        if self.observations(algorithm) < x.size:
+            return PRIOR_SECONDS_PER_UNIT * n * k * max(1.0, _log_binomial(n, p))
+        return float(np.exp(x @ self._coefficients(algorithm)))
+
+    # Fit on the indexed results (results_index.py): metric time_exact (algorithm "exact_<criterion>") or time_algorithm
+    def fit_from_index(self, index_path, metric="time_exact"):
+        con = sqlite3.connect(index_path)
+        try:
+            rows = con.execute(
+                "SELECT r.algorithm, r.criterion, r.n, r.p, r.k, m.value FROM runs r JOIN metrics m "
+                "ON m.run_id = r.run_id WHERE m.name = ?", (metric,)).fetchall()
+        finally:
+            con.close()
+        for algorithm, criterion, n, p, k, seconds in rows:
+            if seconds is not None and None not in (n, p, k):
+                key = f"exact_{criterion}" if metric == "time_exact" else algorithm
+                self.update(key, int(n), int(p), int(k), seconds)
+        return len(rows)
+
+
+# Makespan of list scheduling (every task goes to the first free worker) of durations in the given order
+def list_makespan(durations, workers):
+    loads = [0.0] * workers
+    for duration in durations:
+        heapq.heapreplace(loads, loads[0] + duration)
+    return max(loads)
+
+
+def lpt_makespan(durations, workers):
+    return list_makespan(sorted(durations, reverse=True), workers)
+
+
+def _predict(model, task):
+    return model.predict(task["algorithm"], task["n"], task["p"], task["k"])
+
+
+# Runs in the worker: result of function(task) and its run time in seconds
+def _timed_call(function, task):
+    start = time.perf_counter()
+    result = function(task)
+    return result, time.perf_counter() - start
+
+
+# Run function(task) for all tasks (dicts with "algorithm", "n", "p", "k") on workers, longest predicted first
+# (processes=True: function must be picklable, i.e. defined at module level). Returns the results in task order and the
+# report (predicted and actual makespan, per-task times measured in the workers).
+def run_lpt(tasks, function, model, workers=None, processes=True):
+    workers = workers or os.cpu_count()
+    predicted_start = [_predict(model, task) for task in tasks]
+    results = [None] * len(tasks)
+    timings = [None] * len(tasks)
+    pending = list(range(len(tasks)))
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    start = time.perf_counter()
+    with executor(max_workers=workers) as pool:
+        running = {}
+        while pending or running:
+            # Longest predicted task first, with the model refined by all finished tasks
+            pending.sort(key=lambda j: _predict(model, tasks[j]))
+            while pending and len(running) < workers:
+                i = pending.pop()
+                predicted = _predict(model, tasks[i])
+                running[pool.submit(_timed_call, function, tasks[i])] = (i, predicted)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, predicted = running.pop(future)
+                results[i], actual = future.result()
+                timings[i] = {"predicted": predicted, "actual": actual}
+                model.update(tasks[i]["algorithm"], tasks[i]["n"], tasks[i]["p"], tasks[i]["k"], actual)
+
+    actual_times = [timing["actual"] for timing in timings]
+    report = {
+        "workers": workers,
+        "predicted_makespan": lpt_makespan(predicted_start, workers),
+        "actual_makespan": time.perf_counter() - start,
+        "lpt_makespan_actual_times": lpt_makespan(actual_times, workers),  # Makespan with perfect predictions
+        "in_order_makespan_actual_times": list_makespan(actual_times, workers),
+        "tasks": [{**{key: task[key] for key in ("algorithm", "n", "p", "k")}, **timing}
+                  for task, timing in zip(tasks, timings)]
+    }
+    return results, report
+
+
+# Exact MILP of a task; task["costs"] is the descriptor of its cost matrix in a SharedInstanceStore (no copy per task)
+def _solve_exact_task(task):
+    from exact_solution_minmax import solve_exact_robust_selection_minmax
+    from shared_instances import open_instance
+    from utils import CostArray
+    n, p, k = task["n"], task["p"], task["k"]
+    return solve_exact_robust_selection_minmax(CostArray(open_instance(task["costs"])), n, p, k, backend="highs")[0]
+
+
+if __name__ == "__main__":
+    from instance_corpus import get_corpus_costs
+    from results_index import INDEX_PATH
+    from shared_instances import SharedInstanceStore
+
+    N_VALUES = list(range(10, 71, 10))
+    k = 5
+    RUNS = 4
+    grid_tasks = [{"algorithm": "exact_minmax", "n": n, "p": n // 2, "k": k, "index": index}
+                  for n in N_VALUES for index in range(RUNS)]  # Grid order (as main.py)
+    time_model = SolveTimeModel()
+    if os.path.exists(INDEX_PATH):
+        print(f"Fitted on {time_model.fit_from_index(INDEX_PATH)} indexed runs")
+    with SharedInstanceStore() as store:  # The workers attach to the matrices instead of unpickling copies
+        descriptors = store.put_batch([get_corpus_costs("uniform", task["n"], task["k"], task["index"])
+                                       for task in grid_tasks])
+        for task, descriptor in zip(grid_tasks, descriptors):
+            task["costs"] = descriptor
+        _, lpt_report = run_lpt(grid_tasks, _solve_exact_task, time_model)
+    print(f"Workers: {lpt_report['workers']}")
+    print(f"Predicted makespan (LPT): {lpt_report['predicted_makespan']:.2f} s")
+    print(f"Actual makespan (LPT):    {lpt_report['actual_makespan']:.2f} s")
+    print(f"With the actual task times: LPT {lpt_report['lpt_makespan_actual_times']:.2f} s, "
+          f"grid order {lpt_report['in_order_makespan_actual_times']:.2f} s")
+    for row in sorted(lpt_report["tasks"], key=lambda row: -row["actual"])[:10]:
+        print(f"  n = {row['n']:>3}, p = {row['p']:>3}, k = {row['k']:>3}: predicted {row['predicted']:8.3f} s, "
+              f"actual {row['actual']:8.3f} s")
@@ -0,0 +1,238 @@
+# service.py
+
+# Long-running solver service for the robust selection problem.
+
+# Description: Instead of starting main.py for every instance, one process keeps the interpreter, all modules and one
+# silent Gurobi environment per worker thread warm (backend.gurobi_model, closed on shutdown) and solves requests on a
+# thread pool. Requests and responses are JSON lines, either over stdin/stdout or over a TCP socket on localhost:
+#   request:  {"id": 1, "costs": [[...], ...] (k x n), "p": 2, "algorithm": "primal_dual_minmax", "backend": "highs"}
+#             (backend defaults to "gurobi" if it is installed, otherwise "highs")
+#             algorithm: "exact" (MILP, or DP for integer costs and small k; with "criterion" and optional
+#             "time_limit"), "primal_minmax", "primal_repair_minmax", "primal_maxmin" or "primal_dual_minmax"
+#   response: {"id": 1, "ok": true, "algorithm": ..., "objective": ..., "bound": ..., "gap": ..., "optimal": ...,
+#              "selection": [0/1, ...], "solve_time": ..., "latency": ...} or {"id": 1, "ok": false, "error": "..."}
+#   commands: {"command": "metrics"} (latency percentiles, throughput, queue) and {"command": "ping"}
+# Responses are written when a request is finished, so they can arrive out of order (use "id").
+
+# Usage:
+#   python service.py --stdin < jobs.jsonl > results.jsonl
+#   python service.py --port 8765 [--workers 4]       (localhost only; send_requests() is a client)
+
+import argparse
+import json
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from main import ALGORITHM_DISPATCH, EXACT_DISPATCH, algorithm_certificate
+from exact_solution_dp import dp_is_tractable
+from backend import gurobi_available, close_gurobi_envs
+from utils import CostArray, has_integer_costs
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+LATENCY_WINDOW = 10000  # Number of recent latencies kept for the percentiles
+
+
+class ServiceMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.received = 0
+        self.completed = 0
+        self.failed = 0
+        self.latencies = []
+
+    def request_received(self):
+        with self.lock:
+            self.received += 1
+
+    def request_done(self, latency, ok):
+        with self.lock:
+            self.completed += 1
+            self.failed += 0 if ok else 1
+            self.latencies.append(latency)
+            del self.latencies[:-LATENCY_WINDOW]
+
+    def snapshot(self):
+        with self.lock:
+            uptime = time.perf_counter() - self.started
+            latencies = np.asarray(self.latencies)
+            percentiles = np.percentile(latencies, [50, 95, 99]).tolist() if latencies.size else [None] * 3
+            return {
+                "uptime": uptime,
+                "received": self.received,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_queue": self.received - self.completed,
+                "throughput": self.completed / uptime if uptime > 0 else 0.0,
+                "latency_p50": percentiles[0],
+                "latency_p95": percentiles[1],
+                "latency_p99": percentiles[2],
+                "latency_max": float(latencies.max()) if latencies.size else None
+            }
+
+
+# Solve one request. Returns the response dict (raises ValueError/RuntimeError on invalid input or solver failure;
+# SolverService turns any exception into an error response).
+def solve_request(request):
+    C = np.asarray(request["costs"])
+    if C.ndim != 2 or C.size == 0:
+        raise ValueError("costs must be a non-empty k x n matrix")
+    k, n = C.shape
+    p = int(request["p"])
+    if not 1 <= p <= n:
+        raise ValueError(f"p must be between 1 and n = {n}")
+    costs = CostArray(C)
+    algorithm = request.get("algorithm", "primal_dual_minmax")
+    backend = request.get("backend", "gurobi" if gurobi_available() else "highs")
+
+    start = time.perf_counter()
+    if algorithm == "exact":
+        criterion = request.get("criterion", "minmax")
+        if criterion not in EXACT_DISPATCH:
+            raise ValueError(f"Unknown criterion: {criterion}")
+        if has_integer_costs(C) and dp_is_tractable(costs, n, p, k, criterion):
+            obj_val, x_val = EXACT_DISPATCH[criterion]["dp"](costs, n, p, k)
+            info = {"bound": obj_val, "gap": 0.0, "optimal": True}
+        else:
+            info = {}
+            obj_val, x_val = EXACT_DISPATCH[criterion]["milp"](costs, n, p, k, backend=backend,
+                                                               time_limit=request.get("time_limit"), info=info)
+        bound, gap, optimal = info["bound"], info["gap"], info["optimal"]
+    elif algorithm in ALGORITHM_DISPATCH:
+        result = ALGORITHM_DISPATCH[algorithm]["function"](costs, n, p, k, backend=backend)
+        obj_val, bound, x_val = algorithm_certificate(algorithm, result)
+        gap = abs(obj_val - bound) / max(abs(obj_val), 1e-10)
+        optimal = gap <= 1e-9
+    else:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+
+    return {
+        "algorithm": algorithm,
+        "objective": float(obj_val),
+        "bound": float(bound),
+        "gap": float(gap),
+        "optimal": bool(optimal),
+        "selection": [1 if val > 0.5 else 0 for val in x_val],
+        "solve_time": time.perf_counter() - start
+    }
+
+
+class SolverService:
+    def __init__(self, workers=4):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="solver")
+        self.metrics = ServiceMetrics()
+
+    # Handle one JSON line; respond(dict) is called with the response (from a worker thread for solve requests)
+    def handle_line(self, line, respond):
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            respond({"ok": False, "error": f"Invalid JSON: {e}"})
+            return
+        if not isinstance(request, dict):
+            respond({"ok": False, "error": f"Request must be a JSON object, not {type(request).__name__}"})
+            return
+        command = request.get("command")
+        if command == "metrics":
+            respond({"id": request.get("id"), "ok": True, "metrics": self.metrics.snapshot()})
+        elif command == "ping":
+            respond({"id": request.get("id"), "ok": True})
+        elif command is not None:
+            respond({"id": request.get("id"), "ok": False, "error": f"Unknown command: {command}"})
+        else:
+            self.metrics.request_received()
+            self.pool.submit(self._solve, request, time.perf_counter(), respond)
+
+    def _solve(self, request, received, respond):
+        try:
+            response = {"id": request.get("id"), "ok": True, **solve_request(request)}
+        except Exception as e:  # Every request gets a response, also for unexpected solver errors
+            response = {"id": request.get("id"), "ok": False, "error": f"{type(e).__name__}: {e}"}
+        response["latency"] = time.perf_counter() - received
+        self.metrics.request_done(response["latency"], response["ok"])
+        respond(response)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+        if gurobi_available():
+            close_gurobi_envs()  # The per-thread environments of the finished workers
+
+
+# Thread-safe writer of JSON lines to a text stream or a socket file
+def _line_writer(stream):
+    lock = threading.Lock()
+
+    def respond(response):
+        with lock:
+            stream.write(json.dumps(response) + "\n")
+            stream.flush()
+    return respond
+
+
+def serve_stdin(service, stdin=sys.stdin, stdout=sys.stdout):
+    respond = _line_writer(stdout)
+    for line in stdin:
+        if line.strip():
+            service.handle_line(line, respond)
+    service.shutdown()  # Wait for all requests before the stream is closed
+
+
+def serve_tcp(service, port=DEFAULT_PORT):
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            respond = _line_writer(self.wfile_text)
+            for line in self.rfile:
+                if line.strip():
+                    service.handle_line(line.decode(), respond)
+
+        def setup(self):
+            super().setup()
+            self.wfile_text = self.connection.makefile("w", encoding="utf-8")
+
+    server = socketserver.ThreadingTCPServer((HOST, port), Handler)
+    server.daemon_threads = True
+    print(f"Solver service listening on {HOST}:{port}", file=sys.stderr)
+    return server
+
+
+# Client: send requests (dicts) to a running service on localhost and return the responses in request order
+# (every request needs a unique "id")
+def send_requests(requests, port=DEFAULT_PORT, timeout=None):
+    with socket.create_connection((HOST, port), timeout=timeout) as connection:
+        reader = connection.makefile("r", encoding="utf-8")
+        connection.sendall("".join(json.dumps(request) + "\n" for request in requests).encode())
+        responses = {}
+        while len(responses) < len(requests):
+            response = json.loads(reader.readline())
+            responses[response.get("id")] = response
+    return [responses[request.get("id")] for request in requests]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solver service for the robust selection problem (JSON lines).")
+    parser.add_argument("--stdin", action="store_true", help="Read requests from stdin, write responses to stdout")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port on localhost")
+    parser.add_argument("--workers", type=int, default=4, help="Number of solver threads")
+    args = parser.parse_args()
+
+    service = SolverService(args.workers)
+    if args.stdin:
+        serve_stdin(service)
+        return
+    server = serve_tcp(service, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# shared_instances.py
+
+# Zero-copy transfer of cost matrices to worker processes.
+
+# Description: Passing a cost matrix to a worker process pickles and copies it (for dictionaries even every (s, i) key).
+# SharedInstanceStore instead places matrices, or whole batches of them, in one multiprocessing.shared_memory segment
+# ("shm") or in one memory-mapped file ("memmap") and returns a small descriptor per matrix:
+#   {"kind": "shm" | "memmap", "name": segment name or file path, "shape": (k, n), "dtype": "uint8", "offset": bytes}
+# Workers call open_instance(descriptor) and get a read-only NumPy view of the segment (CostArray(view) is a valid
+# costs argument for all solvers), so nothing is copied.
+# Lifetime: only the process that created the store owns the segments and files and removes them in close() (also
+# called by the context manager, at interpreter exit and when the store is garbage collected). Workers only attach, so
+# a crashing worker cannot remove or leak anything. If the owner itself is killed, the resource tracker of
+# multiprocessing unlinks leftover shared memory segments; memmap files are created in a temporary directory.
+# scheduler.py passes the cost matrices of its process pool this way; main.py runs on threads and shares memory anyway.
+
+# Usage:
+#   with SharedInstanceStore() as store:
+#       descriptors = store.put_batch(matrices)
+#       results = map_instances(solve_primal_dual_minmax, descriptors, [(n, p, k)] * len(descriptors))
+
+import os
+import tempfile
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from utils import CostArray
+
+ALIGNMENT = 64  # Byte alignment of every matrix within a segment
+_attached = {}  # name -> SharedMemory or np.memmap attached in this (worker) process
+
+
+def _aligned(nbytes):
+    return -(-nbytes // ALIGNMENT) * ALIGNMENT
+
+
+def _release(segments, files):
+    for segment in segments:
+        segment.close()
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+    for path in files:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    segments.clear()
+    files.clear()
+
+
+class SharedInstanceStore:
+    def __init__(self, kind="shm", directory=None):
+        if kind not in {"shm", "memmap"}:
+            raise ValueError(f"Unknown kind: {kind}. Options: shm, memmap")
+        self.kind = kind
+        self.directory = directory
+        self._segments = []
+        self._files = []
+        self._finalizer = weakref.finalize(self, _release, self._segments, self._files)  # Also runs at exit
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Store one k x n matrix. Returns its descriptor.
+    def put(self, C):
+        return self.put_batch([C])[0]
+
+    # Store several matrices in one segment or file. Returns one descriptor per matrix.
+    def put_batch(self, matrices):
+        arrays = [np.ascontiguousarray(C) for C in matrices]
+        offsets = np.cumsum([0] + [_aligned(C.nbytes) for C in arrays]).tolist()
+        size = max(offsets[-1], 1)
+
+        if self.kind == "shm":
+            segment = shared_memory.SharedMemory(create=True, size=size)
+            self._segments.append(segment)
+            name, buffer = segment.name, segment.buf
+        else:
+            fd, name = tempfile.mkstemp(suffix=".costs", dir=self.directory)
+            os.close(fd)
+            self._files.append(name)
+            buffer = np.memmap(name, dtype=np.uint8, mode="w+", shape=(size,))
+
+        descriptors = []
+        for C, offset in zip(arrays, offsets):
+            view = np.ndarray(C.shape, dtype=C.dtype, buffer=buffer, offset=offset)
+            view[...] = C
+            descriptors.append({"kind": self.kind, "name": name, "shape": C.shape, "dtype": C.dtype.str,
+                                "offset": offset})
+        if self.kind == "memmap":
+            buffer.flush()
+            del buffer
+        return descriptors
+
+    # Remove all segments and files of this store (views in workers must not be used afterwards)
+    def close(self):
+        self._finalizer()
+
+
+# Read-only view of the matrix of a descriptor (no copy). The segment or file stays mapped in this process.
+def open_instance(descriptor):
+    name = descriptor["name"]
+    if name not in _attached:
+        if descriptor["kind"] == "shm":
+            _attached[name] = shared_memory.SharedMemory(name=name)
+        else:
+            _attached[name] = np.memmap(name, dtype=np.uint8, mode="r")
+    source = _attached[name]
+    buffer = source.buf if descriptor["kind"] == "shm" else source
+    view = np.ndarray(tuple(descriptor["shape"]), dtype=np.dtype(descriptor["dtype"]), buffer=buffer,
+                      offset=descriptor["offset"])
+    view.flags.writeable = False
+    return view
+
+
+# Unmap all segments and files attached in this process (the owner still has to close the store)
+def detach_all():
+    for source in _attached.values():
+        if isinstance(source, shared_memory.SharedMemory):
+            source.close()
+    _attached.clear()
+
+
+def _call(function, descriptor, args, kwargs):
+    return function(CostArray(open_instance(descriptor)), *args, **kwargs)
+
+
+# Call function(CostArray, *args[i], **kwargs) for every descriptor on a process pool. Returns the results in order.
+# function must be importable by the workers (module-level), e.g. solve_primal_dual_minmax.
+def map_instances(function, descriptors, args, workers=None, **kwargs):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_call, function, descriptor, instance_args, kwargs)
+                   for descriptor, instance_args in zip(descriptors, args)]
+        return [future.result() for future in futures]
+
+
+if __name__ == "__main__":
+    # Transfer cost of pickled matrices against descriptors (same work per instance)
+    from primal_dual_rounding_minmax import solve_primal_dual_minmax
+    from utils import get_random_costs_array
+
+    NUM_INSTANCES = 16
+    n, k = 500000, 20
+    p = n // 2
+    rng = np.random.default_rng(0)
+    matrices = [get_random_costs_array(n, k, 100, rng).astype(np.float64) for _ in range(NUM_INSTANCES)]  # 80 MB each
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor() as pool:
+        pickled = list(pool.map(solve_primal_dual_minmax, [CostArray(C) for C in matrices], [n] * NUM_INSTANCES,
+                                [p] * NUM_INSTANCES, [k] * NUM_INSTANCES))
+    print(f"Pickled matrices: {time.perf_counter() - start:.3f} s")
+
+    for kind in ("shm", "memmap"):
+        start = time.perf_counter()
+        with SharedInstanceStore(kind) as store:
+            shared = map_instances(solve_primal_dual_minmax, store.put_batch(matrices), [(n, p, k)] * NUM_INSTANCES)
+        assert shared == pickled
+        print(f"Shared instances ({kind}): {time.perf_counter() - start:.3f} s")
@@ -0,0 +1,105 @@
+# stats.py
+
+# Streaming statistics for running sweeps.
+
+# Description: RunningStats keeps count, mean, variance (Welford updates), minimum and maximum of a metric in constant
+# memory. Like safe_mean and safe_ci95 in plot.py only finite values are used, and the 95% CI is 1.98 · sd / sqrt(n)
+# with sd the sample standard deviation (0.0 for fewer than 2 values). SweepProgress keeps one RunningStats per
+# (algorithm, varying_param) and metric, and periodically writes a compact JSON summary with throughput and ETA, so a
+# long sweep can be watched (e.g. watch cat results/.../live_summary.json) and aborted early.
+
+import json
+import math
+import os
+import time
+from datetime import datetime
+
+SUMMARY_METRICS = ("ratio_alg_opt", "alg_div_opt_lp", "a_posteriori_bound", "tau", "exact_gap")
+WRITE_INTERVAL = 5.0  # Seconds between two writes of the live summary
+
+
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.nonfinite = 0
+        self.mean = math.nan
+        self.m2 = 0.0
+        self.min = math.nan
+        self.max = math.nan
+
+    def update(self, value):
+        value = float(value)
+        if not math.isfinite(value):
+            self.nonfinite += 1
+            return
+        self.count += 1
+        if self.count == 1:
+            self.mean, self.min, self.max = value, value, value
+            return
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count >= 2 else math.nan
+
+    def ci95(self):
+        if self.count < 2:
+            return 0.0
+        return 1.98 * math.sqrt(self.variance) / math.sqrt(self.count)
+
+    def to_dict(self):
+        values = {"count": self.count, "nonfinite": self.nonfinite, "mean": self.mean, "var": self.variance,
+                  "ci95": self.ci95(), "min": self.min, "max": self.max}
+        return {key: None if isinstance(val, float) and math.isnan(val) else val for key, val in values.items()}
+
+
+class SweepProgress:
+    def __init__(self, path, total_runs, metrics=SUMMARY_METRICS, interval=WRITE_INTERVAL):
+        self.path = path
+        self.total_runs = total_runs
+        self.metrics = metrics
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.last_write = -math.inf
+        self.completed = 0
+        self.groups = {}  # (algorithm, varying_param) -> {metric: RunningStats}
+
+    # Add one result row of main.py; writes the summary if the last write is older than interval
+    def add(self, row):
+        self.completed += 1
+        group = self.groups.setdefault((row["algorithm"], row["varying_param"]), {})
+        for metric in self.metrics:
+            if row.get(metric) is not None:
+                group.setdefault(metric, RunningStats()).update(row[metric])
+        if time.perf_counter() - self.last_write >= self.interval:
+            self.write()
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        throughput = self.completed / elapsed if elapsed > 0 else 0.0
+        remaining = self.total_runs - self.completed
+        return {
+            "updated": datetime.now().isoformat(timespec="seconds"),
+            "completed": self.completed,
+            "total": self.total_runs,
+            "elapsed": elapsed,
+            "throughput": throughput,
+            "eta": remaining / throughput if throughput > 0 else None,
+            "groups": [
+                {"algorithm": algorithm, "varying_param": value,
+                 "metrics": {metric: stats.to_dict() for metric, stats in metrics.items()}}
+                for (algorithm, value), metrics in self.groups.items()
+            ]
+        }
+
+    # Atomic write (readers never see a partial file)
+    def write(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.summary(), f, indent=1)
+        os.replace(tmp_path, self.path)
+        self.last_write = time.perf_counter()
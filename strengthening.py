@@ -0,0 +1,156 @@
+# strengthening.py
+
+# Strengthened formulation of the exact epigraph MILPs (optional argument strengthen of the exact solvers).
+
+# Description: All reductions are derived in cost space (max-min profits are negated, so "cheap" means "profitable")
+# from the cost matrix and an incumbent with value UB (best of backend.greedy_selection and the p cheapest items of
+# every scenario, improved by swapping one selected and one unselected item while the worst case gets better):
+# - "symmetry":    item i dominates item j if c[s,i] <= c[s,j] in every scenario (identical items: smaller index).
+#                  Swapping a selected dominated item for an unselected dominator never makes a scenario worse, so some
+#                  optimal selection satisfies x_i >= x_j for all such pairs (only the transitive reduction is added).
+#                  This breaks the symmetry of identical and near-identical (dominated) items.
+# - "z_bounds":    z >= max over scenarios of the sum of the p smallest costs and z >= the sum of the p smallest
+#                  scenario-averaged costs; z <= UB.
+# - "fixing":      x_i = 0 if item i and the p - 1 cheapest other items already cost more than UB in some scenario.
+# - "cover_cuts":  for the q most expensive items T of a scenario, any selection with t items of T costs at least the
+#                  t cheapest items of T plus the p - t cheapest items outside T. If that exceeds UB for t + 1, then
+#                  sum_{i in T} x_i <= t (cardinality cover cut; for every t only the largest such T is kept).
+# - "aggregation": the scenario-aggregation cut sum_i mean_s(c[s,i]) x_i <= z.
+# The cuts that depend on UB only remove selections with an objective value worse than UB, so the optimal value is
+# unchanged (OPT <= UB). The symmetry constraints keep at least one optimal selection, which satisfies all other cuts.
+
+import numpy as np
+from backend import greedy_selection
+
+STRENGTHENING_OPTIONS = ("symmetry", "z_bounds", "fixing", "cover_cuts", "aggregation")
+SYMMETRY_MAX_ITEMS = 2000  # Pairwise dominance needs O(n^2 k) work and O(n^3) for the transitive reduction
+CUT_TOL = 1e-9  # Relative tolerance for comparisons with UB
+SWAP_ROUNDS = 100  # Max. number of improving swaps for the incumbent
+
+
+# Transitive reduction of the strict dominance relation of the columns of D (cost space). Returns pairs (i, j), 0-based,
+# meaning x_i >= x_j.
+def dominance_pairs(D):
+    n = D.shape[1]
+    weak = np.all(D[:, :, None] <= D[:, None, :], axis=0)
+    equal = np.all(D[:, :, None] == D[:, None, :], axis=0)
+    strict = weak & (~equal | np.triu(np.ones((n, n), dtype=bool), k=1))
+    strict_int = strict.astype(np.int64)
+    implied = (strict_int @ strict_int) > 0
+    return [(int(i), int(j)) for i, j in zip(*np.nonzero(strict & ~implied))]
+
+
+# Incumbent selection (0/1 vector) for the costs D (cost space) and its worst-case cost UB
+def incumbent_selection(D, p, greedy):
+    k, n = D.shape
+    candidates = [greedy] + [np.isin(np.arange(n), np.argsort(D[s], kind="stable")[:p]).astype(float) for s in range(k)]
+    x = min(candidates, key=lambda cand: (D @ cand).max())
+    for _ in range(SWAP_ROUNDS):
+        selected, unselected = np.flatnonzero(x > 0.5), np.flatnonzero(x < 0.5)
+        if selected.size == 0 or unselected.size == 0:
+            break
+        sums = D @ x
+        # Worst case after swapping selected item a for unselected item b: max_s sums - D[s, a] + D[s, b]
+        swapped = (sums[:, None, None] - D[:, selected, None] + D[:, None, unselected]).max(axis=0)
+        a, b = np.unravel_index(np.argmin(swapped), swapped.shape)
+        if swapped[a, b] >= sums.max() - CUT_TOL * max(1.0, abs(sums.max())):
+            break
+        x[selected[a]], x[unselected[b]] = 0.0, 1.0
+    return x, float((D @ x).max())
+
+
+# Cardinality cover cuts of one scenario (costs d, sorted descending = most expensive first). Returns (items, t) pairs.
+def _scenario_cover_cuts(d, p, ub):
+    n = d.size
+    order = np.argsort(-d, kind="stable")
+    asc = d[order[::-1]]  # Ascending costs; the q most expensive items are asc[n - q:]
+    prefix = np.r_[0.0, np.cumsum(asc, dtype=np.float64)]
+    cuts = {}
+    for q in range(1, n + 1):
+        t = np.arange(max(0, p - (n - q)), min(q, p) + 1)
+        min_cost = prefix[p - t] + prefix[n - q + t] - prefix[n - q]  # t cheapest of T, p - t cheapest outside
+        feasible = t[min_cost <= ub]
+        if feasible.size == 0:
+            continue
+        t_max = int(feasible.max())
+        if t_max < min(q, p):
+            cuts[t_max] = order[:q]  # Larger q overwrites smaller q (stronger cut for the same t)
+    return [(items, t_max) for t_max, items in cuts.items()]
+
+
+# Strengthening data for the cost matrix C (k x n) and the options (subset of STRENGTHENING_OPTIONS). Bounds and cuts
+# are returned in the space of the model (z is the worst-case cost for min-max and the worst-case profit for max-min):
+#   z_lb, z_ub (None if not used), fixed_zero (0-based items), order_pairs [(i, j): x_i >= x_j],
+#   cover_cuts [(items, t): sum x_items <= t], aggregation (coefficients of sum_i a_i x_i <= z / >= z, or None)
+def strengthening_data(C, p, criterion="minmax", options=STRENGTHENING_OPTIONS):
+    unknown = set(options) - set(STRENGTHENING_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown strengthening options: {sorted(unknown)}. Options: {STRENGTHENING_OPTIONS}")
+    sign = 1.0 if criterion == "minmax" else -1.0
+    D = sign * np.asarray(C, dtype=np.float64)
+    k, n = D.shape
+    _, ub = incumbent_selection(D, p, greedy_selection(C, p, criterion))
+    ub_tol = ub + CUT_TOL * max(1.0, abs(ub))
+    data = {"z_lb": None, "z_ub": None, "fixed_zero": [], "order_pairs": [], "cover_cuts": [], "aggregation": None}
+
+    if "z_bounds" in options:
+        D_sorted = np.sort(D, axis=1)
+        lb = max(float(D_sorted[:, :p].sum(axis=1).max()), float(np.sort(D.mean(axis=0))[:p].sum()))
+        lb = max(0.0, lb) if criterion == "minmax" else lb  # z >= 0 as in the plain models
+        # z = UB is attained by the incumbent, so the bound needs no tolerance (a padded bound would be reported as
+        # the optimum when the solver ends on it); max(ub, lb) only guards against rounding in the two sums
+        z_ub = max(ub, lb)
+        data["z_lb"], data["z_ub"] = (lb, z_ub) if criterion == "minmax" else (max(0.0, -z_ub), -lb)
+    if "fixing" in options and p > 0:
+        partial = np.sort(D, axis=1)[:, :p - 1].sum(axis=1)  # p - 1 cheapest items per scenario
+        data["fixed_zero"] = np.flatnonzero(np.any(D + partial[:, None] > ub_tol, axis=0)).tolist()
+    if "symmetry" in options and n <= SYMMETRY_MAX_ITEMS:
+        data["order_pairs"] = dominance_pairs(D)
+    if "cover_cuts" in options:
+        for s in range(k):
+            data["cover_cuts"] += [(items.tolist(), t) for items, t in _scenario_cover_cuts(D[s], p, ub_tol)
+                                   if t > 0]  # t = 0 is covered by fixing
+    if "aggregation" in options:
+        data["aggregation"] = np.asarray(C, dtype=np.float64).mean(axis=0)
+    return data
+
+
+# Add the strengthening data to a Gurobi model (x: tupledict with 1-based keys, z: epigraph variable)
+def add_gurobi_strengthening(m, x, z, data, criterion="minmax"):
+    from backend import gp
+    if data["z_lb"] is not None:
+        z.LB, z.UB = data["z_lb"], data["z_ub"]
+    for i in data["fixed_zero"]:
+        x[i + 1].UB = 0
+    m.addConstrs((x[i + 1] >= x[j + 1] for i, j in data["order_pairs"]), name="dominance")
+    m.addConstrs((gp.quicksum(x[i + 1] for i in items) <= t for items, t in data["cover_cuts"]), name="cover")
+    if data["aggregation"] is not None:
+        aggregated = gp.quicksum(a * x[i + 1] for i, a in enumerate(data["aggregation"]))
+        m.addConstr(aggregated <= z if criterion == "minmax" else aggregated >= z, name="aggregation")
+
+
+# Rows A x' <= b (x' = (x_1, ..., x_n, z)) and variable bounds for the HiGHS model (same sign convention as
+# solve_epigraph_highs: minimize sign * z with sign * c[s]·x - sign * z <= 0)
+def highs_strengthening_rows(data, n, criterion="minmax"):
+    sign = 1.0 if criterion == "minmax" else -1.0
+    rows, rhs = [], []
+    for i, j in data["order_pairs"]:
+        row = np.zeros(n + 1)
+        row[i], row[j] = -1.0, 1.0
+        rows.append(row)
+        rhs.append(0.0)
+    for items, t in data["cover_cuts"]:
+        row = np.zeros(n + 1)
+        row[items] = 1.0
+        rows.append(row)
+        rhs.append(float(t))
+    if data["aggregation"] is not None:
+        rows.append(np.r_[sign * data["aggregation"], -sign])
+        rhs.append(0.0)
+    lb = np.zeros(n + 1)
+    ub = np.r_[np.ones(n), np.inf]
+    ub[data["fixed_zero"]] = 0.0
+    if data["z_lb"] is not None:
+        lb[n], ub[n] = data["z_lb"], data["z_ub"]
+    A = np.array(rows).reshape(len(rows), n + 1)
+    return A, np.array(rhs), lb, ub
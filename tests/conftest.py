@@ -0,0 +1,8 @@
+# conftest.py
+
+# The modules live in the repository root (flat layout), so the tests import them from there.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
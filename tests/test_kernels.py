@@ -0,0 +1,131 @@
+# test_kernels.py
+
+# The kernels in kernels.py (NumPy fallback and, if installed, the Numba versions) must return the same results as the
+# reference implementations: the step-by-step primal-dual loop, scenario_costs and minimum_profit from utils.py.
+
+# Usage: python -m pytest tests
+
+import numpy as np
+import pytest
+import kernels
+from kernels import (NUMBA_AVAILABLE, _raise_dual, _selection_costs_loop, _block_min_profits_loop, primal_dual_select,
+                     selection_costs, block_min_profits)
+from primal_dual_rounding_minmax import solve_primal_dual_minmax
+from utils import CostArray, cost_matrix_to_dict, scenario_costs, minimum_profit
+
+NUM_INSTANCES = 100
+SEED = 0
+
+requires_numba = pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba is not installed")
+
+
+# Small random instances with many ties: (check, n, p, k, integer cost matrix k x n)
+def random_instances(seed=SEED, count=NUM_INSTANCES):
+    rng = np.random.default_rng(seed)
+    for check in range(count):
+        n = int(rng.integers(2, 60))
+        k = int(rng.integers(1, 8))
+        p = int(rng.integers(1, n + 1))
+        c = rng.integers(0, int(rng.choice([3, 10, 100])), size=(k, n), endpoint=True)
+        yield check, n, p, k, c
+
+
+def random_blocks(rng, n, p, count=4):
+    return np.array([rng.choice(n, size=p, replace=False) for _ in range(count)], dtype=np.intp)
+
+
+# Reference of _raise_dual: the raises of a in the loop of solve_primal_dual_minmax
+def reference_raise_dual(w_sorted, feas_tol):
+    a = 0.0
+    for t, w_t in enumerate(w_sorted):
+        delta = w_t - a
+        if -feas_tol < delta < 0.0:
+            delta = 0.0
+        elif delta < -feas_tol:
+            return a, t
+        a += delta
+    return a, -1
+
+
+def test_primal_dual_kernel_matches_loop():
+    for check, n, p, k, c in random_instances():
+        costs = cost_matrix_to_dict(c.tolist()) if check % 2 else CostArray(c.astype(np.uint8))
+        kernel = solve_primal_dual_minmax(costs, n, p, k, use_kernel=True)
+        reference = solve_primal_dual_minmax(costs, n, p, k, use_kernel=False)
+        assert kernel == reference, check
+
+
+def test_primal_dual_select_order_and_gamma():
+    for check, n, p, k, c in random_instances():
+        w = c.mean(axis=0)
+        order, a, gamma = primal_dual_select(w, p)
+        assert order.tolist() == sorted(range(n), key=lambda j: (w[j], j))[:p], check
+        assert a == w[order[-1]], check
+        assert np.all(gamma >= 0.0) and np.all(gamma[order[:-1]] == a - w[order[:-1]]), check
+
+
+def test_raise_dual_matches_reference():
+    w_sorted = [0.0, 1.0, 1.0, 2.5, 2.5 - 1e-13, 4.0]
+    assert _raise_dual(w_sorted, 1e-12) == reference_raise_dual(w_sorted, 1e-12)
+    assert _raise_dual([1.0, 0.5], 1e-12) == (1.0, 1)  # Significantly negative slack
+
+
+def test_kernels_match_reference():
+    rng = np.random.default_rng(SEED)
+    for check, n, p, k, c in random_instances():
+        for C in (c.astype(np.uint8), c.astype(np.float64)):
+            selected = rng.choice(n, size=p, replace=False)
+            assert np.array_equal(selection_costs(C, selected), scenario_costs(C, selected)), check
+
+            blocks = random_blocks(rng, n, p)
+            expected = [minimum_profit([(i + 1, None) for i in block], C) for block in blocks]
+            assert block_min_profits(C, blocks).tolist() == expected, check
+
+
+# The loops are compiled by Numba (int64 accumulator); interpreted, they are exact for int64 costs
+def test_loops_match_reference():
+    rng = np.random.default_rng(SEED)
+    for check, n, p, k, c in random_instances():
+        C = c.astype(np.int64)
+        selected = rng.choice(n, size=p, replace=False)
+        assert np.array_equal(_selection_costs_loop(C, selected), scenario_costs(C, selected)), check
+
+        blocks = random_blocks(rng, n, p)
+        expected = [minimum_profit([(i + 1, None) for i in block], C) for block in blocks]
+        assert _block_min_profits_loop(C, blocks).tolist() == expected, check
+
+
+def test_numpy_fallback_without_numba(monkeypatch):
+    monkeypatch.setattr(kernels, "NUMBA_AVAILABLE", False)
+    rng = np.random.default_rng(SEED)
+    for check, n, p, k, c in random_instances(count=20):
+        C = c.astype(np.int64)
+        w = C.mean(axis=0)
+        assert not kernels._compiled_for(C)
+        order, a, _ = primal_dual_select(w, p)
+        assert (a, -1) == reference_raise_dual(w[order].tolist(), 1e-12), check
+        selected = rng.choice(n, size=p, replace=False)
+        assert np.array_equal(selection_costs(C, selected), scenario_costs(C, selected)), check
+
+
+@requires_numba
+def test_numba_kernels_match_reference():
+    rng = np.random.default_rng(SEED)
+    for check, n, p, k, c in random_instances():
+        w_sorted = np.sort(c.mean(axis=0))
+        assert kernels._raise_dual_numba(w_sorted, 1e-12) == reference_raise_dual(w_sorted.tolist(), 1e-12), check
+
+        C = c.astype(np.uint8)
+        assert kernels._compiled_for(C)
+        selected = rng.choice(n, size=p, replace=False).astype(np.intp)
+        assert np.array_equal(kernels._selection_costs_numba(C, selected), scenario_costs(C, selected)), check
+
+        blocks = random_blocks(rng, n, p)
+        expected = [minimum_profit([(i + 1, None) for i in block], C) for block in blocks]
+        assert kernels._block_min_profits_numba(C, blocks).tolist() == expected, check
+
+
+@requires_numba
+def test_numba_not_used_for_float_costs():
+    assert not kernels._compiled_for(np.ones((2, 3)))
+    assert not kernels._compiled_for([[1, 2, 3]])
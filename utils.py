@@ -4,12 +4,23 @@
 
 # Includes generation of fixed or random cost matrices, conversion to dictionary format, debugging prints, helper
 # functions for primal rounding.
+# For large instances, costs can be kept in a compact typed k x n array (CostArray) instead of the dictionary. Scenario
+# evaluations on that array run in cache-sized column chunks, so no full-size temporary copy is created.
+# Costs with few nonzeros (most items only cost something in a few scenarios) can be kept in a CSR matrix
+# (SparseCostArray): model rows, scenario evaluations and weighted costs then only touch the stored entries.
 # To use fixed costs, define scenario-specific cost vectors in get_fixed_costs().
 
 import random
+import numpy as np
 import pandas as pd
 import pickle
 
+# SciPy is only needed for sparse costs and the HiGHS backend
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
 
 # Fixed costs
 def get_fixed_costs(n=None, k=None):
@@ -33,6 +44,30 @@ def get_random_costs(n, k, c_range=100):
     return [[random.randint(1, c_range) for _ in range(n)] for _ in range(k)]
 
 
+# Smallest dtype that holds costs in [1, c_range] (e.g. uint8 for c_range = 100); float32 for non-integer ranges
+def cost_dtype(c_range):
+    if float(c_range).is_integer():
+        return np.min_scalar_type(int(c_range))
+    return np.dtype(np.float32)
+
+
+# Random costs as a compact k x n array (large-instance mode)
+def get_random_costs_array(n, k, c_range=100, rng=None):
+    rng = np.random.default_rng() if rng is None else rng
+    return rng.integers(1, int(c_range), size=(k, n), dtype=cost_dtype(c_range), endpoint=True)
+
+
+# Random sparse costs as a k x n CSR matrix: every item has costs in [1, c_range] in a random share density of the
+# scenarios (at least one) and cost 0 in all others
+def get_sparse_random_costs(n, k, c_range=100, density=0.05, rng=None):
+    rng = np.random.default_rng() if rng is None else rng
+    per_item = max(1, int(round(density * k)))
+    rows = np.concatenate([rng.choice(k, size=per_item, replace=False) for _ in range(n)])
+    cols = np.repeat(np.arange(n), per_item)
+    data = rng.integers(1, int(c_range), size=rows.size, dtype=cost_dtype(c_range), endpoint=True)
+    return sparse.csr_array((data, (rows, cols)), shape=(k, n))
+
+
 # Print costs in a readable format
 def dprint_costs(c, debug=False):
     if not debug:
@@ -50,6 +85,133 @@ def cost_matrix_to_dict(c):
     return {(s + 1, i + 1): c[s][i] for s in range(len(c)) for i in range(len(c[0]))}
 
 
+# Transform cost dictionary (s, i): c back into a k x n NumPy array C[s, i]
+def cost_dict_to_array(costs, n, k):
+    C = np.zeros((k, n), dtype=np.float64)
+    for (s, i), val in costs.items():
+        if s <= k and i <= n:
+            C[s - 1, i - 1] = float(val)
+    return C
+
+
+# Compact cost storage for large instances. Wraps a typed k x n array and supports the same 1-based (s, i) access as
+# the cost dictionary, so every solver accepts either format.
+class CostArray:
+    def __init__(self, array):
+        self.array = np.ascontiguousarray(array)
+
+    def __getitem__(self, key):
+        s, i = key
+        return self.array[s - 1, i - 1].item()
+
+
+# Sparse cost storage: wraps a k x n CSR matrix (entries that are not stored are 0) with the same 1-based (s, i) access
+class SparseCostArray:
+    def __init__(self, matrix):
+        self.matrix = sparse.csr_array(matrix)
+        self.matrix.sum_duplicates()
+
+    def __getitem__(self, key):
+        s, i = key
+        return self.matrix[s - 1, i - 1].item()
+
+    # Stored entries (i, c[s,i]) of scenario s (1-based) with i <= n
+    def row_terms(self, s, n):
+        start, end = self.matrix.indptr[s - 1], self.matrix.indptr[s]
+        items = self.matrix.indices[start:end]
+        keep = items < n
+        return zip((items[keep] + 1).tolist(), self.matrix.data[start:end][keep].tolist())
+
+
+def is_sparse(C):
+    return sparse is not None and sparse.issparse(C)
+
+
+# k x n array view of the costs (no copy for CostArray; SparseCostArray is converted to a dense array)
+def as_cost_array(costs, n, k):
+    if isinstance(costs, CostArray):
+        return costs.array[:k, :n]
+    if isinstance(costs, SparseCostArray):
+        return costs.matrix[:k, :n].toarray()
+    return cost_dict_to_array(costs, n, k)
+
+
+# k x n cost matrix for the sparse-aware paths (model rows, scenario_costs, weighted_costs): the CSR matrix of a
+# SparseCostArray, otherwise as_cost_array
+def as_cost_matrix(costs, n, k):
+    if isinstance(costs, SparseCostArray):
+        return costs.matrix[:k, :n]
+    return as_cost_array(costs, n, k)
+
+
+# Terms (i, c[s,i]) of the row of scenario s (1-based) for the Gurobi models: all n items, or only the stored entries of
+# a SparseCostArray
+def scenario_terms(costs, s, n):
+    if isinstance(costs, SparseCostArray):
+        return costs.row_terms(s, n)
+    return ((i, costs[s, i]) for i in range(1, n + 1))
+
+
+# Compact record of sparse costs for the result files (CSR arrays as lists)
+def sparse_cost_record(costs):
+    matrix = costs.matrix
+    return {"shape": list(matrix.shape), "indptr": matrix.indptr.tolist(), "indices": matrix.indices.tolist(),
+            "data": matrix.data.tolist()}
+
+
+# True if all costs are integers (then OPT is integral and LP bounds can be rounded)
+def has_integer_costs(C):
+    values = C.data if is_sparse(C) else C
+    return bool(np.issubdtype(C.dtype, np.integer) or np.all(np.mod(values, 1) == 0))
+
+
+# Certificate of optimality: True if the objective value of a feasible selection meets a bound on OPT (lower bound for
+# min-max, upper bound for max-min). For integer costs OPT is integral, so the bound is rounded first.
+def bound_closes(criterion, obj_val, bound, integer_costs, tol=1e-6):
+    if criterion == "minmax":
+        if integer_costs:
+            bound = np.ceil(bound - tol)
+        return obj_val <= bound + tol * max(1.0, abs(bound))
+    if integer_costs:
+        bound = np.floor(bound + tol)
+    return obj_val >= bound - tol * max(1.0, abs(bound))
+
+
+# Number of columns per chunk so that one chunk (as float64) fits into about CHUNK_BYTES
+CHUNK_BYTES = 1 << 20
+
+
+def chunk_columns(C):
+    return max(1, CHUNK_BYTES // (8 * max(1, C.shape[0])))
+
+
+# Cost of the selected items (0-based indices) in every scenario, accumulated chunk by chunk
+def scenario_costs(C, selected):
+    selected = np.asarray(selected, dtype=np.intp)
+    acc_dtype = np.int64 if np.issubdtype(C.dtype, np.integer) else np.float64
+    if is_sparse(C):
+        indicator = np.zeros(C.shape[1], dtype=acc_dtype)
+        indicator[selected] = 1
+        return C @ indicator
+    total = np.zeros(C.shape[0], dtype=acc_dtype)
+    step = chunk_columns(C)
+    for j in range(0, selected.size, step):
+        total += C[:, selected[j:j + step]].sum(axis=1, dtype=acc_dtype)
+    return total
+
+
+# Weighted costs w = C^T b, computed chunk by chunk (avoids a float64 copy of a compact C)
+def weighted_costs(C, b):
+    if is_sparse(C):
+        return np.asarray(C.T @ np.asarray(b, dtype=np.float64), dtype=np.float64)
+    n = C.shape[1]
+    w = np.empty(n, dtype=np.float64)
+    step = chunk_columns(C)
+    for j in range(0, n, step):
+        w[j:j + step] = b @ C[:, j:j + step]
+    return w
+
+
 # View all results from a .pkl in a table
 def dprint_all_results_from_pkl(pkl_path, debug=False):
     if not debug:
@@ -88,6 +250,6 @@ def build_chunks_with_fill(sorted_x_vals, p):
     return chunks
 
 
-def minimum_profit(block, costs, k):
-    block_indices = [i for i, _ in block]
-    return min(sum(costs[s, i] for i in block_indices) for s in range(1, k + 1))
+def minimum_profit(block, C):
+    block_indices = [i - 1 for i, _ in block]  # Block items are 1-based
+    return scenario_costs(C, block_indices).min().item()